@@ -5,4 +5,12 @@
 """
 
 from nasapy.api import tle, close_approach, fireballs, media_search, media_asset_captions, media_asset_metadata, \
-    media_asset_manifest, Nasa, mission_design, julian_date, nhats, scout, sentry, exoplanets
+    media_asset_manifest, Nasa, AsyncNasa, mission_design, julian_date, nhats, scout, sentry, exoplanets, \
+    batch, BatchResult
+from nasapy.transport import AsyncTransport, Transport, create_session, get_transport, set_transport
+from nasapy.ratelimit import KeyPool, RateLimiter, TokenBucket
+from nasapy.cache import MemoryCache, SQLiteCache
+from nasapy.retry import RetryPolicy
+from nasapy.frames import donki_frames, neo_frame, wsa_enlil_arrays
+from nasapy.index import CloseApproachIndex, CMEAnalysisIndex, DonkiGraph
+from nasapy.donki import DONKI_EVENT_TYPES, DonkiEvent, DonkiStore
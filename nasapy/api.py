@@ -5,12 +5,48 @@
 """
 
 
+import asyncio
 import datetime
-from urllib.parse import urljoin
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed as completed_futures
+from contextlib import closing
+from functools import partial
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
 from pandas import DataFrame
 
 import requests
 
+from nasapy.cache import SETTLED_DAYS
+from nasapy.donki import DONKI_EVENT_TYPES, _DONKI_FIELDS, _events, _record_id
+from nasapy.frames import donki_frames, neo_frame
+from nasapy.index import CMEAnalysisIndex
+from nasapy.ratelimit import KeyPool
+from nasapy.stream import iter_records
+from nasapy.transport import AsyncTransport, Transport, as_transport, get_transport
+
+
+# Holds the client the module-level endpoint functions send their requests through while an AsyncNasa method is
+# preparing a call. Outside of such a call no client is bound and the default transport is used.
+_bound = threading.local()
+
+#: The outcome of one call run by :code:`batch`. :code:`error` holds the exception raised by a failed call, in which
+#: case :code:`result` is None.
+BatchResult = namedtuple('BatchResult', ['index', 'method', 'kwargs', 'result', 'error'])
+
+#: The default number of days spanned by each request of the DONKI methods. Longer ranges are split into windows
+#: that are requested concurrently.
+DONKI_WINDOW_DAYS = 365
+
+#: The number of seconds the CME analyses fetched by :code:`Nasa.coronal_mass_ejection` with :code:`local_filter` are
+#: reused for, and the number of date ranges kept at most.
+CME_ANALYSIS_TTL = 600
+CME_ANALYSIS_RANGES = 16
+
 
 class Nasa(object):
     r"""
@@ -22,11 +58,30 @@ class Nasa(object):
         The generated API key received from the NASA API. Registering for an API key can be done on the `NASA API
         webpage <https://api.nasa.gov/>`_. If :code:`None`, a 'DEMO_KEY' with a much more restricted access limit
         is used.
+    keys : list, default None
+        Several API keys to spread requests across. Each request uses the key with the most quota remaining, and
+        keys whose quota is exhausted are skipped until their window resets. The key is chosen by the transport for
+        each attempt, so a custom transport must accept the :code:`key_pool` keyword of :code:`Transport.get` to
+        rotate keys. Cannot be combined with :code:`key`.
+    transport : Transport, requests.Session, default None
+        The HTTP transport used to issue requests. A bare :code:`requests.Session` is wrapped in a
+        :code:`Transport`. If :code:`None`, the instance creates and owns a pooled :code:`Transport` so
+        connections to the NASA API hosts are kept alive between calls.
+    retry : RetryPolicy, default None
+        The timeouts, retries and per-call deadline applied to the requests of the instance in place of the
+        transport's policy. The transport itself is not changed, so it can be shared with clients using other
+        policies. If :code:`None`, the transport's policy is used.
 
     Attributes
     ----------
     key : str, None
         The specified key when initializing the class.
+    key_pool : KeyPool, None
+        The pool of keys requests are spread across when :code:`keys` is specified.
+    transport : Transport
+        The transport used to issue requests.
+    retry : RetryPolicy, None
+        The policy passed with each request, or None to use the transport's policy.
     limit_remaining : int
         The number of API calls available.
     mars_weather_limit_remaining : int
@@ -42,6 +97,10 @@ class Nasa(object):
         Returns a list of asteroids based on their closest approach date to Earth.
     get_asteroids
         Returns data from the overall asteroid data-set or specific asteroids given an ID.
+    get_asteroids_many
+        Returns data on many asteroids given their IDs, fetching them concurrently.
+    browse_asteroids
+        Iterates over every asteroid in the NeoWs catalog, fetching the pages of the browse endpoint concurrently.
     coronal_mass_ejection
         Returns data collected on coronal mass ejection events from the Space Weather Database of Notifications,
         Knowledge, Information (DONKI).
@@ -69,9 +128,21 @@ class Nasa(object):
     wsa_enlil_simulation
         Returns data available from the Space Weather Database of Notifications, Knowledge, Information
         (DONKI) API.
+    donki_all
+        Returns the events of several DONKI event types in one time-ordered list, requesting the event types
+        concurrently.
+    donki_sync
+        Brings a local store of DONKI records up to date, requesting each event type only from the latest event
+        already stored.
     epic
         The EPIC API provides data on the imagery collected by the DSCOVR's Earth Polychromatic Imaging Camera
         (EPIC).
+    epic_range
+        Returns the EPIC image metadata of every date in a range, requesting only the dates with imagery and
+        requesting them concurrently.
+    epic_download
+        Downloads EPIC images from the archive to a directory, several at a time, resuming interrupted downloads and
+        skipping images already downloaded.
     earth_imagery
         Retrieves the URL and other information from the Landsat 8 image database for the specified lat/lon location
         and date.
@@ -87,16 +158,43 @@ class Nasa(object):
         Laboratory's (ANL) Metagenomics Rapid Annotations using Subsystems Technology (MG-RAST).
     techport
         Retrieves available NASA project data.
+    batch
+        Runs many method or endpoint function calls concurrently over the instance's connection pool.
 
     """
-    def __init__(self, key=None):
+    def __init__(self, key=None, keys=None, transport=None, retry=None):
+
+        if keys is not None:
+            if key is not None:
+                raise ValueError('only one of the key or keys parameters should be specified.')
+
+            self.key_pool = KeyPool(keys)
+            key = self.key_pool.keys[0]
+
+        else:
+            self.key_pool = None
 
         self.api_key = key
 
+        if transport is None:
+            transport = Transport()
+
+        self.transport = as_transport(transport)
+        self.retry = retry
+
         self.host = 'https://api.nasa.gov'
         self.limit_remaining = None
         self.mars_weather_limit_remaining = None
 
+        self._lock = threading.Lock()
+
+        # CME analyses fetched by coronal_mass_ejection with local_filter and the time they were fetched, by date
+        # range and keyword, least recently used first.
+        self._cme_analyses = OrderedDict()
+
+        # The index of the dates with EPIC imagery, by color.
+        self._epic_available = {}
+
     @property
     def api_key(self):
         return self.__api_key
@@ -124,6 +222,112 @@ class Nasa(object):
     def mars_weather_limit_remaining(self, remaining):
         self.__mars_weather_limit_remaining = remaining
 
+    def _get(self, url, params=None, parse=None, quota='api'):
+        if parse is None:
+            parse = _json_result
+
+        r = self.transport.get(url, params=params, **self._request_options(quota))
+        self._update_limit(r, quota)
+
+        return parse(r)
+
+    def _request_options(self, quota='api'):
+        # The instance's policy and key pool are passed with each request, as the transport may be shared with other
+        # clients. The transport picks a key from the pool for each attempt it sends, so a retry after HTTP 429 moves
+        # to another key. The pool tracks the api.nasa.gov quota only.
+        options = {}
+
+        if self.retry is not None:
+            options['retry'] = self.retry
+
+        if self.key_pool is not None and quota == 'api':
+            options['key_pool'] = self.key_pool
+
+        return options
+
+    def _update_limit(self, r, quota):
+        remaining = r.headers.get('X-RateLimit-Remaining')
+
+        if remaining is None:
+            return
+
+        with self._lock:
+            if quota == 'mars_weather':
+                self.__mars_weather_limit_remaining = remaining
+            else:
+                self.__limit_remaining = remaining
+
+    def _call(self, func, *args, **kwargs):
+        previous = _current_client()
+        _bound.client = self
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _bound.client = previous
+
+    def _resolve(self, method):
+        if callable(method):
+            return method
+
+        if method in _ENDPOINT_FUNCTIONS:
+            return partial(self._call, _endpoint_function(method))
+
+        if not method.startswith('_') and method not in ('batch', 'close') and callable(getattr(self, method, None)):
+            return getattr(self, method)
+
+        raise ValueError('{method} is not a Nasa method or endpoint function.'.format(method=method))
+
+    def _result(self, value):
+        # Returns a value computed without a request in the form the client's methods return results.
+        return value
+
+    def _map(self, funcs, merge, max_workers=8):
+        # Runs the zero-argument request functions concurrently over the transport and merges their results.
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(funcs)))) as pool:
+            results = list(pool.map(lambda func: func(), funcs))
+
+        return merge(results)
+
+    def _donki(self, endpoint, params, window_days, return_df=False):
+        # Requests a DONKI endpoint, splitting ranges longer than window_days into windows requested concurrently.
+        if not isinstance(window_days, int) or isinstance(window_days, bool):
+            raise TypeError('window_days parameter must be an integer.')
+
+        if window_days < 1:
+            raise ValueError('window_days parameter must be at least 1.')
+
+        if not isinstance(return_df, bool):
+            raise TypeError('return_df parameter must be boolean (True or False).')
+
+        # An open range ends today, so a long range from a start date alone is split as well. A range starting after
+        # today has no events yet.
+        if params['startDate'] is not None and params['endDate'] is None:
+            today = datetime.datetime.now(datetime.timezone.utc).date()
+
+            if _parse_date(params['startDate'], 'start_date') > today:
+                r = self._result({})
+
+                return _then(r, partial(donki_frames, endpoint)) if return_df else r
+
+            params = dict(params, endDate=today.strftime('%Y-%m-%d'))
+
+        url = self.host + '/DONKI/' + endpoint
+        windows = _date_windows(params['startDate'], params['endDate'], days=window_days)
+
+        if len(windows) == 1:
+            r = self._get(url, params=params, parse=_donki_result)
+        else:
+            calls = [partial(self._get, url, params=dict(params, startDate=start, endDate=end), parse=_donki_result)
+                     for start, end in windows]
+
+            r = self._map(calls, partial(_merge_donki, endpoint))
+
+        if return_df:
+            r = _then(r, partial(donki_frames, endpoint))
+
+        return r
+
     def picture_of_the_day(self, date=None, hd=False):
         r"""
         Returns the URL and other information for the NASA Astronomy Picture of the Day.
@@ -173,20 +377,13 @@ class Nasa(object):
 
         url = urljoin(self.host + '/planetary/', 'apod')
 
-        r = requests.get(url,
+        return self._get(url,
                          params={
                              'api_key': self.api_key,
                              'date': date,
                              'hd': hd
                          })
 
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason)
-
-        else:
-            self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-            return r.json()
-
     def mars_weather(self):
         r"""
         Returns per-Sol (Martian Days) summary data for each of the last seven available Sols.
@@ -220,21 +417,15 @@ class Nasa(object):
         """
         url = self.host + '/insight_weather/'
 
-        r = requests.get(url,
+        return self._get(url,
                          params={
                              'api_key': self.__api_key,
                              'ver': 1.0,
                              'feedtype': 'json'
-                         })
+                         },
+                         quota='mars_weather')
 
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
-
-        else:
-            self.__mars_weather_limit_remaining = r.headers['X-RateLimit-Remaining']
-            return r.json()
-
-    def asteroid_feed(self, start_date, end_date=None):
+    def asteroid_feed(self, start_date, end_date=None, return_df=False, stream=False):
         r"""
         Returns a list of asteroids based on their closest approach date to Earth.
 
@@ -244,7 +435,16 @@ class Nasa(object):
             String representing a date in YYYY-MM-DD format or a datetime object.
         end_date : str, datetime, default None
             String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to seven days
-            after the provided :code:`start_date`.
+            after the provided :code:`start_date`. Ranges longer than the seven days the API accepts are split into
+            seven day windows that are requested concurrently.
+        return_df : bool, default False
+            If True, returns the asteroids as a pandas DataFrame with one row per close approach. See
+            :code:`neo_frame` for its columns.
+        stream : bool, default False
+            If True, the response is read incrementally and an iterator yielding the asteroids one at a time is
+            returned, so memory use is bounded by a single asteroid rather than the whole feed. The windows of a
+            longer range are requested one after another, and an asteroid listed in an earlier window is skipped.
+            Cannot be combined with :code:`return_df`, and is not supported by asynchronous clients.
 
         Raises
         ------
@@ -252,13 +452,23 @@ class Nasa(object):
             Raised if the :code:`start_date` parameter is not a string or a datetime object.
         TypeError
             Raised if the :code:`end_date` parameter is not a string or a datetime object.
+        TypeError
+            Raised if the :code:`return_df` parameter is not boolean.
+        ValueError
+            Raised if the :code:`end_date` is before the :code:`start_date`.
+        ValueError
+            Raised if both :code:`stream` and :code:`return_df` are True.
         HTTPError
             Raised if the returned status code is not 200 (success).
 
         Returns
         -------
-        dict
-            Dictionary representing the returned JSON data from the API.
+        dict, pandas.DataFrame
+            Dictionary representing the returned JSON data from the API. When the range spans several windows, the
+            :code:`near_earth_objects` of each window are merged by date, and an object listed more than once is
+            kept only under its earliest date. :code:`element_count` is the number of distinct objects, and the
+            :code:`links` point to the pages before and after the whole range and to the range itself. If
+            :code:`return_df` is True, a DataFrame of the close approaches.
 
         Examples
         --------
@@ -266,6 +476,11 @@ class Nasa(object):
         >>> n = NASA()
         # Get asteroids approaching Earth at the beginning of 2019.
         >>> n.asteroid_feed(start_date='2019-01-01')
+        # Get asteroids approaching Earth over all of 2019.
+        >>> n.asteroid_feed(start_date='2019-01-01', end_date='2019-12-31')
+        # Iterate over the asteroids of 2019 without holding the whole feed in memory.
+        >>> for asteroid in n.asteroid_feed(start_date='2019-01-01', end_date='2019-12-31', stream=True):
+        ...     print(asteroid['name'])
 
         Notes
         -----
@@ -275,23 +490,35 @@ class Nasa(object):
         """
         url = self.host + '/neo/rest/v1/feed'
 
+        if not isinstance(return_df, bool):
+            raise TypeError('return_df parameter must be boolean (True or False).')
+
+        if stream and return_df:
+            raise ValueError('stream and return_df parameters cannot both be True.')
+
         start_date, end_date = _check_dates(start_date=start_date, end_date=end_date)
+        windows = _date_windows(start_date, end_date, days=7)
+        params = [{'api_key': self.__api_key, 'start_date': start, 'end_date': end} for start, end in windows]
 
-        r = requests.get(url,
-                         params={
-                             'api_key': self.__api_key,
-                             'start_date': start_date,
-                             'end_date': end_date
-                         })
+        if stream:
+            if len(params) == 1:
+                return _stream_api_result(url, params[0], self)
+
+            return _iter_feeds([partial(_stream_api_result, url, p, self) for p in params])
 
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
+        calls = [partial(self._get, url, params=p) for p in params]
 
+        if len(calls) == 1:
+            r = calls[0]()
         else:
-            self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-            return r.json()
+            r = self._map(calls, _merge_feeds)
+
+        if return_df:
+            r = _then(r, neo_frame)
+
+        return r
 
-    def get_asteroids(self, asteroid_id=None):
+    def get_asteroids(self, asteroid_id=None, return_df=False, stream=False):
         r"""
         Returns data from the overall asteroid data-set or specific asteroids given an ID.
 
@@ -300,16 +527,29 @@ class Nasa(object):
         asteroid_id : str, int, default None
             If None, the entire asteroid data set is returned. If an :code:`asteroid_id` is provided, data on that
             specific asteroid is returned.
+        return_df : bool, default False
+            If True, returns the asteroids as a pandas DataFrame with one row per close approach. See
+            :code:`neo_frame` for its columns.
+        stream : bool, default False
+            If True, the response is read incrementally and an iterator yielding the asteroids of the data set one
+            at a time is returned. Only available when :code:`asteroid_id` is None. Cannot be combined with
+            :code:`return_df`, and is not supported by asynchronous clients.
 
         Raises
         ------
+        TypeError
+            Raised if the :code:`return_df` parameter is not boolean.
+        ValueError
+            Raised if :code:`stream` is True and an :code:`asteroid_id` is given, or if both :code:`stream` and
+            :code:`return_df` are True.
         HTTPError:
             Raised if the returned status code from the API is not 200 (success).
 
         Returns
         -------
-        dict
-            Dictionary object representing the returned JSON data from the NASA API.
+        dict, pandas.DataFrame
+            Dictionary object representing the returned JSON data from the NASA API, or a DataFrame of the close
+            approaches if :code:`return_df` is True.
 
         Examples
         --------
@@ -328,27 +568,149 @@ class Nasa(object):
         """
         url = self.host + '/neo/rest/v1/neo/'
 
+        if not isinstance(return_df, bool):
+            raise TypeError('return_df parameter must be boolean (True or False).')
+
+        if stream and return_df:
+            raise ValueError('stream and return_df parameters cannot both be True.')
+
         if asteroid_id is not None:
+            if stream:
+                raise ValueError('stream parameter is only supported when asteroid_id is None.')
+
             url = url + str(asteroid_id)
 
         else:
             url = url + 'browse/'
 
-        r = requests.get(url,
-                         params={
-                             'api_key': self.__api_key
-                         })
+        if stream:
+            return _stream_api_result(url, {'api_key': self.__api_key}, self)
 
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
+        r = self._get(url,
+                      params={
+                          'api_key': self.__api_key
+                      })
 
-        else:
-            self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-            return r.json()
+        if return_df:
+            r = _then(r, neo_frame)
+
+        return r
+
+    def get_asteroids_many(self, ids, max_workers=8):
+        r"""
+        Returns data on many asteroids given their IDs, fetching them concurrently.
+
+        Parameters
+        ----------
+        ids : iterable
+            The asteroid IDs, as strings or integers. Repeated IDs are only requested once.
+        max_workers : int, default 8
+            The maximum number of requests in flight at once. Requests go through the instance's transport, so
+            responses already in its cache are returned without a request and its rate limiter is applied.
+
+        Raises
+        ------
+        ValueError
+            Raised if :code:`max_workers` is less than 1.
+
+        Returns
+        -------
+        dict
+            Mapping of each distinct ID, as a string and in the order first given, to a :code:`BatchResult`.
+            Its :code:`result` holds the asteroid data, or its :code:`error` holds the exception raised when
+            fetching that asteroid failed.
+
+        Examples
+        --------
+        # Initialize NASA API with a key.
+        >>> n = Nasa(key=key)
+        >>> asteroids = n.get_asteroids_many([3542519, 2000433, 3542519])
+        >>> {neo_id: r.error is None for neo_id, r in asteroids.items()}
+        {'3542519': True, '2000433': True}
+
+        """
+        ids = list(OrderedDict.fromkeys(str(asteroid_id) for asteroid_id in ids))
+        calls = [('get_asteroids', {'asteroid_id': asteroid_id}) for asteroid_id in ids]
+
+        return _then(self.batch(calls, max_workers=max_workers),
+                     lambda results: OrderedDict(zip(ids, results)))
+
+    def browse_asteroids(self, checkpoint=None, size=20, max_workers=4):
+        r"""
+        Iterates over every asteroid in the NeoWs catalog, fetching the pages of the browse endpoint concurrently.
+
+        Parameters
+        ----------
+        checkpoint : str, default None
+            Path of a file recording the crawl's progress. Each page is recorded once all of its asteroids have been
+            yielded, and a crawl started with the checkpoint of an interrupted one resumes at the first page that
+            was not finished. If None, progress is not recorded.
+        size : int, default 20
+            The number of asteroids per page, at most 20. It must match the size of a crawl being resumed.
+        max_workers : int, default 4
+            The number of pages fetched at once. Pages are requested ahead of the one being yielded, through the
+            instance's transport and so within its rate limiter.
+
+        Raises
+        ------
+        ValueError
+            Raised if :code:`size` is not between 1 and 20 or :code:`max_workers` is less than 1.
+        ValueError
+            Raised if the :code:`checkpoint` was written by a crawl with a different :code:`size`.
+        HTTPError
+            Raised if the returned status code from the API is not 200 (success).
+
+        Yields
+        ------
+        dict
+            The asteroids of the catalog, in page order.
+
+        Examples
+        --------
+        # Initialize NASA API with a key.
+        >>> n = Nasa(key=key)
+        # Stream the full catalog to a file, resuming the crawl if it was interrupted.
+        >>> with open('neos.jsonl', 'a') as f:
+        ...     for neo in n.browse_asteroids(checkpoint='neos.checkpoint'):
+        ...         f.write(json.dumps(neo) + '\n')
+
+        """
+        url, crawl = self._browse_crawl(checkpoint, size, max_workers)
+
+        pending = deque()
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                while crawl.next_page < crawl.total_pages:
+                    for page in crawl.pages_to_submit(len(pending)):
+                        pending.append((page, pool.submit(self._get, url, params=crawl.params(page))))
+
+                    page, future = pending.popleft()
+                    result = future.result()
+                    crawl.fetched(result)
+
+                    for neo in result['near_earth_objects']:
+                        yield neo
+
+                    crawl.complete(page)
+
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def _browse_crawl(self, checkpoint, size, max_workers):
+        if not 1 <= size <= 20:
+            raise ValueError('size parameter must be between 1 and 20.')
+
+        if max_workers < 1:
+            raise ValueError('max_workers parameter must be at least 1.')
+
+        return self.host + '/neo/rest/v1/neo/browse/', _BrowseCrawl(self.__api_key, checkpoint, size, max_workers)
 
     def coronal_mass_ejection(self, start_date=None, end_date=None,
                               accurate_only=True, speed=0, complete_entry=True, half_angle=0,
-                              catalog='ALL', keyword=None):
+                              catalog='ALL', keyword=None, window_days=DONKI_WINDOW_DAYS, return_df=False,
+                              local_filter=False):
         r"""
         Returns data collected on coronal mass ejection events from the Space Weather Database of Notifications,
         Knowledge, Information (DONKI).
@@ -373,6 +735,18 @@ class Nasa(object):
             Specifies which catalog of data to return results. Defaults to 'ALL'.
         keyword : str, default None
             Filter results by a specific keyword.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
+        local_filter : bool, default False
+            If True, the analyses matching the least restrictive parameters are requested once for the date range
+            and keyword and kept by the instance, and this and later calls over the same range are answered by
+            filtering them locally with a :code:`CMEAnalysisIndex`. Useful when sweeping the thresholds. Missing
+            dates are resolved to the current date, and the analyses of a range are fetched again after
+            :code:`CME_ANALYSIS_TTL` seconds. At most :code:`CME_ANALYSIS_RANGES` ranges are kept.
 
         Raises
         ------
@@ -388,11 +762,23 @@ class Nasa(object):
             Raised if parameter :code:`complete_entry` is not boolean (True or False).
         TypeError
             Raised if parameter :code:`accurate_only` is not boolean (True or False).
+        TypeError
+            Raised if parameter :code:`speed` or :code:`half_angle` is not an integer or float.
+        TypeError
+            Raised if parameter :code:`local_filter` is not boolean (True or False).
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
-            List of results representing returned JSON data. If no data is returned, an empty dictionary is returned.
+        list, dict
+            List of results representing returned JSON data. If no data is returned, an empty dictionary is returned. If
+            :code:`return_df` is True, a dictionary of DataFrames.
 
         Examples
         --------
@@ -402,6 +788,9 @@ class Nasa(object):
         >>> n.coronal_mass_ejection()
         # View all CME events from the beginning of 2019.
         >>> n.coronal_mass_ejection(start_date='2019-01-01', end_date=datetime.datetime.today())
+        # Sweep the speed threshold over 2017 with a single request.
+        >>> for speed in range(500, 2000, 100):
+        ...     n.coronal_mass_ejection(start_date='2017-01-01', end_date='2017-12-31', speed=speed, local_filter=True)
 
         """
         start_date, end_date = _check_dates(start_date=start_date, end_date=end_date)
@@ -415,34 +804,83 @@ class Nasa(object):
         if not isinstance(accurate_only, bool):
             raise TypeError('accurate_only parameter must be boolean (True or False).')
 
-        url = self.host + '/DONKI/CMEAnalysis'
+        for name, value in (('speed', speed), ('half_angle', half_angle)):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise TypeError('{name} parameter must be an integer or float.'.format(name=name))
 
-        r = requests.get(url,
-                         params={
-                             'api_key': self.__api_key,
-                             'startDate': start_date,
-                             'endDate': end_date,
-                             'mostAccurateOnly': accurate_only,
-                             'completeEntryOnly': complete_entry,
-                             'speed': speed,
-                             'halfAngle': half_angle,
-                             'catalog': catalog,
-                             'keyword': keyword
-                         })
+        if not isinstance(local_filter, bool):
+            raise TypeError('local_filter parameter must be boolean (True or False).')
 
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
+        if local_filter:
+            if not isinstance(return_df, bool):
+                raise TypeError('return_df parameter must be boolean (True or False).')
 
-        self.__limit_remaining = r.headers['X-RateLimit-Remaining']
+            # Missing dates are resolved so a rolling range is fetched again once the day has changed.
+            today = datetime.datetime.now(datetime.timezone.utc).date()
+            start_date = start_date or (today - datetime.timedelta(days=30)).strftime('%Y-%m-%d')
 
-        if r.text == '':
-            r = {}
-        else:
-            r = r.json()
+            if end_date is None and _parse_date(start_date, 'start_date') <= today:
+                end_date = today.strftime('%Y-%m-%d')
 
-        return r
+            key = (start_date, end_date, keyword)
+            index = self._cme_index(key)
+
+            if index is None:
+                r = self.coronal_mass_ejection(start_date=start_date, end_date=end_date, accurate_only=False,
+                                               complete_entry=False, keyword=keyword, window_days=window_days)
+                r = _then(r, partial(self._index_cme_analyses, key))
+            else:
+                r = self._result(index)
+
+            r = _then(r, lambda index: index.filter(accurate_only=accurate_only, speed=speed,
+                                                    complete_entry=complete_entry, half_angle=half_angle,
+                                                    catalog=catalog) or {})
+
+            if return_df:
+                r = _then(r, partial(donki_frames, 'CMEAnalysis'))
+
+            return r
+
+        return self._donki('CMEAnalysis',
+                           params={
+                               'api_key': self.__api_key,
+                               'startDate': start_date,
+                               'endDate': end_date,
+                               'mostAccurateOnly': accurate_only,
+                               'completeEntryOnly': complete_entry,
+                               'speed': speed,
+                               'halfAngle': half_angle,
+                               'catalog': catalog,
+                               'keyword': keyword
+                           },
+                           window_days=window_days,
+                           return_df=return_df)
+
+    def _cme_index(self, key):
+        # Returns the index of the analyses fetched for a date range and keyword, or None if it has expired.
+        with self._lock:
+            entry = self._cme_analyses.get(key)
+
+            if entry is None or time.monotonic() - entry[1] >= CME_ANALYSIS_TTL:
+                return None
+
+            self._cme_analyses.move_to_end(key)
+
+            return entry[0]
+
+    def _index_cme_analyses(self, key, records):
+        index = CMEAnalysisIndex(records)
+
+        with self._lock:
+            self._cme_analyses.pop(key, None)
+            self._cme_analyses[key] = (index, time.monotonic())
 
-    def geomagnetic_storm(self, start_date=None, end_date=None):
+            while len(self._cme_analyses) > CME_ANALYSIS_RANGES:
+                self._cme_analyses.popitem(last=False)
+
+        return index
+
+    def geomagnetic_storm(self, start_date=None, end_date=None, window_days=DONKI_WINDOW_DAYS, return_df=False):
         r"""
         Returns data collected on geomagnetic storm events from the Space Weather Database of Notifications, Knowledge,
         Information (DONKI).
@@ -455,6 +893,12 @@ class Nasa(object):
         end_date : str, datetime, default None
             String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to the current
             date in UTC time.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
 
         Raises
         ------
@@ -464,11 +908,19 @@ class Nasa(object):
         TypeError
             Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
             a datetime object.
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
-            List of results representing returned JSON data. If no data is returned, an empty dictionary is returned.
+        list, dict
+            List of results representing returned JSON data. If no data is returned, an empty dictionary is returned. If
+            :code:`return_df` is True, a dictionary of DataFrames.
 
         Examples
         --------
@@ -487,28 +939,17 @@ class Nasa(object):
         """
         start_date, end_date = _check_dates(start_date=start_date, end_date=end_date)
 
-        url = self.host + '/DONKI/GST'
-
-        r = requests.get(url,
-                         params={
-                             'api_key': self.__api_key,
-                             'startDate': start_date,
-                             'endDate': end_date
-                         })
-
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
-
-        self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-
-        if r.text == '':
-            r = {}
-        else:
-            r = r.json()
-
-        return r
-
-    def interplantary_shock(self, start_date=None, end_date=None, location='ALL', catalog='ALL'):
+        return self._donki('GST',
+                           params={
+                               'api_key': self.__api_key,
+                               'startDate': start_date,
+                               'endDate': end_date
+                           },
+                           window_days=window_days,
+                           return_df=return_df)
+
+    def interplantary_shock(self, start_date=None, end_date=None, location='ALL', catalog='ALL',
+                            window_days=DONKI_WINDOW_DAYS, return_df=False):
         r"""
         Returns data collected on interplantary shock events from the Space Weather Database of Notifications,
         Knowledge, Information (DONKI).
@@ -525,6 +966,12 @@ class Nasa(object):
             Filters returned results to specified location of the interplantary shock event. Defaults to 'ALL'.
         catalog : str, {'ALL', 'SWRC_CATALOG', 'WINSLOW_MESSENGER_ICME_CATALOG'}
             Filters results to a specified catalog of collected data. Defaults to 'ALL'.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
 
         Raises
         ------
@@ -542,11 +989,19 @@ class Nasa(object):
             Raised if :code:`location` parameter is not a string.
         TypeError
             Raised if :code:`catalog` parameter is not a string.
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
-            List of results representing returned JSON data. If no data is returned, an empty list is returned.
+        list, dict
+            List of results representing returned JSON data. If no data is returned, an empty list is returned. If
+            :code:`return_df` is True, a dictionary of DataFrames.
 
         Examples
         --------
@@ -568,30 +1023,18 @@ class Nasa(object):
             raise ValueError(
                 "catalog parameter must be one of {'ALL' (default) 'SWRC_CATALOG', 'WINSLOW_MESSENGER_ICME_CATALOG'}")
 
-        url = self.host + '/DONKI/IPS'
-
-        r = requests.get(url,
-                         params={
-                             'api_key': self.__api_key,
-                             'startDate': start_date,
-                             'endDate': end_date,
-                             'location': location,
-                             'catalog': catalog
-                         })
-
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
-
-        self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-
-        if r.text == '':
-            r = {}
-        else:
-            r = r.json()
-
-        return r
-
-    def solar_flare(self, start_date=None, end_date=None):
+        return self._donki('IPS',
+                           params={
+                               'api_key': self.__api_key,
+                               'startDate': start_date,
+                               'endDate': end_date,
+                               'location': location,
+                               'catalog': catalog
+                           },
+                           window_days=window_days,
+                           return_df=return_df)
+
+    def solar_flare(self, start_date=None, end_date=None, window_days=DONKI_WINDOW_DAYS, return_df=False):
         r"""
         Returns data on solar flare events from the Space Weather Database of Notifications, Knowledge, Information
         (DONKI).
@@ -604,6 +1047,12 @@ class Nasa(object):
         end_date : str, datetime, default None
             String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to the current
             date in UTC time.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
 
         Raises
         ------
@@ -613,12 +1062,20 @@ class Nasa(object):
         TypeError
             Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
             a datetime object.
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
+        list, dict
             If data is available in the specified date range, a list of dictionary objects representing the data from
-            the API is returned. If no data is available, an empty dictionary is returned.
+            the API is returned. If no data is available, an empty dictionary is returned. If :code:`return_df` is True,
+            a dictionary of DataFrames.
 
         Examples
         --------
@@ -635,16 +1092,16 @@ class Nasa(object):
           'sourceLocation': 'N08E50',
           'activeRegionNum': 12740,
           'linkedEvents': None}]
+        # Get solar flares over all of solar cycle 24, requesting each quarter concurrently.
+        >>> n.solar_flare(start_date='2008-12-01', end_date='2019-12-31', window_days=90)
 
         """
-        self.__limit_remaining, r = _donki_request(url=self.host + '/DONKI/FLR',
-                                                   key=self.__api_key,
-                                                   start_date=start_date,
-                                                   end_date=end_date)
+        return self._donki('FLR',
+                           params=_donki_params(key=self.__api_key, start_date=start_date, end_date=end_date),
+                           window_days=window_days,
+                           return_df=return_df)
 
-        return r
-
-    def solar_energetic_particle(self, start_date=None, end_date=None):
+    def solar_energetic_particle(self, start_date=None, end_date=None, window_days=DONKI_WINDOW_DAYS, return_df=False):
         r"""
         Returns data available from the Space Weather Database of Notifications, Knowledge, Information
         (DONKI) API related to solar energetic particle events.
@@ -657,6 +1114,12 @@ class Nasa(object):
         end_date : str, datetime, default None
             String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to the current
             date in UTC time.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
 
         Raises
         ------
@@ -666,12 +1129,20 @@ class Nasa(object):
         TypeError
             Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
             a datetime object.
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
+        list, dict
             If data is available in the specified date range, a list of dictionary objects representing the data from
-            the API is returned. If no data is available, an empty dictionary is returned.
+            the API is returned. If no data is available, an empty dictionary is returned. If :code:`return_df` is True,
+            a dictionary of DataFrames.
 
         Examples
         --------
@@ -686,14 +1157,12 @@ class Nasa(object):
            {'activityID': '2017-04-18T19:48:00-CME-001'}]}]
 
         """
-        self.__limit_remaining, r = _donki_request(url=self.host + '/DONKI/SEP',
-                                                   key=self.__api_key,
-                                                   start_date=start_date,
-                                                   end_date=end_date)
-
-        return r
+        return self._donki('SEP',
+                           params=_donki_params(key=self.__api_key, start_date=start_date, end_date=end_date),
+                           window_days=window_days,
+                           return_df=return_df)
 
-    def magnetopause_crossing(self, start_date=None, end_date=None):
+    def magnetopause_crossing(self, start_date=None, end_date=None, window_days=DONKI_WINDOW_DAYS, return_df=False):
         r"""
         Returns data available from the Space Weather Database of Notifications, Knowledge, Information
         (DONKI) API related to magnetopause crossing events.
@@ -706,6 +1175,12 @@ class Nasa(object):
         end_date : str, datetime, default None
             String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to the current
             date in UTC time.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
 
         Raises
         ------
@@ -715,12 +1190,20 @@ class Nasa(object):
         TypeError
             Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
             a datetime object.
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
+        list, dict
             If data is available in the specified date range, a list of dictionary objects representing the data from
-            the API is returned. If no data is available, an empty dictionary is returned.
+            the API is returned. If no data is available, an empty dictionary is returned. If :code:`return_df` is True,
+            a dictionary of DataFrames.
 
         Examples
         --------
@@ -734,14 +1217,13 @@ class Nasa(object):
           'linkedEvents': [{'activityID': '2018-05-05T09:27:00-HSS-001'}]}]
 
         """
-        self.__limit_remaining, r = _donki_request(url=self.host + '/DONKI/MPC',
-                                                   key=self.__api_key,
-                                                   start_date=start_date,
-                                                   end_date=end_date)
+        return self._donki('MPC',
+                           params=_donki_params(key=self.__api_key, start_date=start_date, end_date=end_date),
+                           window_days=window_days,
+                           return_df=return_df)
 
-        return r
-
-    def radiation_belt_enhancement(self, start_date=None, end_date=None):
+    def radiation_belt_enhancement(self, start_date=None, end_date=None, window_days=DONKI_WINDOW_DAYS,
+                                   return_df=False):
         r"""
         Returns data available from the Space Weather Database of Notifications, Knowledge, Information
         (DONKI) API related to radiation belt enhancement events.
@@ -754,6 +1236,12 @@ class Nasa(object):
         end_date : str, datetime, default None
             String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to the current
             date in UTC time.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
 
         Raises
         ------
@@ -763,12 +1251,20 @@ class Nasa(object):
         TypeError
             Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
             a datetime object.
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
+        list, dict
             If data is available in the specified date range, a list of dictionary objects representing the data from
-            the API is returned. If no data is available, an empty dictionary is returned.
+            the API is returned. If no data is available, an empty dictionary is returned. If :code:`return_df` is True,
+            a dictionary of DataFrames.
 
         Examples
         --------
@@ -782,14 +1278,12 @@ class Nasa(object):
           'linkedEvents': [{'activityID': '2019-08-30T12:17:00-HSS-001'}]}]
 
         """
-        self.__limit_remaining, r = _donki_request(url=self.host + '/DONKI/RBE',
-                                                   key=self.__api_key,
-                                                   start_date=start_date,
-                                                   end_date=end_date)
-
-        return r
+        return self._donki('RBE',
+                           params=_donki_params(key=self.__api_key, start_date=start_date, end_date=end_date),
+                           window_days=window_days,
+                           return_df=return_df)
 
-    def hight_speed_stream(self, start_date=None, end_date=None):
+    def hight_speed_stream(self, start_date=None, end_date=None, window_days=DONKI_WINDOW_DAYS, return_df=False):
         r"""
         Returns data available from the Space Weather Database of Notifications, Knowledge, Information
         (DONKI) API related to hight speed stream events.
@@ -802,6 +1296,12 @@ class Nasa(object):
         end_date : str, datetime, default None
             String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to the current
             date in UTC time.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
 
         Raises
         ------
@@ -811,12 +1311,20 @@ class Nasa(object):
         TypeError
             Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
             a datetime object.
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
+        list, dict
             If data is available in the specified date range, a list of dictionary objects representing the data from
-            the API is returned. If no data is available, an empty dictionary is returned.
+            the API is returned. If no data is available, an empty dictionary is returned. If :code:`return_df` is True,
+            a dictionary of DataFrames.
 
         Examples
         --------
@@ -840,14 +1348,12 @@ class Nasa(object):
           'linkedEvents': None}]
 
         """
-        self.__limit_remaining, r = _donki_request(url=self.host + '/DONKI/HSS',
-                                                   key=self.__api_key,
-                                                   start_date=start_date,
-                                                   end_date=end_date)
+        return self._donki('HSS',
+                           params=_donki_params(key=self.__api_key, start_date=start_date, end_date=end_date),
+                           window_days=window_days,
+                           return_df=return_df)
 
-        return r
-
-    def wsa_enlil_simulation(self, start_date=None, end_date=None):
+    def wsa_enlil_simulation(self, start_date=None, end_date=None, window_days=DONKI_WINDOW_DAYS, return_df=False):
         r"""
         Returns data available from the Space Weather Database of Notifications, Knowledge, Information
         (DONKI) API.
@@ -860,6 +1366,12 @@ class Nasa(object):
         end_date : str, datetime, default None
             String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to the current
             date in UTC time.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are requested concurrently. The records of
+            the windows are merged in time order with duplicates removed by ID.
+        return_df : bool, default False
+            If True, returns the records normalized into pandas DataFrames. See :code:`donki_frames` for the tables.
 
         Raises
         ------
@@ -869,12 +1381,20 @@ class Nasa(object):
         TypeError
             Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
             a datetime object.
+        TypeError
+            Raised if parameter :code:`window_days` is not an integer.
+        ValueError
+            Raised if parameter :code:`window_days` is less than 1, a date is not in YYYY-MM-DD format, or
+            :code:`end_date` is before :code:`start_date`.
+        TypeError
+            Raised if parameter :code:`return_df` is not boolean (True or False).
 
         Returns
         -------
-        list
+        list, dict
             If data is available in the specified date range, a list of dictionary objects representing the data from
-            the API is returned. If no data is available, an empty dictionary is returned.
+            the API is returned. If no data is available, an empty dictionary is returned. If :code:`return_df` is True,
+            a dictionary of DataFrames.
 
         Examples
         --------
@@ -905,56 +1425,203 @@ class Nasa(object):
          'kp_180': None,
          'isEarthGB': False,
          'impactList': None}
+        # Arrays of the arrival times and Kp estimates of every simulation in 2019.
+        >>> wsa_enlil_arrays(n.wsa_enlil_simulation(start_date='2019-01-01', end_date='2019-12-31'))
 
         """
-        self.__limit_remaining, r = _donki_request(url=self.host + '/DONKI/WSAEnlilSimulations',
-                                                   key=self.__api_key,
-                                                   start_date=start_date,
-                                                   end_date=end_date)
-
-        return r
+        return self._donki('WSAEnlilSimulations',
+                           params=_donki_params(key=self.__api_key, start_date=start_date, end_date=end_date),
+                           window_days=window_days,
+                           return_df=return_df)
 
-    def epic(self, color='natural', date=None, available=False):
+    def donki_all(self, start_date=None, end_date=None, types=None, window_days=DONKI_WINDOW_DAYS):
         r"""
-        The EPIC API provides data on the imagery collected by the DSCOVR's Earth Polychromatic Imaging Camera
-        (EPIC).
+        Returns the events of several DONKI event types in one time-ordered list, requesting the event types
+        concurrently.
 
         Parameters
         ----------
-        color : str, {'natural', 'enhanced'}
-            Specifies the type of imagery to return. Must be one of 'natural' (default) or 'enhanced'
-        date : str, datetime, default None
-            String representing a date in 'YYYY-MM-DD' format or a datetime object
-        available : bool, default False
-            Alternative listing of all dates with specified color imagery
+        start_date : str, datetime, default None
+            String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to 30 days prior
+            to the current date in UTC time.
+        end_date : str, datetime, default None
+            String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to the current
+            date in UTC time.
+        types : list, default None
+            The event types to request, from the keys of :code:`DONKI_EVENT_TYPES`. If None, every event type is
+            requested. CME analyses are requested with the default parameters of :code:`coronal_mass_ejection`.
+        window_days : int, default DONKI_WINDOW_DAYS
+            Ranges with a start date that span more days than this, up to the current date if no end date is
+            given, are split into windows of at most this many days that are also requested concurrently.
 
         Raises
         ------
+        ValueError
+            Raised if an event type is not one of the keys of :code:`DONKI_EVENT_TYPES`.
         TypeError
-            Raised if parameter :code:`available` is not boolean (True or False).
+            Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
+            a datetime object.
         TypeError
-            Raised if parameter :code:`date` is not a string or a datetime object.
-        ValueError
-            Raised if parameter :code:`color` is not one of 'natural' or 'enhanced'
+            Raised if parameter :code:`end_date` is not a string representing a date in YYYY-MM-DD format or
+            a datetime object.
+        HTTPError
+            Raised if the returned status code of any request is not 200 (success).
 
         Returns
         -------
         list
-            List of dictionaries representing the returned JSON data from the EPIC API.
+            :code:`DonkiEvent` tuples of the event time, the event type and the record, ordered by event time.
 
         Examples
         --------
-        # Initialize API connection with a Demo Key
-        >>> n = Nasa()
-        # Get EPIC data from the beginning of 2019.
-        >>> e = n.epic(date='2019-01-01')
-        # Print the first result
-        >>> e[0]
-        {'identifier': '20190101015633',
-         'caption': "This image was taken by NASA's EPIC camera onboard the NOAA DSCOVR spacecraft",
-         'image': 'epic_RGB_20190101015633',
-         'version': '02',
-         'centroid_coordinates': {'lat': -27.281877, 'lon': 155.325443},
+        >>> n = Nasa(key=key)
+        # A space weather timeline of September 2017.
+        >>> for event in n.donki_all(start_date='2017-09-01', end_date='2017-09-30'):
+        ...     print(event.time, event.event_type, event.record.get('linkedEvents'))
+        # Only flares and geomagnetic storms.
+        >>> n.donki_all(start_date='2017-09-01', end_date='2017-09-30', types=['FLR', 'GST'])
+
+        """
+        if types is None:
+            types = list(DONKI_EVENT_TYPES)
+
+        for event_type in types:
+            if event_type not in DONKI_EVENT_TYPES:
+                raise ValueError('types must be keys of DONKI_EVENT_TYPES, not {event_type}.'
+                                 .format(event_type=event_type))
+
+        start_date, end_date = _check_dates(start_date=start_date, end_date=end_date)
+
+        calls = [partial(getattr(self, DONKI_EVENT_TYPES[event_type]), start_date=start_date, end_date=end_date,
+                         window_days=window_days)
+                 for event_type in types]
+
+        return self._map(calls, partial(_events, types), max_workers=len(calls))
+
+    def donki_sync(self, store, event_types=None, start_date=None, overlap_days=2):
+        r"""
+        Brings a local store of DONKI records up to date, requesting each event type only from the latest event
+        already stored.
+
+        Parameters
+        ----------
+        store : DonkiStore
+            The store the records are written to.
+        event_types : list, default None
+            The event types to sync, from the keys of :code:`DONKI_EVENT_TYPES`. If None, every event type is synced.
+        start_date : str, datetime, default None
+            String representing a date in YYYY-MM-DD format or a datetime object from which event types with no
+            stored events are requested. If None, they are requested from 30 days prior to the current date.
+        overlap_days : int, default 2
+            The number of days before the latest stored event that are requested again, so records revised since the
+            previous sync are updated.
+
+        Raises
+        ------
+        ValueError
+            Raised if an event type is not one of the keys of :code:`DONKI_EVENT_TYPES`.
+        TypeError
+            Raised if parameter :code:`start_date` is not a string representing a date in YYYY-MM-DD format or
+            a datetime object.
+        ValueError
+            Raised if :code:`overlap_days` is not an integer of 0 or greater.
+        HTTPError
+            Raised if the returned status code of any request is not 200 (success).
+
+        Returns
+        -------
+        dict
+            The number of records that were new or changed, by event type.
+
+        Notes
+        -----
+        The event types are requested concurrently, and records are upserted by their ID so events returned again
+        within the overlap replace the stored ones. An initial sync over a long range is split into windows as
+        described by the :code:`window_days` parameter of the DONKI methods.
+
+        Examples
+        --------
+        >>> store = DonkiStore('donki.sqlite')
+        >>> n = Nasa(key=key)
+        # Backfill every event type since the start of 2019.
+        >>> n.donki_sync(store, start_date='2019-01-01')
+        # Later polls only request the last few days.
+        >>> n.donki_sync(store)
+        {'CMEAnalysis': 0, 'GST': 1, 'IPS': 0, 'FLR': 3, 'SEP': 0, 'MPC': 0, 'RBE': 0, 'HSS': 1,
+         'WSAEnlilSimulations': 2}
+
+        """
+        if event_types is None:
+            event_types = list(DONKI_EVENT_TYPES)
+
+        for event_type in event_types:
+            if event_type not in DONKI_EVENT_TYPES:
+                raise ValueError('event_types must be keys of DONKI_EVENT_TYPES, not {event_type}.'
+                                 .format(event_type=event_type))
+
+        if not isinstance(overlap_days, int) or isinstance(overlap_days, bool) or overlap_days < 0:
+            raise ValueError('overlap_days parameter must be an integer of 0 or greater.')
+
+        start_date, _ = _check_dates(start_date=start_date)
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        calls = []
+
+        for event_type in event_types:
+            start = start_date
+            mark = store.high_water_mark(event_type)
+
+            if mark is not None:
+                mark = datetime.datetime.strptime(mark[:10], '%Y-%m-%d').date()
+                start = min(mark - datetime.timedelta(days=overlap_days), today).strftime('%Y-%m-%d')
+
+            calls.append(partial(getattr(self, DONKI_EVENT_TYPES[event_type]), start_date=start))
+
+        def merge(results):
+            return {event_type: store.upsert(event_type, result) for event_type, result in zip(event_types, results)}
+
+        return self._map(calls, merge)
+
+    def epic(self, color='natural', date=None, available=False):
+        r"""
+        The EPIC API provides data on the imagery collected by the DSCOVR's Earth Polychromatic Imaging Camera
+        (EPIC).
+
+        Parameters
+        ----------
+        color : str, {'natural', 'enhanced'}
+            Specifies the type of imagery to return. Must be one of 'natural' (default) or 'enhanced'
+        date : str, datetime, default None
+            String representing a date in 'YYYY-MM-DD' format or a datetime object
+        available : bool, default False
+            Alternative listing of all dates with specified color imagery
+
+        Raises
+        ------
+        TypeError
+            Raised if parameter :code:`available` is not boolean (True or False).
+        TypeError
+            Raised if parameter :code:`date` is not a string or a datetime object.
+        ValueError
+            Raised if parameter :code:`color` is not one of 'natural' or 'enhanced'
+
+        Returns
+        -------
+        list
+            List of dictionaries representing the returned JSON data from the EPIC API.
+
+        Examples
+        --------
+        # Initialize API connection with a Demo Key
+        >>> n = Nasa()
+        # Get EPIC data from the beginning of 2019.
+        >>> e = n.epic(date='2019-01-01')
+        # Print the first result
+        >>> e[0]
+        {'identifier': '20190101015633',
+         'caption': "This image was taken by NASA's EPIC camera onboard the NOAA DSCOVR spacecraft",
+         'image': 'epic_RGB_20190101015633',
+         'version': '02',
+         'centroid_coordinates': {'lat': -27.281877, 'lon': 155.325443},
          'dscovr_j2000_position': {'x': 350941.733992,
           'y': -1329357.949188,
           'z': -711000.841667},
@@ -1019,17 +1686,295 @@ class Nasa(object):
         else:
             url = url + '{color}/all'.format(color=color)
 
-        r = requests.get(url,
-                         params={'api_key': self.__api_key})
+        return self._get(url,
+                         params={'api_key': self.__api_key},
+                         parse=_json_or_empty)
 
-        if r.status_code != 200 or r.text == '':
-            r = {}
-        else:
-            self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-            r = r.json()
+    def epic_range(self, start_date, end_date=None, color='natural', max_workers=8):
+        r"""
+        Returns the EPIC image metadata of every date in a range, requesting only the dates with imagery and
+        requesting them concurrently.
+
+        Parameters
+        ----------
+        start_date : str, datetime
+            String representing a date in YYYY-MM-DD format or a datetime object.
+        end_date : str, datetime, default None
+            String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to
+            :code:`start_date`.
+        color : str, list, {'natural', 'enhanced'}
+            The type of imagery to return, or a list of types to return together. Defaults to 'natural'.
+        max_workers : int, default 8
+            The number of dates requested at a time.
+
+        Raises
+        ------
+        TypeError
+            Raised if :code:`start_date` or :code:`end_date` is not a string or a datetime object.
+        ValueError
+            Raised if a :code:`color` is not one of 'natural' or 'enhanced'.
+        ValueError
+            Raised if a date is not in YYYY-MM-DD format, or the :code:`end_date` is before the :code:`start_date`.
+        ValueError
+            Raised if :code:`max_workers` is less than 1.
+
+        Returns
+        -------
+        list, OrderedDict
+            The metadata of the images, in date order, as returned by :code:`epic`. If :code:`color` is a list, a
+            dictionary of these lists keyed by color.
+
+        Notes
+        -----
+        The dates with imagery of each color are requested from the :code:`available` endpoint once and kept by the
+        instance, and the response is kept by the transport's cache when one is configured. Dates after the latest
+        one the index lists are requested directly and the index is updated from their responses, so it is never
+        requested again in full. Dates found without imagery are only skipped later once they are older than
+        :code:`SETTLED_DAYS['epic']` days, as recent imagery may still be published. If the index cannot be
+        fetched, every date in the range is requested.
+
+        Examples
+        --------
+        >>> n = Nasa(key=key)
+        # Metadata of every natural color image of January 2019.
+        >>> n.epic_range(start_date='2019-01-01', end_date='2019-01-31')
+        # Natural and enhanced color images together.
+        >>> images = n.epic_range(start_date='2019-01-01', end_date='2019-01-31', color=['natural', 'enhanced'])
+        >>> len(images['enhanced'])
+
+        """
+        colors = [color] if isinstance(color, str) else list(color)
+
+        for c in colors:
+            if c not in ('natural', 'enhanced'):
+                raise ValueError("color parameter must be 'natural' (default), or 'enhanced'.")
+
+        if max_workers < 1:
+            raise ValueError('max_workers parameter must be at least 1.')
+
+        if start_date is None:
+            raise TypeError('start_date parameter must be a string representing a date in YYYY-MM-DD format or '
+                            'a datetime object.')
+
+        start_date, end_date = _check_dates(start_date=start_date, end_date=end_date)
+        dates = [date for date, _ in _date_windows(start_date, end_date or start_date, days=1)]
+
+        def fetch(indexes):
+            keys, calls = [], []
+
+            for c, index in zip(colors, indexes):
+                for date in dates:
+                    if index is None or index.may_have_imagery(date):
+                        keys.append((c, index, date))
+                        calls.append(partial(self.epic, color=c, date=date))
+
+            return self._map(calls, partial(_merge_epic, colors, keys), max_workers=max_workers)
+
+        r = self._map([partial(self._epic_availability, c) for c in colors], list)
+        r = _then(r, fetch)
+
+        if isinstance(color, str):
+            r = _then(r, lambda images: images[color])
 
         return r
 
+    def _epic_availability(self, color):
+        # Returns the index of the dates with imagery of a color, or None if it cannot be fetched.
+        index = self._epic_available.get(color)
+
+        if index is not None:
+            return self._result(index)
+
+        return _then(self.epic(color=color, available=True), partial(self._store_epic_availability, color))
+
+    def _store_epic_availability(self, color, dates):
+        if not isinstance(dates, list) or not dates:
+            return None
+
+        index = self._epic_available.setdefault(color, _EpicIndex(dates))
+
+        return index
+
+    def epic_download(self, directory, images=None, color='natural', start_date=None, end_date=None, variant='png',
+                      max_workers=4, chunk_size=1024 ** 2):
+        r"""
+        Downloads EPIC images from the archive to a directory, several at a time, resuming interrupted downloads and
+        skipping images already downloaded.
+
+        Parameters
+        ----------
+        directory : str
+            The directory the images are saved to. Images are saved to
+            :code:`<directory>/<color>/YYYY/MM/DD/<variant>/<image>.<png|jpg>`, mirroring the archive.
+        images : list, default None
+            Image metadata returned by :code:`epic` for a date. Cannot be combined with :code:`start_date`.
+        color : str, {'natural', 'enhanced'}
+            The type of imagery the images are from. Must be one of 'natural' (default) or 'enhanced'.
+        start_date : str, datetime, default None
+            String representing a date in YYYY-MM-DD format or a datetime object. If given, the metadata of every
+            image from this date to :code:`end_date` is requested concurrently and the images are downloaded.
+        end_date : str, datetime, default None
+            String representing a date in YYYY-MM-DD format or a datetime object. If None, defaults to
+            :code:`start_date`.
+        variant : str, {'png', 'jpg', 'thumbs'}
+            The resolution to download. 'png' (default) downloads the full 2048x2048 images, 'jpg' compressed
+            1024x1024 images and 'thumbs' small JPEG thumbnails.
+        max_workers : int, default 4
+            The number of images downloaded at a time.
+        chunk_size : int, default 1024 ** 2
+            The number of bytes read from the network and written to disk at a time.
+
+        Raises
+        ------
+        ValueError
+            Raised if neither or both of :code:`images` and :code:`start_date` are given.
+        ValueError
+            Raised if parameter :code:`color` is not one of 'natural' or 'enhanced'.
+        ValueError
+            Raised if parameter :code:`variant` is not one of 'png', 'jpg' or 'thumbs'.
+        ValueError
+            Raised if :code:`max_workers` or :code:`chunk_size` is less than 1.
+        ValueError
+            Raised if the instance uses an asynchronous transport.
+        HTTPError
+            Raised if a metadata request's returned status code is not 200 (success).
+
+        Returns
+        -------
+        OrderedDict
+            A :code:`BatchResult` for each image, keyed by image name. :code:`result` is the path of the saved file,
+            and :code:`error` holds the exception raised when the image could not be downloaded.
+
+        Notes
+        -----
+        Images are written to a :code:`.part` file that is renamed once the number of bytes received matches the
+        size reported by the server. An interrupted download is resumed from the end of its :code:`.part` file with a
+        range request. A file already at the final path is checked with a range request from its end, and is only
+        skipped when the server reports the same size. When the server does not report the size, the bytes received
+        are kept in the :code:`.part` file and an :code:`IOError` is recorded for the image.
+
+        Examples
+        --------
+        >>> n = Nasa(key=key)
+        # Download the thumbnails of the first week of 2019.
+        >>> results = n.epic_download('epic', start_date='2019-01-01', end_date='2019-01-07', variant='thumbs')
+        >>> [r.error for r in results.values() if r.error is not None]
+        []
+        # Download the full resolution images of one day from metadata already fetched.
+        >>> n.epic_download('epic', images=n.epic(date='2019-01-01'))
+
+        """
+        if (images is None) == (start_date is None):
+            raise ValueError('exactly one of the images or start_date parameters should be specified.')
+
+        if color not in ('natural', 'enhanced'):
+            raise ValueError("color parameter must be 'natural' (default), or 'enhanced'.")
+
+        if variant not in ('png', 'jpg', 'thumbs'):
+            raise ValueError("variant parameter must be one of 'png' (default), 'jpg' or 'thumbs'.")
+
+        if max_workers < 1 or chunk_size < 1:
+            raise ValueError('max_workers and chunk_size parameters must be at least 1.')
+
+        if isinstance(self.transport, AsyncTransport):
+            raise ValueError('epic_download is not supported by asynchronous clients.')
+
+        if images is None:
+            start_date, end_date = _check_dates(start_date=start_date, end_date=end_date)
+            dates = _date_windows(start_date, end_date or start_date, days=1)
+
+            images = self._map([partial(self.epic, color=color, date=date) for date, _ in dates],
+                               lambda results: [image for result in results if result for image in result],
+                               max_workers=max_workers)
+
+        extension = 'png' if variant == 'png' else 'jpg'
+        calls = []
+
+        for image in images or []:
+            day = image['date'][:10].replace('-', '/')
+            url = '{host}/EPIC/archive/{color}/{day}/{variant}/{image}.{extension}'.format(
+                host=self.host, color=color, day=day, variant=variant, image=image['image'], extension=extension)
+            path = os.path.join(directory, color, *day.split('/'),
+                                variant, '{image}.{extension}'.format(image=image['image'], extension=extension))
+
+            calls.append(('epic_download', {'image': image['image']},
+                          partial(self._download, url=url, path=path, chunk_size=chunk_size)))
+
+        results = _run_batch(calls, max_workers=max_workers)
+
+        return OrderedDict((r.kwargs['image'], r) for r in results)
+
+    def _download(self, image, url, path, chunk_size):
+        # Streams a file to disk through a .part file, resuming from the end of an existing one. A file already at
+        # the final path is verified with a range request from its end before it is skipped.
+        part = path + '.part'
+        done = os.path.exists(path)
+        source = path if done else part
+        offset = os.path.getsize(source) if os.path.exists(source) else 0
+
+        params = {'api_key': self.__api_key}
+
+        # Encoded bodies do not report the size of the file, so it could not be verified.
+        headers = {'Accept-Encoding': 'identity'}
+
+        if offset:
+            headers['Range'] = 'bytes={offset}-'.format(offset=offset)
+
+        r = self.transport.get(url, params=params, stream=True, headers=headers, **self._request_options())
+        self._update_limit(r, 'api')
+
+        with closing(r):
+            size = _content_size(r)
+
+            # The file already holds the whole image.
+            if r.status_code == 416 and offset:
+                if size is None:
+                    raise IOError('the size of {image} was not reported, so {source} could not be verified.'
+                                  .format(image=image, source=source))
+
+                if size != offset:
+                    os.remove(source)
+                    raise IOError('{image} holds {offset} bytes but the server reports {size}.'
+                                  .format(image=image, offset=offset, size=size))
+
+                if not done:
+                    os.replace(part, path)
+
+                return path
+
+            if r.status_code == 200:
+                # The server ignored the range and sent the whole file.
+                if done and size == offset:
+                    return path
+
+                offset = 0
+            elif r.status_code != 206:
+                raise requests.exceptions.HTTPError(r.reason, r.url)
+
+            # The file at the final path is incomplete and is resumed as a .part file.
+            if done:
+                os.replace(path, part)
+
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+            with open(part, 'ab' if offset else 'wb') as f:
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+
+        received = os.path.getsize(part)
+
+        if size is None:
+            raise IOError('the size of {image} was not reported, so the {received} bytes received were kept in '
+                          '{part}.'.format(image=image, received=received, part=part))
+
+        if received != size:
+            raise IOError('download of {image} ended after {received} of {size} bytes.'
+                          .format(image=image, received=received, size=size))
+
+        os.replace(part, path)
+
+        return path
+
     def earth_imagery(self, lat, lon, dim=0.025, date=None, cloud_score=False):
         r"""
         Retrieves the URL and other information from the Landsat 8 image database for the specified lat/lon location
@@ -1109,7 +2054,7 @@ class Nasa(object):
             if isinstance(date, datetime.datetime):
                 date = date.strftime('%Y-%m-%d')
 
-        r = requests.get(url,
+        return self._get(url,
                          params={
                              'lon': lon,
                              'lat': lat,
@@ -1117,15 +2062,8 @@ class Nasa(object):
                              'date': date,
                              'cloud_score': cloud_score,
                              'api_key': self.__api_key
-                         })
-
-        if r.status_code != 200 or r.text == '':
-            r = {}
-        else:
-            self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-            r = r.json()
-
-        return r
+                         },
+                         parse=_json_or_empty)
 
     def earth_assets(self, lat, lon, begin_date, end_date=None):
         r"""
@@ -1196,7 +2134,7 @@ class Nasa(object):
         if not -180 <= lon <= 180:
             raise ValueError('longitude values range from -180 to 180')
 
-        r = requests.get(url,
+        return self._get(url,
                          params={
                              'api_key': self.__api_key,
                              'lat': lat,
@@ -1205,14 +2143,6 @@ class Nasa(object):
                              'end_date': end_date
                          })
 
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
-
-        else:
-            self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-
-        return r.json()
-
     def mars_rover(self, sol=None, earth_date=None, camera='all', rover='curiosity', page=1):
         r"""
         Retrieves image data collected by the Mars rovers Curiosity, Discovery and Spirit.
@@ -1317,16 +2247,9 @@ class Nasa(object):
 
             params['earth_date'] = earth_date
 
-        r = requests.get(url,
-                         params=params)
-
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
-
-        else:
-            self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-
-        return r.json()['photos']
+        return self._get(url,
+                         params=params,
+                         parse=_photos_result)
 
     def genelab_search(self, term=None, database='cgene', page=0, size=25, sort=None, order='desc',
                        ffield=None, fvalue=None):
@@ -1417,9 +2340,7 @@ class Nasa(object):
             'api_key': self.__api_key
         }
 
-        r = _return_api_result(url=url, params=params)
-
-        return r
+        return self._get(url, params=params)
 
     def techport(self, project_id=None, last_updated=None, return_format='json'):
         r"""
@@ -1463,29 +2384,67 @@ class Nasa(object):
                 last_updated = last_updated.strftime('%Y-%m-%d')
 
         if project_id is None:
-            r = requests.get(url,
-                             params={'updatedSince': last_updated,
-                                     'api_key': self.__api_key})
+            params = {'updatedSince': last_updated,
+                      'api_key': self.__api_key}
         else:
             url = url + '/{project_id}'.format(project_id=project_id)
 
             if return_format == 'xml':
                 url = url + '.xml'
 
-            r = requests.get(url,
-                             params={'api_key': self.__api_key})
-
-        if r.status_code != 200:
-            raise requests.exceptions.HTTPError(r.reason, r.url)
-
-        self.__limit_remaining = r.headers['X-RateLimit-Remaining']
+            params = {'api_key': self.__api_key}
 
         if return_format == 'xml':
-            r = r.text
+            parse = _text_result
         else:
-            r = r.json()
+            parse = _json_result
 
-        return r
+        return self._get(url, params=params, parse=parse)
+
+    def batch(self, calls, max_workers=8, as_completed=False):
+        r"""
+        Runs many calls concurrently on a bounded thread pool sharing the instance's connection pool. A failing call
+        does not abort the batch; its exception is collected in the corresponding result instead.
+
+        Parameters
+        ----------
+        calls : list
+            List of :code:`(method, kwargs)` pairs. :code:`method` is the name of a :code:`Nasa` method, the name of
+            a module-level endpoint function such as 'close_approach', or any callable. :code:`kwargs` is a
+            dictionary of parameters for the call, or None.
+        max_workers : int, default 8
+            The maximum number of calls running at once.
+        as_completed : bool, default False
+            If True, an iterator yielding results as each call finishes is returned instead of a list in the order
+            of :code:`calls`. Every call is started before the iterator is returned.
+
+        Raises
+        ------
+        ValueError
+            Raised if a :code:`method` is not a :code:`Nasa` method, an endpoint function or a callable.
+        ValueError
+            Raised if :code:`max_workers` is less than 1.
+
+        Returns
+        -------
+        list or iterator
+            :code:`BatchResult` tuples of :code:`(index, method, kwargs, result, error)`, where :code:`index` is
+            the position of the call in :code:`calls`.
+
+        Examples
+        --------
+        # Initialize API connection with a Demo Key
+        >>> n = Nasa()
+        >>> results = n.batch([('get_asteroids', {'asteroid_id': 3542519}),
+        ...                    ('solar_flare', {'start_date': '2019-05-01', 'end_date': '2019-05-31'}),
+        ...                    ('close_approach', {'des': 433})])
+        >>> [r.error for r in results]
+        [None, None, None]
+
+        """
+        calls = [(method, kwargs, self._resolve(method)) for method, kwargs in calls]
+
+        return _run_batch(calls, max_workers=max_workers, as_completed=as_completed)
 
     # def mars_mission_manifest(self, rover):
     #     url = self.host + '/mars-photos/api/manifests/{rover}'.format(rover=rover)
@@ -1494,34 +2453,243 @@ class Nasa(object):
     #
     #     return r
 
-    # def patents(self, query, concept_tags=False, limit=None):
-    #     url = self.host + '/patents/content'
-    #
-    #     if limit is not None:
-    #         if not isinstance(limit, int):
-    #             raise TypeError('limit parameter must None (return all results) or an int.')
-    #
-    #     if not isinstance(concept_tags, bool):
-    #         raise TypeError('concept_tags parameter must be boolean (True or False).')
-    #
-    #     r = requests.get(url,
-    #                      params={
-    #                          'query': query,
-    #                          'limit': limit,
-    #                          'api_key': self.__api_key
-    #                      })
-    #
-    #     if r.status_code != 200 or r.text == '':
-    #         r = {}
-    #     else:
-    #         self.__limit_remaining = r.headers['X-RateLimit-Remaining']
-    #         r = r.json()
-    #
-    #     return r
+    # def patents(self, query, concept_tags=False, limit=None):
+    #     url = self.host + '/patents/content'
+    #
+    #     if limit is not None:
+    #         if not isinstance(limit, int):
+    #             raise TypeError('limit parameter must None (return all results) or an int.')
+    #
+    #     if not isinstance(concept_tags, bool):
+    #         raise TypeError('concept_tags parameter must be boolean (True or False).')
+    #
+    #     r = requests.get(url,
+    #                      params={
+    #                          'query': query,
+    #                          'limit': limit,
+    #                          'api_key': self.__api_key
+    #                      })
+    #
+    #     if r.status_code != 200 or r.text == '':
+    #         r = {}
+    #     else:
+    #         self.__limit_remaining = r.headers['X-RateLimit-Remaining']
+    #         r = r.json()
+    #
+    #     return r
+
+
+class AsyncNasa(Nasa):
+    r"""
+    Asynchronous version of the :code:`Nasa` class. Every :code:`Nasa` method, as well as the module-level endpoint
+    functions, returns an awaitable, so many requests can be kept in flight on a single event loop.
+
+    Parameters
+    ----------
+    key : str, default None
+        The generated API key received from the NASA API. If :code:`None`, a 'DEMO_KEY' is used.
+    keys : list, default None
+        Several API keys to spread requests across, as for :code:`Nasa`.
+    transport : AsyncTransport, aiohttp.ClientSession, default None
+        The asynchronous transport used to issue requests. A bare :code:`aiohttp.ClientSession` is wrapped in an
+        :code:`AsyncTransport`. If :code:`None`, an :code:`AsyncTransport` bounding the number of in-flight
+        requests per host is created.
+    retry : RetryPolicy, default None
+        The timeouts, retries and per-call deadline applied to requests, as for :code:`Nasa`.
+
+    Methods
+    -------
+    close_approach, fireballs, mission_design, nhats, scout, sentry, exoplanets, tle, media_search,
+    media_asset_manifest, media_asset_metadata, media_asset_captions
+        Awaitable versions of the module-level functions of the same name.
+    close
+        Closes the underlying transport.
+
+    Notes
+    -----
+    Parameters are validated exactly as in the synchronous methods, but not always at the same moment. The methods
+    of the NASA API endpoints, such as :code:`solar_flare`, raise :code:`TypeError` and :code:`ValueError` when they
+    are called, before an awaitable is returned. The coroutine methods wrapping the module-level functions, such as
+    :code:`close_approach` and :code:`tle`, raise them when the coroutine is awaited.
+
+    Examples
+    --------
+    >>> async def main():
+    ...     async with AsyncNasa() as n:
+    ...         return await asyncio.gather(n.solar_flare(start_date='2019-05-01', end_date='2019-05-31'),
+    ...                                     n.close_approach(date_min='2019-01-01', date_max='2019-12-31'))
+    >>> flares, cad = asyncio.run(main())
+
+    """
+    def __init__(self, key=None, keys=None, transport=None, retry=None):
+        if transport is None:
+            transport = AsyncTransport()
+
+        super(AsyncNasa, self).__init__(key=key, keys=keys, transport=transport, retry=retry)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get(self, url, params=None, parse=None, quota='api'):
+        return self._get_async(url, params=params, parse=parse, quota=quota)
+
+    async def _get_async(self, url, params=None, parse=None, quota='api'):
+        if parse is None:
+            parse = _json_result
+
+        r = await self.transport.get(url, params=params, **self._request_options(quota))
+        self._update_limit(r, quota)
+
+        return parse(r)
+
+    async def _result(self, value):
+        return value
+
+    async def _call(self, func, *args, **kwargs):
+        previous = _current_client()
+        _bound.client = self
+
+        try:
+            r = func(*args, **kwargs)
+        finally:
+            _bound.client = previous
+
+        if inspect.isawaitable(r):
+            r = await r
+
+        return r
+
+    def _map(self, funcs, merge, max_workers=8):
+        async def run():
+            semaphore = asyncio.Semaphore(max_workers)
+
+            async def call(func):
+                async with semaphore:
+                    return await func()
+
+            return merge(await asyncio.gather(*(call(func) for func in funcs)))
+
+        return run()
+
+    async def close(self):
+        await self.transport.close()
+
+    async def batch(self, calls, max_workers=8, as_completed=False):
+        r"""
+        Awaitable version of :code:`Nasa.batch`. At most :code:`max_workers` calls are awaited at once, and a list
+        of :code:`BatchResult` tuples is returned in call order, or in completion order if :code:`as_completed`
+        is True.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers parameter must be at least 1.')
+
+        calls = [(method, kwargs, self._resolve(method)) for method, kwargs in calls]
+        semaphore = asyncio.Semaphore(max_workers)
+        results = []
+
+        async def run(index, method, kwargs, func):
+            async with semaphore:
+                try:
+                    result = BatchResult(index, method, kwargs, await func(**(kwargs or {})), None)
+                except Exception as e:
+                    result = BatchResult(index, method, kwargs, None, e)
+
+            results.append(result)
+
+        await asyncio.gather(*(run(i, *call) for i, call in enumerate(calls)))
+
+        if not as_completed:
+            results.sort(key=lambda r: r.index)
+
+        return results
+
+    def browse_asteroids(self, checkpoint=None, size=20, max_workers=4):
+        r"""
+        Asynchronous version of :code:`Nasa.browse_asteroids`, returning an iterator to be used with
+        :code:`async for`.
+        """
+        url, crawl = self._browse_crawl(checkpoint, size, max_workers)
+
+        return _AsyncBrowse(self, url, crawl)
+
+    async def close_approach(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`close_approach`.
+        """
+        return await self._call(close_approach, *args, **kwargs)
+
+    async def fireballs(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`fireballs`.
+        """
+        return await self._call(fireballs, *args, **kwargs)
+
+    async def mission_design(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`mission_design`.
+        """
+        return await self._call(mission_design, *args, **kwargs)
+
+    async def nhats(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`nhats`.
+        """
+        return await self._call(nhats, *args, **kwargs)
+
+    async def scout(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`scout`.
+        """
+        return await self._call(scout, *args, **kwargs)
+
+    async def sentry(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`sentry`.
+        """
+        return await self._call(sentry, *args, **kwargs)
+
+    async def exoplanets(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`exoplanets`.
+        """
+        return await self._call(exoplanets, *args, **kwargs)
+
+    async def tle(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`tle`.
+        """
+        return await self._call(tle, *args, **kwargs)
+
+    async def media_search(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`media_search`.
+        """
+        return await self._call(media_search, *args, **kwargs)
+
+    async def media_asset_manifest(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`media_asset_manifest`.
+        """
+        return await self._call(media_asset_manifest, *args, **kwargs)
+
+    async def media_asset_metadata(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`media_asset_metadata`.
+        """
+        return await self._call(media_asset_metadata, *args, **kwargs)
+
+    async def media_asset_captions(self, *args, **kwargs):
+        r"""
+        Awaitable version of :code:`media_asset_captions`.
+        """
+        return await self._call(media_asset_captions, *args, **kwargs)
 
 
 def exoplanets(table='exoplanets', select=None, count=None, colset=None, where=None, order=None, ra=None, dec=None,
-               aliastable=None, objname=None, return_df=False):
+               aliastable=None, objname=None, return_df=False, stream=False):
     r"""
     Provides access to NASA's Exoplanet Archive.
 
@@ -1553,6 +2721,15 @@ def exoplanets(table='exoplanets', select=None, count=None, colset=None, where=N
         When parameter `aliastable` is specified, `objname` must also be passed with the planet's name.
     return_df : bool, default False
         If `True`, returns the JSON data as a pandas DataFrame.
+    stream : bool, default False
+        If True, the response is read incrementally and an iterator yielding the rows of the table one at a time
+        is returned, so memory use is bounded by a single row rather than the whole table. Cannot be combined with
+        :code:`return_df`.
+
+    Raises
+    ------
+    ValueError
+        Raised if both :code:`stream` and :code:`return_df` are True.
 
     Returns
     -------
@@ -1566,29 +2743,37 @@ def exoplanets(table='exoplanets', select=None, count=None, colset=None, where=N
     >>> exoplanets(return_df=True)
     # Get all confirmed planets in the Kepler field.
     >>> exoplanets(where='pl_kepflag=1')
+    # Iterate over every row of the exoplanets table without holding the whole table in memory.
+    >>> for planet in exoplanets(stream=True):
+    ...     print(planet['pl_name'])
     # Stars known to host exoplanets as a pandas DataFrame.
     >>> exoplanets(select='distinct pl_hostname', order='pl_hostname', return_df=True)
 
     """
+    if stream and return_df:
+        raise ValueError('stream and return_df parameters cannot both be True.')
+
     host = 'https://exoplanetarchive.ipac.caltech.edu/cgi-bin/nstedAPI/nph-nstedAPI?'
 
-    r = requests.get(host,
-                     params={
-                         'table': table,
-                         'select': select,
-                         'count': count,
-                         'colset': colset,
-                         'where': where,
-                         'order': order,
-                         'ra': ra,
-                         'dec': dec,
-                         'aliastable': aliastable,
-                         'objname': objname,
-                         'format': 'json'
-                     }).json()
+    r = _return_api_result(host,
+                           params={
+                               'table': table,
+                               'select': select,
+                               'count': count,
+                               'colset': colset,
+                               'where': where,
+                               'order': order,
+                               'ra': ra,
+                               'dec': dec,
+                               'aliastable': aliastable,
+                               'objname': objname,
+                               'format': 'json'
+                           },
+                           parse=_json_body,
+                           stream=stream)
 
     if return_df:
-        r = DataFrame(r)
+        r = _then(r, DataFrame)
 
     return r
 
@@ -1626,27 +2811,20 @@ def tle(search_satellite=None, satellite_number=None):
     """
     url = 'https://data.ivanstanojevic.me/api/tle'
 
+    params = None
+
     if search_satellite is not None:
-        r = requests.get(url,
-                         params={'search': search_satellite})
+        params = {'search': search_satellite}
 
     elif satellite_number is not None:
         url = url + '/{satellite_number}'.format(satellite_number=satellite_number)
 
-        r = requests.get(url)
-
-    else:
-        r = requests.get(url)
-
-    if r.status_code == 404:
-        raise requests.exceptions.HTTPError(r.json()['response']['message'])
-
-    return r.json()
+    return _return_api_result(url, params=params, parse=_tle_result)
 
 
 def media_search(query=None, center=None, description=None, keywords=None, location=None, media_type=None,
                  nasa_id=None, page=1, photographer=None, secondary_creator=None, title=None, year_start=None,
-                 year_end=None):
+                 year_end=None, stream=False):
     r"""
     Performs a general search for media from the images.nasa.gov API based on parameters and criteria specified.
     At least one parameter must be provided.
@@ -1683,6 +2861,9 @@ def media_search(query=None, center=None, description=None, keywords=None, locat
     year_end : str, datetime, None (default)
         The end year for results. If provided, must be a string representing a year in YYYY format or a
         datetime object.
+    stream : bool, default False
+        If True, the response is read incrementally and an iterator yielding the 'items' of the returned collection
+        one at a time is returned, so memory use is bounded by a single item rather than the whole response.
 
     Raises
     ------
@@ -1765,9 +2946,12 @@ def media_search(query=None, center=None, description=None, keywords=None, locat
         'year_end': year_end
     }
 
-    r = _return_api_result(url=url, params=params)
+    r = _return_api_result(url=url, params=params, stream=stream)
 
-    return r['collection']
+    if stream:
+        return r
+
+    return _then(r, lambda r: r['collection'])
 
 
 def media_asset_manifest(nasa_id):
@@ -1842,7 +3026,7 @@ def media_asset_captions(nasa_id):
 def close_approach(date_min='now', date_max='+60', dist_min=None, dist_max='0.05', h_min=None, h_max=None,
                    v_inf_min=None, v_inf_max=None, v_rel_min=None, v_rel_max=None, orbit_class=None, pha=False,
                    nea=False, comet=False, nea_comet=False, neo=False, kind=None, spk=None, des=None,
-                   body='Earth', sort='date', limit=None, fullname=False, return_df=False):
+                   body='Earth', sort='date', limit=None, fullname=False, return_df=False, stream=False):
     r"""
     Provides data for currently known close-approach data for all asteroids and comets in NASA's Jet Propulsion
     Laboratory's (JPL) Small-Body Database.
@@ -1910,9 +3094,15 @@ def close_approach(date_min='now', date_max='+60', dist_min=None, dist_max='0.05
     return_df : bool, default False
         If True, returns the 'data' field of the returned JSON data as a pandas DataFrame with column names extracted
         from the 'fields' key of the returned JSON.
+    stream : bool, default False
+        If True, the response is read incrementally and an iterator yielding the rows of the 'data' field one at a
+        time, as dictionaries keyed by the 'fields' names, is returned. Memory use is then bounded by a single row
+        rather than the whole response. Cannot be combined with :code:`return_df`.
 
     Raises
     ------
+    ValueError
+        Raised if both :code:`stream` and :code:`return_df` are True.
     ValueError
         Raised if :code:`h_min` is greater than :code:`h_max`
     ValueError
@@ -1976,6 +3166,9 @@ def close_approach(date_min='now', date_max='+60', dist_min=None, dist_max='0.05
     """
     url = 'https://ssd-api.jpl.nasa.gov/cad.api'
 
+    if stream and return_df:
+        raise ValueError('stream and return_df parameters cannot both be True.')
+
     if date_min != 'now':
         if not isinstance(date_min, (str, datetime.datetime)):
             raise TypeError("date parameter must be a string representing a date in YYYY-MM-DD or YYYY-MM-DDThh:mm:ss "
@@ -2050,10 +3243,10 @@ def close_approach(date_min='now', date_max='+60', dist_min=None, dist_max='0.05
         'fullname': fullname
     }
 
-    r = _return_api_result(url=url, params=params)
+    r = _return_api_result(url=url, params=params, stream=stream)
 
     if return_df:
-        r = DataFrame(r['data'], columns=r['fields'])
+        r = _then(r, _fields_frame)
 
     return r
 
@@ -2260,7 +3453,7 @@ def fireballs(date_min=None, date_max=None, energy_min=None, energy_max=None, im
                            params=params)
 
     if return_df:
-        r = DataFrame(r['data'], columns=r['fields'])
+        r = _then(r, _fields_frame)
 
     return r
 
@@ -2516,7 +3709,7 @@ def nhats(spk=None, des=None, delta_v=12, duration=450, stay=8, launch='2020-204
     r = _return_api_result(url=url, params=params)
 
     if return_df:
-        r = DataFrame(r['data'])
+        r = _then(r, _data_frame)
 
     return r
 
@@ -2670,14 +3863,13 @@ def scout(tdes=None, plot=None, data_files=None, orbits=None, n_orbits=None, eph
     if return_df:
         if all(p is None for p in (tdes, plot, data_files, orbits, n_orbits, eph_start, eph_stop, eph_step, obs_code,
                                    fov_diam, fov_ra, fov_dec, fov_vmag)):
-            if int(r['count']) > 0:
-                r = DataFrame(r['data'])
+            r = _then(r, _scout_frame)
 
     return r
 
 
 def sentry(spk=None, des=None, h_max=None, ps_min=None, ip_min=None, last_obs_days=None, complete_data=False,
-           removed=False, return_df=False):
+           removed=False, return_df=False, stream=False):
     r"""
     Provides data available from the Center for Near Earth Object Studies (CNEOS) Sentry system.
 
@@ -2706,9 +3898,15 @@ def sentry(spk=None, des=None, h_max=None, ps_min=None, ip_min=None, last_obs_da
         If True, returns the 'data' field of the returned JSON data as a pandas DataFrame. If a `des` or `spk`
         parameter is passed with `return_df=True`, a tuple containing the coerced data field as a pandas DataFrame and
         the `summary` object of the returned data will be returned.
+    stream : bool, default False
+        If True, the response is read incrementally and an iterator yielding the records of the 'data' field one at
+        a time is returned, so memory use is bounded by a single record rather than the whole response. Cannot be
+        combined with :code:`return_df`.
 
     Raises
     ------
+    ValueError
+        Raised if both :code:`stream` and :code:`return_df` are True.
     ValueError
         Raised if :code:`spk` and :code:`des` are both specified.
     ValueError
@@ -2743,6 +3941,9 @@ def sentry(spk=None, des=None, h_max=None, ps_min=None, ip_min=None, last_obs_da
     """
     url = 'https://ssd-api.jpl.nasa.gov/sentry.api'
 
+    if stream and return_df:
+        raise ValueError('stream and return_df parameters cannot both be True.')
+
     if spk is not None and des is not None:
         raise ValueError('only spk or des should be specified, not both.')
 
@@ -2784,18 +3985,67 @@ def sentry(spk=None, des=None, h_max=None, ps_min=None, ip_min=None, last_obs_da
         if des is not None:
             params['des'] = des
 
-    r = _return_api_result(url=url, params=params)
+    r = _return_api_result(url=url, params=params, stream=stream)
 
     if return_df:
-        if 'summary' in r.keys():
-            r, r2 = DataFrame(r['data']), r['summary']
-            return r, r2
-        else:
-            r = DataFrame(r['data'])
+        r = _then(r, _sentry_frame)
 
     return r
 
 
+def batch(calls, max_workers=8, as_completed=False):
+    r"""
+    Runs many endpoint function calls concurrently on a bounded thread pool sharing the default transport's
+    connection pool. A failing call does not abort the batch; its exception is collected in the corresponding
+    result instead.
+
+    Parameters
+    ----------
+    calls : list
+        List of :code:`(function, kwargs)` pairs. :code:`function` is the name of a module-level endpoint function,
+        such as 'close_approach' or 'sentry', or any callable. :code:`kwargs` is a dictionary of parameters for the
+        call, or None.
+    max_workers : int, default 8
+        The maximum number of calls running at once.
+    as_completed : bool, default False
+        If True, an iterator yielding results as each call finishes is returned instead of a list in the order of
+        :code:`calls`. Every call is started before the iterator is returned.
+
+    Raises
+    ------
+    ValueError
+        Raised if a :code:`function` is not an endpoint function name or a callable.
+    ValueError
+        Raised if :code:`max_workers` is less than 1.
+
+    Returns
+    -------
+    list or iterator
+        :code:`BatchResult` tuples of :code:`(index, method, kwargs, result, error)`.
+
+    Examples
+    --------
+    >>> results = batch([('close_approach', {'des': 433, 'date_min': '1900-01-01', 'date_max': '2100-01-01'}),
+    ...                  ('sentry', {'des': 99942}),
+    ...                  ('fireballs', {'limit': 10})])
+    >>> cad = results[0].result
+
+    """
+    resolved = []
+
+    for method, kwargs in calls:
+        if callable(method):
+            func = method
+        elif method in _ENDPOINT_FUNCTIONS:
+            func = _endpoint_function(method)
+        else:
+            raise ValueError('{method} is not an endpoint function.'.format(method=method))
+
+        resolved.append((method, kwargs, func))
+
+    return _run_batch(resolved, max_workers=max_workers, as_completed=as_completed)
+
+
 def julian_date(dt=None, year=None, month=1, day=1, hour=0, minute=0, second=0, modified=True):
     r"""
     Calculates the Julian date or modified Julian date (if specified).
@@ -2868,59 +4118,59 @@ def julian_date(dt=None, year=None, month=1, day=1, hour=0, minute=0, second=0,
 def _media_assets(endpoint, nasa_id):
     url = 'https://images-api.nasa.gov/{endpoint}/{nasa_id}'
 
-    r = requests.get(url.format(endpoint=endpoint,
-                                nasa_id=nasa_id))
+    # The follow-up request for the asset location is issued later, so the bound client is captured here.
+    client = _current_client()
 
-    if r.status_code != 200:
-        raise requests.exceptions.HTTPError(r.reason, r.url)
+    r = _return_api_result(url.format(endpoint=endpoint,
+                                      nasa_id=nasa_id))
 
-    else:
-        if endpoint == 'asset':
-            return r.json()['collection']['items']
+    if endpoint == 'asset':
+        return _then(r, lambda r: r['collection']['items'])
 
-        elif endpoint == 'metadata':
-            location = r.json()['location']
-            r = requests.get(location).json()
-            r['location'] = location
+    elif endpoint == 'metadata':
+        return _then(r, lambda r: _media_asset_location(r['location'], client))
 
-            return r
+    elif endpoint == 'captions':
+        return _then(r, lambda r: _media_asset_captions(r['location'], client))
 
-        elif endpoint == 'captions':
-            location = r.json()['location']
-            r = requests.get(location).text
+    return r
 
-            r = {
-                'location': location,
-                'captions': r
-            }
 
-    return r
+def _media_asset_location(location, client):
+    r = _return_api_result(location, parse=_json_body, client=client)
 
+    return _then(r, lambda r: dict(r, location=location))
 
-def _donki_request(key, url, start_date=None, end_date=None):
-    start_date, end_date = _check_dates(start_date=start_date, end_date=end_date)
 
-    r = requests.get(url,
-                     params={
-                         'api_key': key,
-                         'startDate': start_date,
-                         'endDate': end_date
-                     })
+def _media_asset_captions(location, client):
+    r = _return_api_result(location, parse=_text_body, client=client)
+
+    return _then(r, lambda r: {'location': location, 'captions': r})
+
+
+def _donki_request(key, url, start_date=None, end_date=None, transport=None):
+    if transport is None:
+        transport = get_transport()
+
+    r = transport.get(url,
+                      params=_donki_params(key=key, start_date=start_date, end_date=end_date))
 
     if 'X-RateLimit-Remaining' not in r.headers:
         limit_remaining = 'n/a'
     else:
         limit_remaining = r.headers['X-RateLimit-Remaining']
 
-    if r.status_code != 200:
-        raise requests.exceptions.HTTPError(r.reason, r.url)
+    return limit_remaining, _donki_result(r)
 
-    if r.text == '':
-        r = {}
-    else:
-        r = r.json()
 
-    return limit_remaining, r
+def _donki_params(key, start_date=None, end_date=None):
+    start_date, end_date = _check_dates(start_date=start_date, end_date=end_date)
+
+    return {
+        'api_key': key,
+        'startDate': start_date,
+        'endDate': end_date
+    }
 
 
 def _check_dates(start_date=None, end_date=None):
@@ -2943,12 +4193,438 @@ def _check_dates(start_date=None, end_date=None):
     return start_date, end_date
 
 
-def _return_api_result(url, params):
-    r = requests.get(url,
-                     params=params)
+class _EpicIndex(object):
+    # The dates with EPIC imagery of a color. Dates after the latest one listed by the available endpoint are
+    # learned from the responses to requests for them.
+
+    def __init__(self, dates):
+        self.available = set(dates)
+        self.latest = max(self.available)
+
+        # Dates after the latest listed one found without imagery once they were settled.
+        self.empty = set()
+
+    def may_have_imagery(self, date):
+        # Returns False only for dates known to have no imagery.
+        if date <= self.latest:
+            return date in self.available
+
+        return date not in self.empty
+
+    def record(self, date, images):
+        if date <= self.latest:
+            return
+
+        settled = datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=SETTLED_DAYS['epic'])
+
+        if images:
+            self.available.add(date)
+        elif date <= settled.strftime('%Y-%m-%d'):
+            self.empty.add(date)
+
+
+class _BrowseCrawl(object):
+    # Tracks the pages of a browse crawl, persisting the next page to yield so an interrupted crawl can resume.
+
+    def __init__(self, api_key, checkpoint, size, max_workers):
+        self.api_key = api_key
+        self.checkpoint = checkpoint
+        self.size = size
+        self.window = max_workers * 2
+
+        # The total is unknown until the first page of a new crawl has been fetched.
+        self.next_page = 0
+        self.total_pages = 1
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                state = json.load(f)
+
+            if state['size'] != size:
+                raise ValueError('checkpoint was written by a crawl with size={size}.'.format(size=state['size']))
+
+            self.next_page = state['next_page']
+            self.total_pages = state['total_pages']
+
+        self._submitted = self.next_page
+
+    def params(self, page):
+        return {'api_key': self.api_key, 'page': page, 'size': self.size}
+
+    def pages_to_submit(self, pending):
+        pages = []
+
+        while self._submitted < self.total_pages and pending + len(pages) < self.window:
+            pages.append(self._submitted)
+            self._submitted += 1
+
+        return pages
+
+    def fetched(self, result):
+        self.total_pages = result['page']['total_pages']
+
+    def complete(self, page):
+        self.next_page = page + 1
+
+        if self.checkpoint is None:
+            return
+
+        tmp = self.checkpoint + '.tmp'
+
+        with open(tmp, 'w') as f:
+            json.dump({'size': self.size, 'next_page': self.next_page, 'total_pages': self.total_pages}, f)
+
+        os.replace(tmp, self.checkpoint)
+
+
+class _AsyncBrowse(object):
+    # Asynchronous iterator over a browse crawl, keeping up to the crawl's window of page requests in flight.
+
+    def __init__(self, client, url, crawl):
+        self.client = client
+        self.url = url
+        self.crawl = crawl
+
+        self._pending = deque()
+        self._neos = deque()
+        self._page = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._neos:
+            # Every asteroid of the current page has been handed over, so the page can be recorded.
+            if self._page is not None:
+                self.crawl.complete(self._page)
+                self._page = None
+
+            if self.crawl.next_page >= self.crawl.total_pages:
+                raise StopAsyncIteration
+
+            for page in self.crawl.pages_to_submit(len(self._pending)):
+                future = asyncio.ensure_future(self.client._get(self.url, params=self.crawl.params(page)))
+                self._pending.append((page, future))
+
+            page, future = self._pending.popleft()
+
+            try:
+                result = await future
+            except BaseException:
+                self.cancel()
+                raise
+
+            self.crawl.fetched(result)
+            self._neos.extend(result['near_earth_objects'])
+            self._page = page
+
+        return self._neos.popleft()
 
+    def cancel(self):
+        for _, future in self._pending:
+            future.cancel()
+
+        self._pending.clear()
+
+
+def _date_windows(start_date, end_date, days):
+    # Splits an inclusive date range into consecutive windows spanning at most the given number of days.
+    if start_date is None or end_date is None:
+        return [(start_date, end_date)]
+
+    start = _parse_date(start_date, 'start_date')
+    end = _parse_date(end_date, 'end_date')
+
+    if end < start:
+        raise ValueError('end_date parameter must not be before start_date.')
+
+    windows = []
+
+    while start <= end:
+        stop = min(start + datetime.timedelta(days=days - 1), end)
+        windows.append((start.strftime('%Y-%m-%d'), stop.strftime('%Y-%m-%d')))
+        start = stop + datetime.timedelta(days=1)
+
+    return windows
+
+
+def _parse_date(date, name):
+    try:
+        return datetime.datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('{name} parameter must be a date in YYYY-MM-DD format.'.format(name=name))
+
+
+def _merge_feeds(feeds):
+    # Merges the feeds of consecutive windows, given in date order, into the feed of the whole range.
+    dates = {}
+
+    for feed in feeds:
+        for date, objects in feed['near_earth_objects'].items():
+            dates.setdefault(date, []).extend(objects)
+
+    near_earth_objects = {}
+    seen = set()
+
+    # An asteroid is kept under the earliest date it is listed for.
+    for date in sorted(dates):
+        near_earth_objects[date] = []
+
+        for obj in dates[date]:
+            if obj['id'] not in seen:
+                seen.add(obj['id'])
+                near_earth_objects[date].append(obj)
+
+    return {
+        'links': _merge_feed_links([feed.get('links') or {} for feed in feeds]),
+        'element_count': len(seen),
+        'near_earth_objects': near_earth_objects
+    }
+
+
+def _merge_feed_links(links):
+    # The previous page is the one before the first window and the next page the one after the last window.
+    merged = {}
+
+    if links and 'prev' in links[0]:
+        merged['prev'] = links[0]['prev']
+
+    if links and 'next' in links[-1]:
+        merged['next'] = links[-1]['next']
+
+    if links and 'self' in links[0] and 'self' in links[-1]:
+        end_date = dict(parse_qsl(urlsplit(links[-1]['self']).query)).get('end_date')
+        parts = urlsplit(links[0]['self'])
+        query = urlencode([(name, end_date if name == 'end_date' else value)
+                           for name, value in parse_qsl(parts.query)])
+
+        merged['self'] = urlunsplit(parts._replace(query=query))
+
+    return merged
+
+
+def _merge_donki(endpoint, results):
+    time_field = _DONKI_FIELDS[endpoint][1]
+    records = OrderedDict()
+
+    # An empty window is returned by the API as an empty body, which is parsed to an empty dictionary.
+    for record in (record for result in results if result for record in result):
+        key = _record_id(endpoint, record)
+
+        if key is None:
+            key = len(records)
+
+        records[key] = record
+
+    merged = sorted(records.values(), key=lambda record: record.get(time_field) or '')
+
+    return merged or {}
+
+
+def _return_api_result(url, params=None, parse=None, client=None, stream=False):
+    if parse is None:
+        parse = _json_result
+
+    if client is None:
+        client = _current_client()
+
+    if stream:
+        return _stream_api_result(url, params, client)
+
+    if client is not None:
+        return client._get(url, params=params, parse=parse)
+
+    return parse(get_transport().get(url, params=params))
+
+
+def _stream_api_result(url, params, client):
+    transport = client.transport if client is not None else get_transport()
+
+    if isinstance(transport, AsyncTransport):
+        raise ValueError('stream parameter is not supported by asynchronous clients.')
+
+    r = transport.get(url, params=params, stream=True, **(client._request_options() if client is not None else {}))
+
+    if r.status_code != 200:
+        r.close()
+        raise requests.exceptions.HTTPError(r.reason, r.url)
+
+    return _iter_response(r)
+
+
+def _iter_feeds(streams):
+    # Streams the asteroids of consecutive feed windows, requesting each window once the previous one has been read.
+    seen = set()
+
+    for stream in streams:
+        for obj in stream():
+            if obj.get('id') not in seen:
+                seen.add(obj.get('id'))
+                yield obj
+
+
+def _merge_epic(colors, keys, results):
+    images = OrderedDict((color, []) for color in colors)
+
+    for (color, index, date), result in zip(keys, results):
+        if index is not None:
+            index.record(date, result)
+
+        images[color].extend(result or [])
+
+    return images
+
+
+def _content_size(r):
+    # The full size of a downloaded file, or None if the response does not give it or its body is encoded.
+    if r.headers.get('Content-Encoding', 'identity') != 'identity':
+        return None
+
+    # Partial and unsatisfiable range responses give the full size in the Content-Range header.
+    if r.status_code in (206, 416):
+        total = r.headers.get('Content-Range', '').rpartition('/')[2]
+
+        return int(total) if total.isdigit() else None
+
+    length = r.headers.get('Content-Length')
+
+    return int(length) if length is not None and length.isdigit() else None
+
+
+def _iter_response(r):
+    with closing(r):
+        for record in iter_records(r.iter_content(chunk_size=65536)):
+            yield record
+
+
+def _run_batch(calls, max_workers=8, as_completed=False):
+    if max_workers < 1:
+        raise ValueError('max_workers parameter must be at least 1.')
+
+    # Every call is submitted before returning, so the calls run whether or not the results are iterated. The pool
+    # finishes the submitted calls after being shut down.
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    try:
+        futures = {pool.submit(func, **(kwargs or {})): (i, method, kwargs)
+                   for i, (method, kwargs, func) in enumerate(calls)}
+    finally:
+        pool.shutdown(wait=False)
+
+    if as_completed:
+        return _iter_batch(futures)
+
+    return sorted(_iter_batch(futures), key=lambda r: r.index)
+
+
+def _iter_batch(futures):
+    for future in completed_futures(futures):
+        i, method, kwargs = futures[future]
+
+        try:
+            result = BatchResult(i, method, kwargs, future.result(), None)
+        except Exception as e:
+            result = BatchResult(i, method, kwargs, None, e)
+
+        yield result
+
+
+_ENDPOINT_FUNCTIONS = ('close_approach', 'fireballs', 'mission_design', 'nhats', 'scout', 'sentry', 'exoplanets',
+                       'tle', 'media_search', 'media_asset_manifest', 'media_asset_metadata', 'media_asset_captions')
+
+
+def _endpoint_function(name):
+    return globals()[name]
+
+
+def _current_client():
+    return getattr(_bound, 'client', None)
+
+
+def _then(r, callback):
+    # Applies callback to a result, or to the awaited result when r is a coroutine from an AsyncNasa request.
+    if inspect.isawaitable(r):
+        async def chain():
+            value = callback(await r)
+
+            if inspect.isawaitable(value):
+                value = await value
+
+            return value
+
+        return chain()
+
+    return callback(r)
+
+
+def _json_result(r):
     if r.status_code != 200:
         raise requests.exceptions.HTTPError(r.reason, r.url)
 
     else:
         return r.json()
+
+
+def _json_body(r):
+    return r.json()
+
+
+def _text_body(r):
+    return r.text
+
+
+def _json_or_empty(r):
+    if r.status_code != 200 or r.text == '':
+        return {}
+
+    return r.json()
+
+
+def _text_result(r):
+    if r.status_code != 200:
+        raise requests.exceptions.HTTPError(r.reason, r.url)
+
+    return r.text
+
+
+def _donki_result(r):
+    if r.status_code != 200:
+        raise requests.exceptions.HTTPError(r.reason, r.url)
+
+    if r.text == '':
+        return {}
+
+    return r.json()
+
+
+def _photos_result(r):
+    return _json_result(r)['photos']
+
+
+def _tle_result(r):
+    if r.status_code == 404:
+        raise requests.exceptions.HTTPError(r.json()['response']['message'])
+
+    return r.json()
+
+
+def _fields_frame(r):
+    return DataFrame(r['data'], columns=r['fields'])
+
+
+def _data_frame(r):
+    return DataFrame(r['data'])
+
+
+def _scout_frame(r):
+    if int(r['count']) > 0:
+        r = DataFrame(r['data'])
+
+    return r
+
+
+def _sentry_frame(r):
+    if 'summary' in r.keys():
+        return DataFrame(r['data']), r['summary']
+
+    return DataFrame(r['data'])
@@ -0,0 +1,624 @@
+# encoding=utf-8
+
+"""
+Response caching for the transports used by the :code:`Nasa` class and the module-level endpoint functions.
+
+"""
+
+
+import abc
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from urllib.parse import urlsplit
+
+from requests.structures import CaseInsensitiveDict
+
+from nasapy.sqlite import Transaction
+from nasapy.transport import build_response, _request_key
+
+
+#: Seconds a cached response stays fresh, by host and path prefix. The longest matching prefix applies and responses
+#: from unlisted endpoints use :code:`DEFAULT_TTL`. A value of None never expires and 0 disables caching.
+CACHE_TTLS = {
+    'api.nasa.gov/planetary/apod': 3600,
+    'api.nasa.gov/insight_weather': 600,
+    'api.nasa.gov/neo/rest/v1/feed': 3600,
+    'api.nasa.gov/neo/rest/v1/neo/': 86400,
+    'api.nasa.gov/neo/rest/v1/neo/browse': 3600,
+    'api.nasa.gov/DONKI': 600,
+    'api.nasa.gov/EPIC/api': 3600,
+    'api.nasa.gov/techport': 86400,
+    'ssd-api.jpl.nasa.gov/sentry.api': 600,
+    'ssd-api.jpl.nasa.gov/scout.api': 600,
+    'exoplanetarchive.ipac.caltech.edu': 86400,
+}
+
+#: Seconds a cached response stays fresh when its endpoint is not listed in :code:`CACHE_TTLS`.
+DEFAULT_TTL = 3600
+
+#: Days after which a date-keyed response is treated as history. Past APOD and EPIC dates never change once
+#: published, while DONKI analyses of older windows are only revised occasionally.
+SETTLED_DAYS = {
+    'apod': 2,
+    'epic': 7,
+    'donki': 30,
+}
+
+
+#: Response headers that describe a single response rather than the cached resource, and so are not stored.
+UNCACHED_HEADERS = ('X-RateLimit-Limit', 'X-RateLimit-Remaining', 'Content-Length', 'Content-Encoding',
+                    'Transfer-Encoding')
+
+
+CacheEntry = namedtuple('CacheEntry', ['url', 'status_code', 'reason', 'headers', 'content', 'expires'])
+
+
+def cache_key(url, params=None):
+    r"""
+    Returns the key a request is cached under.
+
+    Parameters
+    ----------
+    url : str
+        The requested URL.
+    params : dict, default None
+        The query parameters of the request. Parameters with a value of None and the :code:`api_key` parameter are
+        left out, so requests made with different keys share cache entries.
+
+    Returns
+    -------
+    str
+        The URL with a lowercase scheme and host and the remaining parameters sorted into its query string.
+
+    """
+    return _request_key(url, params)
+
+
+class BaseCache(abc.ABC):
+    r"""
+    Abstract base class for response caches. Subclasses store :code:`CacheEntry` objects by implementing the abstract
+    methods :code:`_load`, :code:`_save`, :code:`_delete`, :code:`clear` and :code:`__len__`, and cannot be
+    instantiated without them.
+
+    Parameters
+    ----------
+    ttls : dict, default None
+        Mapping of host and path prefixes to the seconds a response stays fresh. Entries are merged over
+        :code:`CACHE_TTLS`.
+
+    Attributes
+    ----------
+    ttls : dict
+        The merged freshness policy.
+    hits : int
+        The number of requests answered from the cache.
+    misses : int
+        The number of requests that were not in the cache or had expired.
+    revalidated : int
+        The number of expired responses the server confirmed as unchanged with a 304 (Not Modified) status.
+
+    Notes
+    -----
+    Expired responses that carry an :code:`ETag` or :code:`Last-Modified` validator are kept, and the transport sends
+    them back in :code:`If-None-Match` and :code:`If-Modified-Since` headers. A 304 (Not Modified) answer then
+    returns the cached body and restarts its freshness period without the body being downloaded again.
+
+    """
+    def __init__(self, ttls=None):
+        self.ttls = dict(CACHE_TTLS)
+
+        if ttls is not None:
+            self.ttls.update(ttls)
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        self._stats_lock = threading.Lock()
+
+    def lookup(self, url, params=None):
+        r"""
+        Returns the cached response for a request, or None if it is not cached or has expired.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+        params : dict, default None
+            The query parameters of the request.
+
+        Returns
+        -------
+        requests.Response, None
+
+        """
+        return self.check(url, params)[0]
+
+    def conditional_headers(self, url, params=None):
+        r"""
+        Returns the headers that ask the server to answer with 304 (Not Modified) if an expired cached response is
+        unchanged, or None if there is no such response.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+        params : dict, default None
+            The query parameters of the request.
+
+        Returns
+        -------
+        dict, None
+
+        """
+        entry = self._load(cache_key(url, params))
+
+        if entry is None:
+            return None
+
+        return _conditional_headers(entry)
+
+    def check(self, url, params=None):
+        r"""
+        Looks a request up in the cache once, returning either the cached response or the headers to revalidate an
+        expired one with.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+        params : dict, default None
+            The query parameters of the request.
+
+        Returns
+        -------
+        tuple
+            The cached response, or None if it is not cached or has expired, and the headers returned by
+            :code:`conditional_headers` for an expired response, or None.
+
+        """
+        key = cache_key(url, params)
+        entry = self._load(key)
+        headers = None
+
+        if entry is not None and _expired(entry):
+            headers = _conditional_headers(entry)
+
+            if headers is None:
+                self._delete(key)
+
+            entry = None
+
+        with self._stats_lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if entry is None:
+            return None, headers
+
+        return _entry_response(entry), None
+
+    def store(self, url, params, r):
+        r"""
+        Caches a successful response for as long as the freshness policy allows, or refreshes the cached response
+        when the server answered a conditional request with 304 (Not Modified).
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+        params : dict
+            The query parameters of the request.
+        r : requests.Response
+            The response.
+
+        Returns
+        -------
+        requests.Response
+            The cached response if the server answered 304 (Not Modified), otherwise :code:`r`.
+
+        """
+        if r.status_code not in (200, 304):
+            return r
+
+        key = cache_key(url, params)
+        ttl = self.ttl(url, params)
+        expires = None if ttl is None else time.time() + ttl
+
+        if r.status_code == 304:
+            entry = self._load(key)
+
+            if entry is None:
+                return r
+
+            headers = CaseInsensitiveDict(entry.headers)
+            headers.update(r.headers)
+            entry = entry._replace(headers=_stored_headers(headers), expires=expires)
+
+            self._save(key, entry)
+
+            with self._stats_lock:
+                self.revalidated += 1
+
+            # The 304 response carries the current rate limit headers.
+            return build_response(url=entry.url,
+                                  status_code=entry.status_code,
+                                  reason=entry.reason,
+                                  headers=headers,
+                                  content=entry.content)
+
+        if ttl == 0:
+            return r
+
+        entry = CacheEntry(url=r.url,
+                           status_code=r.status_code,
+                           reason=r.reason,
+                           headers=_stored_headers(r.headers),
+                           content=r.content,
+                           expires=expires)
+
+        self._save(key, entry)
+
+        return r
+
+    def ttl(self, url, params=None):
+        r"""
+        Returns the number of seconds the response to a request stays fresh, or None if it never expires.
+        """
+        parts = urlsplit(url)
+        params = params or {}
+
+        settled = _settled_ttl(parts.path, params)
+
+        if settled is not False:
+            return settled
+
+        endpoint = (parts.hostname or '') + parts.path
+        prefixes = [prefix for prefix in self.ttls if endpoint.startswith(prefix)]
+
+        if not prefixes:
+            return DEFAULT_TTL
+
+        return self.ttls[max(prefixes, key=len)]
+
+    def stats(self):
+        r"""
+        Returns the hit, miss and revalidation counters and the number of cached responses.
+
+        Returns
+        -------
+        dict
+
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'revalidated': self.revalidated, 'size': len(self)}
+
+    @abc.abstractmethod
+    def clear(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def __len__(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _load(self, key):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _save(self, key, entry):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _delete(self, key):
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+    r"""
+    Thread-safe in-memory response cache with least recently used eviction.
+
+    Parameters
+    ----------
+    maxsize : int, default 1024
+        The maximum number of responses held. The least recently used response is evicted first.
+    ttls : dict, default None
+        Mapping of host and path prefixes to the seconds a response stays fresh. Entries are merged over
+        :code:`CACHE_TTLS`.
+
+    Examples
+    --------
+    # Cache responses for a client and inspect the hit rate.
+    >>> cache = MemoryCache(maxsize=512, ttls={'api.nasa.gov/DONKI': 300})
+    >>> n = Nasa(key=key, transport=Transport(cache=cache))
+    >>> n.picture_of_the_day('2019-01-01')
+    >>> n.picture_of_the_day('2019-01-01')
+    >>> cache.stats()
+    {'hits': 1, 'misses': 1, 'revalidated': 0, 'size': 1}
+
+    """
+    def __init__(self, maxsize=1024, ttls=None):
+        if maxsize < 1:
+            raise ValueError('maxsize parameter must be at least 1.')
+
+        super(MemoryCache, self).__init__(ttls=ttls)
+
+        self.maxsize = maxsize
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def _save(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteCache(BaseCache):
+    r"""
+    Persistent response cache stored in an SQLite database, so responses are reused across runs and shared between
+    processes on the same host.
+
+    Parameters
+    ----------
+    path : str
+        Path of the database file. It is created if it does not exist.
+    max_bytes : int, default 512 * 1024 ** 2
+        The total size of compressed response bodies the cache may hold. The least recently used responses are
+        evicted first once it is exceeded.
+    ttls : dict, default None
+        Mapping of host and path prefixes to the seconds a response stays fresh. Entries are merged over
+        :code:`CACHE_TTLS`.
+    timeout : float, default 30
+        The number of seconds to wait for another process to release a lock on the database.
+
+    Notes
+    -----
+    Response bodies are compressed with zlib. The database uses write-ahead logging, so any number of threads and
+    processes can read from the cache while one of them writes, and each thread opens its own connection. Reads do
+    not write: the access times that order evictions are recorded with the next response saved, or when the cache
+    is closed.
+
+    Examples
+    --------
+    # Reuse responses downloaded by previous runs of a batch job.
+    >>> cache = SQLiteCache('~/.cache/nasapy.sqlite', max_bytes=2 * 1024 ** 3)
+    >>> n = Nasa(key=key, transport=Transport(cache=cache))
+
+    """
+    def __init__(self, path, max_bytes=512 * 1024 ** 2, ttls=None, timeout=30):
+        if max_bytes < 1:
+            raise ValueError('max_bytes parameter must be at least 1.')
+
+        super(SQLiteCache, self).__init__(ttls=ttls)
+
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+
+        self._local = threading.local()
+
+        # Access times of responses read since the last write, recorded with the next write so reads never wait
+        # for the write lock.
+        self._accessed = {}
+        self._accessed_lock = threading.Lock()
+
+        with self._transaction() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS responses ('
+                         'key TEXT PRIMARY KEY, url TEXT, status_code INTEGER, reason TEXT, headers TEXT, '
+                         'content BLOB, size INTEGER, expires REAL, accessed REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+
+            # The total size of the responses is kept up to date by triggers, so it is not summed on every write.
+            conn.execute('CREATE TABLE IF NOT EXISTS totals (size INTEGER)')
+            conn.execute('INSERT INTO totals SELECT COALESCE(SUM(size), 0) FROM responses '
+                         'WHERE NOT EXISTS (SELECT * FROM totals)')
+            conn.execute('CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses '
+                         'BEGIN UPDATE totals SET size = size + new.size; END')
+            conn.execute('CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses '
+                         'BEGIN UPDATE totals SET size = size - old.size; END')
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM responses')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def size(self):
+        r"""
+        Returns the total size in bytes of the compressed response bodies in the cache.
+        """
+        return self._connection().execute('SELECT size FROM totals').fetchone()[0]
+
+    def close(self):
+        if self._accessed:
+            with self._transaction() as conn:
+                self._record_accessed(conn)
+
+        conn = getattr(self._local, 'conn', None)
+
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _load(self, key):
+        conn = self._connection()
+        row = conn.execute('SELECT url, status_code, reason, headers, content, expires FROM responses WHERE key = ?',
+                           (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        with self._accessed_lock:
+            self._accessed[key] = time.time()
+
+        url, status_code, reason, headers, content, expires = row
+
+        return CacheEntry(url=url,
+                          status_code=status_code,
+                          reason=reason,
+                          headers=json.loads(headers),
+                          content=zlib.decompress(content),
+                          expires=expires)
+
+    def _save(self, key, entry):
+        content = zlib.compress(entry.content)
+
+        if len(content) > self.max_bytes:
+            return
+
+        with self._transaction() as conn:
+            # The old response is deleted rather than replaced so the delete trigger updates the total size.
+            conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            conn.execute('INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (key, entry.url, entry.status_code, entry.reason, json.dumps(entry.headers), content,
+                          len(content), entry.expires, time.time()))
+            self._record_accessed(conn)
+            self._evict(conn)
+
+    def _delete(self, key):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def _record_accessed(self, conn):
+        with self._accessed_lock:
+            accessed, self._accessed = self._accessed, {}
+
+        conn.executemany('UPDATE responses SET accessed = ? WHERE key = ? AND accessed < ?',
+                         [(when, key, when) for key, when in accessed.items()])
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT size FROM totals').fetchone()[0]
+
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+
+        # Expired responses are kept for revalidation while there is room, but are the first to go.
+        for key, size in conn.execute('SELECT key, size FROM responses '
+                                      'ORDER BY expires IS NOT NULL AND expires <= ? DESC, accessed',
+                                      (time.time(),)):
+            if total <= self.max_bytes:
+                break
+
+            evicted.append((key,))
+            total -= size
+
+        conn.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+
+        # Connections cannot be shared with a forked child process.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+
+        return conn
+
+    def _transaction(self):
+        return Transaction(self._connection())
+
+
+def _entry_response(entry):
+    return build_response(url=entry.url,
+                          status_code=entry.status_code,
+                          reason=entry.reason,
+                          headers=entry.headers,
+                          content=entry.content)
+
+
+def _expired(entry):
+    return entry.expires is not None and entry.expires <= time.time()
+
+
+def _conditional_headers(entry):
+    headers = {}
+    validators = _validators(entry)
+
+    if 'ETag' in validators:
+        headers['If-None-Match'] = validators['ETag']
+
+    if 'Last-Modified' in validators:
+        headers['If-Modified-Since'] = validators['Last-Modified']
+
+    return headers or None
+
+
+def _validators(entry):
+    headers = CaseInsensitiveDict(entry.headers)
+
+    return {name: headers[name] for name in ('ETag', 'Last-Modified') if name in headers}
+
+
+def _stored_headers(headers):
+    headers = CaseInsensitiveDict(headers)
+
+    for name in UNCACHED_HEADERS:
+        headers.pop(name, None)
+
+    return dict(headers)
+
+
+def _settled_ttl(path, params):
+    if path.startswith('/planetary/apod'):
+        if _days_ago(params.get('date')) >= SETTLED_DAYS['apod']:
+            return None
+
+    elif path.startswith('/EPIC/api/') and '/date/' in path:
+        if _days_ago(path.rsplit('/date/', 1)[1]) >= SETTLED_DAYS['epic']:
+            return None
+
+    elif path.startswith('/DONKI/'):
+        if _days_ago(params.get('endDate')) >= SETTLED_DAYS['donki']:
+            return 86400
+
+    return False
+
+
+def _days_ago(date):
+    if not isinstance(date, str):
+        return -1
+
+    try:
+        date = datetime.datetime.strptime(date[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return -1
+
+    return (datetime.datetime.now(datetime.timezone.utc).date() - date).days
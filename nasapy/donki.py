@@ -0,0 +1,260 @@
+# encoding=utf-8
+
+"""
+Local storage of records from the Space Weather Database of Notifications, Knowledge, Information (DONKI), kept up to
+date by incremental syncs.
+
+"""
+
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+from nasapy.sqlite import Transaction
+
+
+#: The DONKI event types that can be synced, mapped to the :code:`Nasa` method requesting each of them.
+DONKI_EVENT_TYPES = {
+    'CMEAnalysis': 'coronal_mass_ejection',
+    'GST': 'geomagnetic_storm',
+    'IPS': 'interplantary_shock',
+    'FLR': 'solar_flare',
+    'SEP': 'solar_energetic_particle',
+    'MPC': 'magnetopause_crossing',
+    'RBE': 'radiation_belt_enhancement',
+    'HSS': 'hight_speed_stream',
+    'WSAEnlilSimulations': 'wsa_enlil_simulation'
+}
+
+#: An event returned by :code:`Nasa.donki_all`. :code:`time` is the event time as returned by the API, such as
+#: '2019-08-31T12:00Z', taken from the field of the event type that dates its records, and :code:`record` is the
+#: record itself.
+DonkiEvent = namedtuple('DonkiEvent', ['time', 'event_type', 'record'])
+
+# The ID fields and the time field of the records of each DONKI endpoint, used to remove duplicates and order the
+# records. CME analyses have no ID of their own, and are identified by their CME, catalog and time, so a revised
+# analysis replaces the previous one.
+_DONKI_FIELDS = {
+    'CMEAnalysis': (('associatedCMEID', 'catalog', 'time21_5'), 'time21_5'),
+    'GST': (('gstID',), 'startTime'),
+    'IPS': (('activityID',), 'eventTime'),
+    'FLR': (('flrID',), 'beginTime'),
+    'SEP': (('sepID',), 'eventTime'),
+    'MPC': (('mpcID',), 'eventTime'),
+    'RBE': (('rbeID',), 'eventTime'),
+    'HSS': (('hssID',), 'eventTime'),
+    'WSAEnlilSimulations': (('simulationID',), 'modelCompletionTime')
+}
+
+
+class DonkiStore(object):
+    r"""
+    Persistent store of DONKI records in an SQLite database, holding the records of each event type by ID along with
+    the time of the latest event synced.
+
+    Parameters
+    ----------
+    path : str
+        Path of the database file. It is created if it does not exist.
+    timeout : float, default 30
+        The number of seconds to wait for another process to release a lock on the database.
+
+    Notes
+    -----
+    Each thread opens its own connection, and the database uses write-ahead logging so records can be read while a
+    sync writes.
+
+    Examples
+    --------
+    >>> store = DonkiStore('~/.cache/donki.sqlite')
+    >>> n = Nasa(key=key)
+    # The first sync downloads every flare and storm since 2010, later ones only the most recent events.
+    >>> n.donki_sync(store, event_types=['FLR', 'GST'], start_date='2010-01-01')
+    >>> n.donki_sync(store, event_types=['FLR', 'GST'])
+    >>> store.records('FLR', start='2019-05-01', end='2019-05-31')
+
+    """
+    def __init__(self, path, timeout=30):
+        self.path = os.path.expanduser(path)
+        self.timeout = timeout
+
+        self._local = threading.local()
+
+        with self._transaction() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS events ('
+                         'event_type TEXT, id TEXT, time TEXT, record TEXT, PRIMARY KEY (event_type, id))')
+            conn.execute('CREATE INDEX IF NOT EXISTS events_time ON events (event_type, time)')
+            conn.execute('CREATE TABLE IF NOT EXISTS marks (event_type TEXT PRIMARY KEY, time TEXT)')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def upsert(self, event_type, records):
+        r"""
+        Inserts records of an event type, replacing stored records with the same ID, and advances the event type's
+        high-water mark to the latest of their times.
+
+        Parameters
+        ----------
+        event_type : str
+            One of the keys of :code:`DONKI_EVENT_TYPES`.
+        records : list
+            Records returned by the DONKI endpoint of the event type. An empty dictionary, returned by the API when
+            there are no events, is accepted as no records.
+
+        Raises
+        ------
+        ValueError
+            Raised if :code:`event_type` is not one of the keys of :code:`DONKI_EVENT_TYPES`.
+
+        Returns
+        -------
+        int
+            The number of records that were new or differed from the stored ones.
+
+        """
+        time_field = _fields(event_type)[1]
+        rows = []
+
+        for record in records or []:
+            dump = json.dumps(record, sort_keys=True)
+
+            # Records without an ID are identified by their content.
+            rows.append((event_type, _record_id(event_type, record) or dump, record.get(time_field), dump))
+
+        times = [row[2] for row in rows if row[2] is not None]
+
+        with self._transaction() as conn:
+            changes = conn.total_changes
+            # Upserts are spelled out as an insert and an update, as ON CONFLICT needs SQLite 3.24.
+            conn.executemany('INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?)', rows)
+            conn.executemany('UPDATE events SET time = ?, record = ? WHERE event_type = ? AND id = ? AND record != ?',
+                             [(time, dump, event_type, event_id, dump) for _, event_id, time, dump in rows])
+            changed = conn.total_changes - changes
+
+            if times:
+                conn.execute('INSERT OR IGNORE INTO marks VALUES (?, ?)', (event_type, max(times)))
+                conn.execute('UPDATE marks SET time = ? WHERE event_type = ? AND time < ?',
+                             (max(times), event_type, max(times)))
+
+        return changed
+
+    def high_water_mark(self, event_type):
+        r"""
+        Returns the time of the latest event synced for an event type, or None if none has been.
+
+        Parameters
+        ----------
+        event_type : str
+            One of the keys of :code:`DONKI_EVENT_TYPES`.
+
+        Returns
+        -------
+        str, None
+            The event time as returned by the API, such as '2019-08-31T12:00Z'.
+
+        """
+        _fields(event_type)
+
+        row = self._connection().execute('SELECT time FROM marks WHERE event_type = ?', (event_type,)).fetchone()
+
+        return row[0] if row is not None else None
+
+    def records(self, event_type, start=None, end=None):
+        r"""
+        Returns the stored records of an event type, ordered by event time.
+
+        Parameters
+        ----------
+        event_type : str
+            One of the keys of :code:`DONKI_EVENT_TYPES`.
+        start : str, default None
+            The earliest event date in YYYY-MM-DD format. If None, the range is open at the start.
+        end : str, default None
+            The latest event date in YYYY-MM-DD format, including the whole day. If None, the range is open at the
+            end.
+
+        Returns
+        -------
+        list
+            The records as returned by the API.
+
+        """
+        _fields(event_type)
+
+        query = 'SELECT record FROM events WHERE event_type = ?'
+        params = [event_type]
+
+        if start is not None:
+            query += ' AND time >= ?'
+            params.append(start)
+
+        if end is not None:
+            query += ' AND time < ?'
+            params.append(_next_day(end))
+
+        rows = self._connection().execute(query + ' ORDER BY time, rowid', params)
+
+        return [json.loads(record) for record, in rows]
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM events')
+            conn.execute('DELETE FROM marks')
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+
+        # Connections cannot be shared with a forked child process.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+
+        return conn
+
+    def _transaction(self):
+        return Transaction(self._connection())
+
+
+def _fields(event_type):
+    if event_type not in _DONKI_FIELDS:
+        raise ValueError('event_type parameter must be one of {types}.'.format(types=', '.join(_DONKI_FIELDS)))
+
+    return _DONKI_FIELDS[event_type]
+
+
+def _events(event_types, results):
+    events = [DonkiEvent(time=record.get(_DONKI_FIELDS[event_type][1]), event_type=event_type, record=record)
+              for event_type, result in zip(event_types, results) if result
+              for record in result]
+
+    # Events are ordered by time, and those of the same time in the order of the event types.
+    return sorted(events, key=lambda event: event.time or '')
+
+
+def _record_id(event_type, record):
+    # Returns the ID of a record, or None if it has none of its event type's ID fields.
+    values = [record.get(field) for field in _DONKI_FIELDS[event_type][0]]
+
+    if all(value is None for value in values):
+        return None
+
+    return '/'.join('' if value is None else str(value) for value in values)
+
+
+def _next_day(date):
+    return (datetime.datetime.strptime(date, '%Y-%m-%d') + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
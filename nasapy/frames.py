@@ -0,0 +1,328 @@
+# encoding=utf-8
+
+"""
+Conversion of nested API responses into flat, typed pandas DataFrames.
+
+"""
+
+
+import numpy as np
+from pandas import Categorical, DataFrame, Series, to_datetime, to_numeric
+
+from nasapy.donki import _DONKI_FIELDS
+
+
+#: Fields of a NeoWs near earth object copied to every row of its close approaches.
+NEO_FIELDS = ('id', 'neo_reference_id', 'name', 'nasa_jpl_url', 'absolute_magnitude_h',
+              'is_potentially_hazardous_asteroid', 'is_sentry_object')
+
+_DIAMETER_UNITS = ('kilometers', 'meters', 'miles', 'feet')
+_VELOCITY_UNITS = ('kilometers_per_second', 'kilometers_per_hour', 'miles_per_hour')
+_DISTANCE_UNITS = ('astronomical', 'lunar', 'kilometers', 'miles')
+
+#: Fields of DONKI records holding one of a small set of labels, stored as categorical columns.
+DONKI_CATEGORIES = ('catalog', 'classType', 'dataLevel', 'displayName', 'featureCode', 'imageType', 'instrument',
+                    'location', 'measurementTechnique', 'source', 'type')
+
+# Fields of DONKI records holding whole numbers, stored as nullable integer columns as they are often missing.
+_DONKI_INTEGERS = ('activeRegionNum',)
+
+# The Kp index estimates of WSA-Enlil simulations, for the range of clock angles in their names.
+_KP_FIELDS = ('kp_18', 'kp_90', 'kp_135', 'kp_180')
+
+# The format of nearly every DONKI timestamp. Others are parsed separately.
+_DONKI_TIME_FORMAT = '%Y-%m-%dT%H:%MZ'
+
+
+def neo_frame(data):
+    r"""
+    Flattens near earth objects returned by the NeoWs endpoints into a DataFrame with one row per close approach.
+
+    Parameters
+    ----------
+    data : dict, list
+        A response from :code:`Nasa.asteroid_feed`, :code:`Nasa.get_asteroids` or the browse endpoint, or a list of
+        near earth objects such as the ones yielded by :code:`Nasa.browse_asteroids`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The :code:`NEO_FIELDS` of each object, its estimated diameters as
+        :code:`estimated_diameter_<unit>_<min|max>` columns, and for each close approach the
+        :code:`close_approach_date` timestamp, :code:`orbiting_body`, :code:`relative_velocity_<unit>` and
+        :code:`miss_distance_<unit>` columns. Velocities, distances and diameters are floats. Objects without close
+        approaches are kept as a single row with missing approach columns.
+
+    Examples
+    --------
+    >>> n = Nasa(key=key)
+    >>> neo_frame(n.asteroid_feed(start_date='2019-01-01', end_date='2019-03-31'))
+
+    """
+    neos = _neo_list(data)
+    approaches = [neo.get('close_approach_data') or [{}] for neo in neos]
+    counts = [len(a) for a in approaches]
+    approaches = [approach for group in approaches for approach in group]
+
+    columns = {}
+
+    for field in NEO_FIELDS:
+        columns[field] = _repeat([neo.get(field) for neo in neos], counts)
+
+    for unit in _DIAMETER_UNITS:
+        for bound in ('min', 'max'):
+            values = [_nested(neo, 'estimated_diameter', unit, 'estimated_diameter_' + bound) for neo in neos]
+            columns['estimated_diameter_{unit}_{bound}'.format(unit=unit, bound=bound)] = \
+                _floats(_repeat(values, counts))
+
+    columns['close_approach_date'] = to_datetime(
+        to_numeric(np.array([a.get('epoch_date_close_approach') for a in approaches], dtype=object),
+                   errors='coerce'),
+        unit='ms')
+    columns['orbiting_body'] = np.array([a.get('orbiting_body') for a in approaches], dtype=object)
+
+    for unit in _VELOCITY_UNITS:
+        columns['relative_velocity_' + unit] = _floats([_nested(a, 'relative_velocity', unit) for a in approaches])
+
+    for unit in _DISTANCE_UNITS:
+        columns['miss_distance_' + unit] = _floats([_nested(a, 'miss_distance', unit) for a in approaches])
+
+    frame = DataFrame(columns)
+    frame['absolute_magnitude_h'] = to_numeric(frame['absolute_magnitude_h'], errors='coerce')
+
+    for field in ('is_potentially_hazardous_asteroid', 'is_sentry_object'):
+        if frame[field].notna().all():
+            frame[field] = frame[field].astype(bool)
+
+    return frame
+
+
+def _neo_list(data):
+    if isinstance(data, list):
+        return data
+
+    neos = data.get('near_earth_objects')
+
+    if neos is None:
+        return [data]
+
+    if isinstance(neos, dict):
+        return [neo for date in sorted(neos) for neo in neos[date]]
+
+    return neos
+
+
+def _repeat(values, counts):
+    return np.repeat(np.array(values, dtype=object), counts)
+
+
+def _nested(d, *keys):
+    for key in keys:
+        if not isinstance(d, dict):
+            return None
+
+        d = d.get(key)
+
+    return d
+
+
+def donki_frames(event_type, data):
+    r"""
+    Normalizes DONKI records into an events table and one related table for each field holding a list of objects,
+    such as :code:`instruments`, :code:`linkedEvents` or the :code:`allKpIndex` readings of geomagnetic storms.
+
+    Parameters
+    ----------
+    event_type : str
+        The key of :code:`DONKI_EVENT_TYPES` of the records, such as 'FLR' or 'GST'.
+    data : list, dict
+        Records returned by the DONKI method of the event type. An empty dictionary, returned by the API when there
+        are no events, gives an empty events table.
+
+    Raises
+    ------
+    ValueError
+        Raised if :code:`event_type` is not one of the keys of :code:`DONKI_EVENT_TYPES`.
+
+    Returns
+    -------
+    dict
+        DataFrames keyed by 'events' and by the name of each list field. The events table has a column for each
+        field of the records other than the lists of objects. Each related table has a row for each element of the
+        list, its first column being the event's ID field, such as :code:`flrID` or :code:`gstID`, and the others
+        the element's fields. Fields ending in 'Time', and :code:`time21_5`, are parsed into UTC timestamps, and the
+        :code:`DONKI_CATEGORIES` fields are categorical. Active region numbers are nullable integers.
+
+    Examples
+    --------
+    >>> n = Nasa(key=key)
+    >>> frames = donki_frames('GST', n.geomagnetic_storm(start_date='2017-01-01', end_date='2017-12-31'))
+    >>> frames['events']
+    # One row per Kp reading, joined to the storms on gstID.
+    >>> frames['allKpIndex']
+
+    """
+    if event_type not in _DONKI_FIELDS:
+        raise ValueError('event_type parameter must be one of {types}.'.format(types=', '.join(_DONKI_FIELDS)))
+
+    records = data or []
+    id_field = _DONKI_FIELDS[event_type][0][0]
+
+    fields = _keys(records)
+    nested = [field for field in fields if _is_table(records, field)]
+
+    frames = {'events': _donki_table({field: [r.get(field) for r in records]
+                                      for field in fields if field not in nested})}
+
+    for field in nested:
+        children = [r.get(field) or [] for r in records]
+        counts = [len(c) for c in children]
+        children = [child for group in children for child in group]
+
+        columns = {id_field: _repeat([r.get(id_field) for r in records], counts)}
+        columns.update((child_field, [c.get(child_field) for c in children]) for child_field in _keys(children))
+
+        frames[field] = _donki_table(columns)
+
+    return frames
+
+
+def wsa_enlil_arrays(data):
+    r"""
+    Parses WSA-Enlil simulations into flat NumPy arrays of the simulations, their CME inputs and their predicted
+    impacts, for vectorized statistics across ensembles of simulations.
+
+    Parameters
+    ----------
+    data : list, dict
+        Simulations returned by :code:`Nasa.wsa_enlil_simulation`. An empty dictionary, returned by the API when
+        there are no simulations, gives empty arrays.
+
+    Returns
+    -------
+    dict
+        Arrays keyed by name. Times are :code:`datetime64[ns]` values in UTC, with NaT where the API has no time, and
+        numbers are floats with NaN where it has no value.
+
+        * :code:`simulation_id`, :code:`model_completion_time`, :code:`estimated_shock_arrival_time`,
+          :code:`estimated_duration`, :code:`au`, :code:`kp_18`, :code:`kp_90`, :code:`kp_135`, :code:`kp_180`
+          and :code:`is_earth_gb` have one element per simulation.
+        * :code:`cme_simulation`, :code:`cme_id`, :code:`cme_start_time`, :code:`cme_latitude`,
+          :code:`cme_longitude`, :code:`cme_speed` and :code:`cme_half_angle` have one element per CME input, and
+          :code:`impact_simulation`, :code:`impact_location`, :code:`impact_arrival_time` and
+          :code:`impact_glancing_blow` one element per impact. :code:`cme_simulation` and
+          :code:`impact_simulation` are positions in the simulation arrays.
+        * :code:`impact_location` holds integer codes into the location names in :code:`locations`.
+
+    Examples
+    --------
+    >>> n = Nasa(key=key)
+    >>> arrays = wsa_enlil_arrays(n.wsa_enlil_simulation(start_date='2017-01-01', end_date='2017-12-31'))
+    # The earliest predicted arrival at Earth of each simulation.
+    >>> earth = arrays['impact_location'] == list(arrays['locations']).index('Earth')
+    >>> arrival = np.full(len(arrays['simulation_id']), np.datetime64('NaT'), dtype='datetime64[ns]')
+    >>> np.fmin.at(arrival, arrays['impact_simulation'][earth], arrays['impact_arrival_time'][earth])
+    # The mean of the largest Kp estimates.
+    >>> np.nanmean(arrays['kp_180'])
+
+    """
+    simulations = data or []
+
+    cmes = [s.get('cmeInputs') or [] for s in simulations]
+    cme_counts = [len(c) for c in cmes]
+    cmes = [cme for group in cmes for cme in group]
+
+    impacts = [s.get('impactList') or [] for s in simulations]
+    impact_counts = [len(i) for i in impacts]
+    impacts = [impact for group in impacts for impact in group]
+
+    locations = Categorical([impact.get('location') for impact in impacts])
+
+    arrays = {
+        'simulation_id': _objects([s.get('simulationID') for s in simulations]),
+        'model_completion_time': _epochs([s.get('modelCompletionTime') for s in simulations]),
+        'estimated_shock_arrival_time': _epochs([s.get('estimatedShockArrivalTime') for s in simulations]),
+        'estimated_duration': _floats([s.get('estimatedDuration') for s in simulations]),
+        'au': _floats([s.get('au') for s in simulations])
+    }
+
+    for field in _KP_FIELDS:
+        arrays[field] = _floats([s.get(field) for s in simulations])
+
+    arrays.update({
+        'is_earth_gb': np.array([s.get('isEarthGB') is True for s in simulations], dtype=bool),
+        'cme_simulation': np.repeat(np.arange(len(simulations)), cme_counts),
+        'cme_id': _objects([cme.get('cmeid') for cme in cmes]),
+        'cme_start_time': _epochs([cme.get('cmeStartTime') for cme in cmes]),
+        'cme_latitude': _floats([cme.get('latitude') for cme in cmes]),
+        'cme_longitude': _floats([cme.get('longitude') for cme in cmes]),
+        'cme_speed': _floats([cme.get('speed') for cme in cmes]),
+        'cme_half_angle': _floats([cme.get('halfAngle') for cme in cmes]),
+        'impact_simulation': np.repeat(np.arange(len(simulations)), impact_counts),
+        'impact_location': np.asarray(locations.codes),
+        'impact_arrival_time': _epochs([impact.get('arrivalTime') for impact in impacts]),
+        'impact_glancing_blow': np.array([impact.get('isGlancingBlow') is True for impact in impacts], dtype=bool),
+        'locations': np.asarray(locations.categories, dtype=object)
+    })
+
+    return arrays
+
+
+def _keys(records):
+    # The keys of a list of dictionaries, in order of first appearance.
+    fields = {}
+
+    for record in records:
+        fields.update(dict.fromkeys(record))
+
+    return list(fields)
+
+
+def _is_table(records, field):
+    values = [r.get(field) for r in records if r.get(field)]
+
+    return bool(values) and all(isinstance(v, list) and all(isinstance(e, dict) for e in v) for v in values)
+
+
+def _donki_table(columns):
+    frame = DataFrame({field: _objects(values) for field, values in columns.items()})
+
+    for field in frame.columns:
+        if field.lower().endswith('time') or field == 'time21_5':
+            frame[field] = _donki_times(frame[field])
+        elif field in DONKI_CATEGORIES:
+            frame[field] = Categorical(frame[field])
+        elif field in _DONKI_INTEGERS:
+            frame[field] = to_numeric(frame[field], errors='coerce').astype('Int64')
+        else:
+            frame[field] = frame[field].infer_objects()
+
+    return frame
+
+
+def _objects(values):
+    # Unlike np.array, keeps list values as elements rather than adding a dimension.
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+
+    return array
+
+
+def _floats(values):
+    return to_numeric(_objects(values), errors='coerce').astype(float)
+
+
+def _epochs(values):
+    times = _donki_times(Series(_objects(values)))
+
+    return times.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+
+
+def _donki_times(values):
+    times = to_datetime(values, format=_DONKI_TIME_FORMAT, utc=True, errors='coerce')
+    other = times.isna() & values.notna()
+
+    if other.any():
+        times[other] = to_datetime(values[other], utc=True, errors='coerce')
+
+    return times
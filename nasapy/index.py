@@ -0,0 +1,539 @@
+# encoding=utf-8
+
+"""
+In-process indexes over fetched API results, answering repeated queries without going back to the network.
+
+"""
+
+
+import datetime
+from collections import deque
+
+import numpy as np
+from pandas import Timedelta, concat, to_datetime
+
+from nasapy.donki import DonkiEvent, _DONKI_FIELDS, _record_id
+from nasapy.frames import neo_frame, _DISTANCE_UNITS, _floats
+
+
+# The fields a CME analysis must have to be a complete entry.
+_CME_COMPLETE_FIELDS = ('time21_5', 'latitude', 'longitude', 'halfAngle', 'speed', 'type')
+
+
+class CloseApproachIndex(object):
+    r"""
+    Index of NeoWs close approaches supporting range queries on approach date and miss distance and lookups by
+    object.
+
+    Parameters
+    ----------
+    data : dict, list, default None
+        NeoWs results to index, in any form accepted by :code:`add`.
+
+    Attributes
+    ----------
+    frame : pandas.DataFrame
+        Every indexed close approach, as returned by :code:`neo_frame`, ordered by approach date.
+
+    Notes
+    -----
+    Approach dates and miss distances are kept in sorted arrays, so range queries are answered with binary searches
+    in :math:`O(\log n)` plus the size of the result, and approaches are grouped in a hash table by
+    :code:`neo_reference_id`. Adding results rebuilds the arrays, so batching results into fewer :code:`add` calls is
+    faster.
+
+    Examples
+    --------
+    >>> n = Nasa(key=key)
+    >>> index = CloseApproachIndex(n.asteroid_feed(start_date='2019-01-01', end_date='2019-12-31'))
+    # Objects passing within 5 lunar distances in March 2019.
+    >>> index.within(5, start='2019-03-01', end='2019-03-31')
+    # Every indexed approach of one object.
+    >>> index.approaches('3542519')
+
+    """
+    def __init__(self, data=None):
+        self.frame = neo_frame([])
+
+        self._dates = np.array([], dtype='int64')
+        self._distances = {}
+        self._by_id = {}
+
+        if data is not None:
+            self.add(data)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def add(self, data):
+        r"""
+        Adds NeoWs results to the index. Approaches already indexed, identified by object, date and orbiting body,
+        are replaced.
+
+        Parameters
+        ----------
+        data : dict, list
+            A response from :code:`Nasa.asteroid_feed`, :code:`Nasa.get_asteroids` or the browse endpoint, a list
+            of near earth objects, or a DataFrame returned by :code:`neo_frame`.
+
+        """
+        frame = data if hasattr(data, 'columns') else neo_frame(data)
+
+        if len(self.frame):
+            frame = concat([self.frame, frame], ignore_index=True)
+
+        frame = frame.drop_duplicates(subset=['neo_reference_id', 'close_approach_date', 'orbiting_body'],
+                                      keep='last')
+        frame = frame.sort_values('close_approach_date', kind='mergesort', na_position='last')
+
+        self.frame = frame.reset_index(drop=True)
+        self._build()
+
+    def between(self, start=None, end=None):
+        r"""
+        Returns the approaches between two dates.
+
+        Parameters
+        ----------
+        start : str, datetime, default None
+            The earliest approach date. If None, the range is open at the start.
+        end : str, datetime, default None
+            The latest approach date. A date given as a YYYY-MM-DD string includes the whole day. If None, the
+            range is open at the end.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The matching approaches, ordered by approach date.
+
+        """
+        lo, hi = self._date_range(start, end)
+
+        return self.frame.iloc[lo:hi]
+
+    def within(self, distance, unit='lunar', start=None, end=None):
+        r"""
+        Returns the approaches that pass within a miss distance, optionally between two dates.
+
+        Parameters
+        ----------
+        distance : float
+            The largest miss distance.
+        unit : str, default 'lunar'
+            The unit of :code:`distance`, one of 'astronomical', 'lunar', 'kilometers' or 'miles'.
+        start : str, datetime, default None
+            The earliest approach date.
+        end : str, datetime, default None
+            The latest approach date. A date given as a YYYY-MM-DD string includes the whole day.
+
+        Raises
+        ------
+        ValueError
+            Raised if :code:`unit` is not one of the supported units.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The matching approaches, ordered by approach date.
+
+        """
+        if unit not in _DISTANCE_UNITS:
+            raise ValueError("unit parameter must be one of 'astronomical', 'lunar', 'kilometers' or 'miles'.")
+
+        order, distances = self._distances[unit]
+        rows = order[:np.searchsorted(distances, distance, side='right')]
+
+        if start is not None or end is not None:
+            lo_date, hi_date = self._date_range(start, end)
+
+            # Rows are positions in the date-sorted frame, so the date range is a bound on the row number.
+            rows = rows[(rows >= lo_date) & (rows < hi_date)]
+
+        return self.frame.iloc[np.sort(rows)]
+
+    def approaches(self, neo_reference_id):
+        r"""
+        Returns every indexed approach of an object.
+
+        Parameters
+        ----------
+        neo_reference_id : str, int
+            The object's NeoWs reference ID.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The object's approaches, ordered by approach date. Empty if the object is not indexed.
+
+        """
+        return self.frame.iloc[self._by_id.get(str(neo_reference_id), [])]
+
+    def _build(self):
+        dates = self.frame['close_approach_date']
+        dated = int(dates.notna().sum())
+
+        # Undated rows are sorted to the end of the frame and left out of the date array.
+        self._dates = dates.values[:dated].astype('datetime64[ns]').astype('int64')
+
+        # For each unit, the row numbers of the approaches sorted by miss distance and the sorted distances.
+        self._distances = {}
+
+        for unit in _DISTANCE_UNITS:
+            values = self.frame['miss_distance_' + unit].values
+            valid = np.flatnonzero(~np.isnan(values))
+            order = valid[np.argsort(values[valid], kind='mergesort')]
+            self._distances[unit] = order, values[order]
+
+        self._by_id = {str(key): rows for key, rows in self.frame.groupby('neo_reference_id').indices.items()}
+
+    def _date_range(self, start, end):
+        lo, hi = 0, len(self._dates)
+
+        if start is not None:
+            lo = np.searchsorted(self._dates, _timestamp(start), side='left')
+
+        if end is not None:
+            if isinstance(end, str) and len(end) == 10:
+                hi = np.searchsorted(self._dates, _timestamp(end) + Timedelta(days=1).value, side='left')
+            else:
+                hi = np.searchsorted(self._dates, _timestamp(end), side='right')
+
+        return lo, hi
+
+
+class CMEAnalysisIndex(object):
+    r"""
+    CME analyses held in typed arrays, answering the threshold filters of :code:`Nasa.coronal_mass_ejection` without
+    another request.
+
+    Parameters
+    ----------
+    records : list
+        Analyses returned by :code:`Nasa.coronal_mass_ejection` with its least restrictive parameters,
+        :code:`accurate_only=False` and :code:`complete_entry=False`. An empty dictionary, returned by the API when
+        there are no analyses, is accepted as no records.
+
+    Attributes
+    ----------
+    records : list
+        The indexed analyses.
+
+    Examples
+    --------
+    >>> n = Nasa(key=key)
+    >>> index = CMEAnalysisIndex(n.coronal_mass_ejection(start_date='2017-01-01', end_date='2017-12-31',
+    ...                                                  accurate_only=False, complete_entry=False))
+    >>> for speed in range(500, 2000, 100):
+    ...     print(speed, len(index.filter(speed=speed)))
+
+    """
+    def __init__(self, records):
+        self.records = list(records or [])
+
+        self._speeds = _floats([r.get('speed') for r in self.records])
+        self._half_angles = _floats([r.get('halfAngle') for r in self.records])
+        self._most_accurate = np.array([r.get('isMostAccurate') is True for r in self.records], dtype=bool)
+        self._complete = np.array([all(r.get(field) is not None for field in _CME_COMPLETE_FIELDS)
+                                   for r in self.records], dtype=bool)
+        self._catalogs = np.array([r.get('catalog') for r in self.records], dtype=object)
+
+    def __len__(self):
+        return len(self.records)
+
+    def filter(self, accurate_only=True, speed=0, complete_entry=True, half_angle=0, catalog='ALL'):
+        r"""
+        Returns the analyses matching the filters, as :code:`Nasa.coronal_mass_ejection` would have returned them.
+
+        Parameters
+        ----------
+        accurate_only : bool, default True
+            If True, only the most accurate analysis of each CME is returned.
+        speed : int, default 0
+            The lower limit of the speed of the CME.
+        complete_entry : bool, default True
+            If True, only analyses with a time, latitude, longitude, half angle, speed and type are returned.
+        half_angle : int, default 0
+            The lower limit of the half angle of the CME.
+        catalog : str, {'ALL', 'SWRC_CATALOG', 'JANG_ET_AL_CATALOG'}
+            Only return analyses from this catalog. Defaults to 'ALL'.
+
+        Returns
+        -------
+        list
+            The matching analyses in the order they were indexed.
+
+        """
+        mask = np.ones(len(self.records), dtype=bool)
+
+        if accurate_only:
+            mask &= self._most_accurate
+
+        if complete_entry:
+            mask &= self._complete
+
+        # Analyses without a value only pass when there is no limit, as with the API.
+        if speed:
+            mask &= self._speeds >= speed
+
+        if half_angle:
+            mask &= self._half_angles >= half_angle
+
+        if catalog != 'ALL':
+            mask &= self._catalogs == catalog
+
+        return [self.records[i] for i in np.flatnonzero(mask)]
+
+
+class DonkiGraph(object):
+    r"""
+    Graph of DONKI events connected by the :code:`linkedEvents` of their records, answering which events led to or
+    followed from an event.
+
+    Parameters
+    ----------
+    data : list, default None
+        DONKI results to add, in any form accepted by :code:`add`.
+
+    Notes
+    -----
+    Each event is a node keyed by its activity ID, such as '2017-09-06T11:53:00-FLR-001', and each link is an edge
+    directed from the earlier of the two events to the later one, so edges follow the flare, CME, shock and storm
+    chain. Events referenced in :code:`linkedEvents` but not fetched are nodes without a record. Edges are kept in
+    hash tables of forward and backward adjacency sets, so each hop of a chain query costs constant time per linked
+    event. Adding records again, for example from an overlapping sync window, replaces their links. CME analyses are
+    kept together under the CME they describe, which may have several from different catalogs and techniques.
+
+    Examples
+    --------
+    >>> n = Nasa(key=key)
+    >>> graph = DonkiGraph(n.donki_all(start_date='2017-09-01', end_date='2017-09-30'))
+    # Geomagnetic storms that followed a flare.
+    >>> graph.downstream('2017-09-06T11:53:00-FLR-001', event_type='GST')
+    # Everything that led to a storm.
+    >>> graph.upstream('2017-09-07T23:00:00-GST-001')
+    # Add the next month without rebuilding the graph.
+    >>> graph.add(n.donki_all(start_date='2017-10-01', end_date='2017-10-31'))
+
+    """
+    def __init__(self, data=None):
+        self._records = {}
+        self._types = {}
+        self._times = {}
+
+        # The analyses of each CME by their ID, so a revised analysis replaces the previous one.
+        self._analyses = {}
+
+        # The edge of each link asserted by an event's record, and the number of records asserting each edge.
+        self._links = {}
+        self._edges = {}
+
+        self._forward = {}
+        self._backward = {}
+
+        if data is not None:
+            self.add(data)
+
+    def __len__(self):
+        return len(self._types)
+
+    def __contains__(self, event_id):
+        return event_id in self._types
+
+    def add(self, data, event_type=None):
+        r"""
+        Adds DONKI records to the graph.
+
+        Parameters
+        ----------
+        data : list
+            :code:`DonkiEvent` tuples returned by :code:`Nasa.donki_all`, or records returned by a DONKI method. An
+            empty dictionary, returned by the API when there are no events, is accepted as no records.
+        event_type : str, default None
+            The key of :code:`DONKI_EVENT_TYPES` of the records. Required when :code:`data` holds records rather
+            than :code:`DonkiEvent` tuples.
+
+        Raises
+        ------
+        ValueError
+            Raised if the type of the records is not known or not one of the keys of :code:`DONKI_EVENT_TYPES`.
+
+        """
+        for item in data or []:
+            if isinstance(item, DonkiEvent):
+                self._add(item.event_type, item.record)
+            else:
+                self._add(event_type, item)
+
+    def get(self, event_id):
+        r"""
+        Returns the record of an event, or None if the event has not been fetched. For a CME known only from its
+        analyses, the most accurate analysis is returned, or the latest one if none is marked most accurate.
+
+        Parameters
+        ----------
+        event_id : str
+            The event's activity ID.
+
+        Returns
+        -------
+        dict, None
+
+        """
+        if event_id in self._records or event_id not in self._analyses:
+            return self._records.get(event_id)
+
+        analyses = self.analyses(event_id)
+        accurate = [analysis for analysis in analyses if analysis.get('isMostAccurate') is True]
+
+        return (accurate or analyses)[-1]
+
+    def analyses(self, event_id):
+        r"""
+        Returns every analysis added for a CME.
+
+        Parameters
+        ----------
+        event_id : str
+            The CME's activity ID.
+
+        Returns
+        -------
+        list
+            The analyses, ordered by :code:`time21_5`. Empty if no analysis of the CME has been added.
+
+        """
+        analyses = self._analyses.get(event_id, {}).values()
+
+        return sorted(analyses, key=lambda analysis: analysis.get('time21_5') or '')
+
+    def event_type(self, event_id):
+        r"""
+        Returns the type code of an event, such as 'FLR', 'CME' or 'GST', or None if the event is not in the graph.
+        Simulations, whose IDs carry no type code, have the type 'WSAEnlilSimulations'.
+        """
+        return self._types.get(event_id)
+
+    def downstream(self, event_id, event_type=None):
+        r"""
+        Returns the events that followed from an event through one or more links.
+
+        Parameters
+        ----------
+        event_id : str
+            The event's activity ID.
+        event_type : str, default None
+            Only return events with this type code, such as 'GST'. Chains are still followed through events of every
+            type.
+
+        Returns
+        -------
+        list
+            The activity IDs of the events, ordered by event time. Empty if the event is not in the graph.
+
+        """
+        return self._walk(event_id, self._forward, event_type)
+
+    def upstream(self, event_id, event_type=None):
+        r"""
+        Returns the events that led to an event through one or more links.
+
+        Parameters
+        ----------
+        event_id : str
+            The event's activity ID.
+        event_type : str, default None
+            Only return events with this type code, such as 'FLR'. Chains are still followed through events of every
+            type.
+
+        Returns
+        -------
+        list
+            The activity IDs of the events, ordered by event time. Empty if the event is not in the graph.
+
+        """
+        return self._walk(event_id, self._backward, event_type)
+
+    def _add(self, event_type, record):
+        if event_type not in _DONKI_FIELDS:
+            raise ValueError('event_type parameter must be one of {types}.'.format(types=', '.join(_DONKI_FIELDS)))
+
+        event_id = record.get(_DONKI_FIELDS[event_type][0][0])
+
+        if event_id is None:
+            return
+
+        # A CME analysis describes the CME it is associated with, and carries no links of its own.
+        if event_type == 'CMEAnalysis':
+            self._analyses.setdefault(event_id, {})[_record_id(event_type, record)] = record
+            self._node(event_id, event_type, record.get(_DONKI_FIELDS[event_type][1]))
+            return
+
+        self._records[event_id] = record
+        self._node(event_id, event_type, record.get(_DONKI_FIELDS[event_type][1]))
+
+        links = {linked['activityID'] for linked in record.get('linkedEvents') or [] if linked.get('activityID')}
+
+        # Simulations are linked to the CMEs they were run for.
+        links.update(cme['cmeid'] for cme in record.get('cmeInputs') or [] if cme.get('cmeid'))
+        links.discard(event_id)
+
+        old = self._links.setdefault(event_id, {})
+
+        for linked in set(old) - links:
+            self._unlink(old.pop(linked))
+
+        for linked in links - set(old):
+            self._node(linked)
+            old[linked] = self._link(event_id, linked)
+
+    def _node(self, event_id, event_type=None, time=None):
+        parts = event_id.split('-')
+
+        # Activity IDs are the event time followed by the type code and a sequence number.
+        if len(parts) >= 5:
+            self._types[event_id] = parts[-2]
+            self._times[event_id] = '-'.join(parts[:-2])[:16]
+        else:
+            self._types[event_id] = event_type or self._types.get(event_id)
+            self._times[event_id] = (time or self._times.get(event_id) or '')[:16]
+
+    def _link(self, a, b):
+        edge = (a, b) if (self._times[a], a) <= (self._times[b], b) else (b, a)
+        self._edges[edge] = self._edges.get(edge, 0) + 1
+
+        self._forward.setdefault(edge[0], set()).add(edge[1])
+        self._backward.setdefault(edge[1], set()).add(edge[0])
+
+        return edge
+
+    def _unlink(self, edge):
+        self._edges[edge] -= 1
+
+        if self._edges[edge] == 0:
+            del self._edges[edge]
+            self._forward[edge[0]].discard(edge[1])
+            self._backward[edge[1]].discard(edge[0])
+
+    def _walk(self, event_id, adjacency, event_type):
+        seen = {event_id}
+        queue = deque([event_id])
+
+        while queue:
+            for linked in adjacency.get(queue.popleft(), ()):
+                if linked not in seen:
+                    seen.add(linked)
+                    queue.append(linked)
+
+        seen.discard(event_id)
+
+        if event_type is not None:
+            seen = {linked for linked in seen if self._types[linked] == event_type}
+
+        return sorted(seen, key=lambda linked: (self._times[linked], linked))
+
+
+def _timestamp(value):
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+
+    return to_datetime(value).value
@@ -0,0 +1,369 @@
+# encoding=utf-8
+
+"""
+Client-side rate limiting driven by the :code:`X-RateLimit-Limit` and :code:`X-RateLimit-Remaining` headers
+returned by the NASA API.
+
+"""
+
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+#: Requests per second and burst size for hosts that do not report their limits in response headers.
+HOST_LIMITS = {
+    'ssd-api.jpl.nasa.gov': (2.0, 4),
+    'images-api.nasa.gov': (5.0, 10),
+    'images-assets.nasa.gov': (5.0, 10),
+    'exoplanetarchive.ipac.caltech.edu': (1.0, 2),
+}
+
+
+class TokenBucket(object):
+    r"""
+    Thread-safe token bucket.
+
+    Parameters
+    ----------
+    rate : float
+        The number of tokens added per second.
+    capacity : float
+        The maximum number of tokens the bucket holds, which is the largest burst of requests allowed.
+
+    Attributes
+    ----------
+    rate : float
+        The number of tokens added per second.
+    capacity : float
+        The maximum number of tokens the bucket holds.
+    tokens : float
+        The number of tokens available as of the last refill. Negative when requests are queued.
+
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        r"""
+        Takes tokens from the bucket, going into debt if necessary.
+
+        Parameters
+        ----------
+        tokens : int, default 1
+            The number of tokens to take.
+
+        Returns
+        -------
+        float
+            The number of seconds the caller must wait before using the reserved tokens.
+
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= tokens
+
+            if self.tokens >= 0:
+                return 0.0
+
+            return -self.tokens / self.rate
+
+    def update(self, rate=None, capacity=None, remaining=None):
+        r"""
+        Adjusts the bucket to the limits reported by the server.
+
+        Parameters
+        ----------
+        rate : float, default None
+            New refill rate in tokens per second.
+        capacity : float, default None
+            New bucket capacity.
+        remaining : int, default None
+            The number of requests the server reports as remaining. The bucket never holds more tokens than this.
+
+        """
+        with self._lock:
+            self._refill()
+
+            if rate is not None:
+                self.rate = rate
+
+            if capacity is not None:
+                self.capacity = capacity
+                self.tokens = min(self.tokens, capacity)
+
+            if remaining is not None:
+                self.tokens = min(self.tokens, remaining)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter(object):
+    r"""
+    Paces requests so that each quota is spent evenly over its window instead of in bursts. A single instance can be
+    shared by any number of threads and asyncio tasks, and by synchronous and asynchronous transports at once.
+
+    Parameters
+    ----------
+    limit : int, default 1000
+        The hourly request limit assumed for an API key until the server reports it in the
+        :code:`X-RateLimit-Limit` header.
+    burst : int, default None
+        The largest number of requests sent back to back against an API key quota. If None, a minute's share of the
+        hourly limit is used.
+    window : int, default 3600
+        The length of the quota window in seconds.
+    host_limits : dict, default None
+        Mapping of host names to :code:`(requests per second, burst)` for hosts that do not report limits in
+        response headers. Entries are merged over :code:`HOST_LIMITS`.
+
+    Notes
+    -----
+    Requests to api.nasa.gov are limited per API key, with the InSight weather endpoint counted against its own
+    quota. Requests to other hosts listed in :code:`host_limits` are limited per host, and requests to unlisted
+    hosts are not limited.
+
+    Examples
+    --------
+    # Share one limiter between a synchronous and an asynchronous client.
+    >>> limiter = RateLimiter()
+    >>> n = Nasa(key=key, transport=Transport(rate_limiter=limiter))
+    >>> an = AsyncNasa(key=key, transport=AsyncTransport(rate_limiter=limiter))
+
+    """
+    def __init__(self, limit=1000, burst=None, window=3600, host_limits=None):
+        self.limit = limit
+        self.burst = burst
+        self.window = window
+        self.host_limits = dict(HOST_LIMITS)
+
+        if host_limits is not None:
+            self.host_limits.update(host_limits)
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url, params=None):
+        r"""
+        Blocks the calling thread until a request to :code:`url` is allowed.
+        """
+        delay = self._reserve(url, params)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, url, params=None):
+        r"""
+        Waits on the event loop until a request to :code:`url` is allowed.
+        """
+        delay = self._reserve(url, params)
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def update(self, url, params, headers):
+        r"""
+        Adjusts the bucket for a request from the rate limit headers of its response.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+        params : dict
+            The query parameters of the request.
+        headers : mapping
+            The response headers.
+
+        """
+        limit = _header_int(headers, 'X-RateLimit-Limit')
+        remaining = _header_int(headers, 'X-RateLimit-Remaining')
+
+        if limit is None and remaining is None:
+            return
+
+        bucket = self.bucket(url, params)
+
+        if bucket is None:
+            return
+
+        if limit is not None:
+            bucket.update(rate=limit / self.window, capacity=self._burst(limit), remaining=remaining)
+        else:
+            bucket.update(remaining=remaining)
+
+    def bucket(self, url, params=None):
+        r"""
+        Returns the bucket that requests to :code:`url` with :code:`params` draw from, or None if they are not
+        limited.
+        """
+        key = self._bucket_key(url, params)
+
+        if key is None:
+            return None
+
+        with self._lock:
+            if key not in self._buckets:
+                if key[0] == 'api.nasa.gov':
+                    self._buckets[key] = TokenBucket(rate=self.limit / self.window, capacity=self._burst(self.limit))
+                else:
+                    rate, burst = self.host_limits[key[0]]
+                    self._buckets[key] = TokenBucket(rate=rate, capacity=burst)
+
+            return self._buckets[key]
+
+    def _reserve(self, url, params):
+        bucket = self.bucket(url, params)
+
+        if bucket is None:
+            return 0.0
+
+        return bucket.reserve()
+
+    def _burst(self, limit):
+        if self.burst is not None:
+            return self.burst
+
+        return max(1, limit * 60 // self.window)
+
+    def _bucket_key(self, url, params):
+        parts = urlsplit(url)
+        host = parts.hostname
+
+        if host == 'api.nasa.gov':
+            if parts.path.startswith('/insight_weather'):
+                quota = 'insight'
+            else:
+                quota = 'api'
+
+            return host, quota, (params or {}).get('api_key')
+
+        if host in self.host_limits:
+            return host,
+
+        return None
+
+
+def _header_int(headers, name):
+    value = headers.get(name)
+
+    if value is None:
+        return None
+
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class KeyPool(object):
+    r"""
+    Spreads requests across several API keys according to the quota each key has remaining.
+
+    Parameters
+    ----------
+    keys : list
+        The API keys in the pool.
+    window : int, default 3600
+        The number of seconds a key is skipped for once its quota is exhausted.
+
+    Attributes
+    ----------
+    keys : list
+        The API keys in the pool.
+    remaining : dict
+        The number of requests each key has remaining, as last reported by the server and less the requests sent
+        since. None for keys that have not been used yet.
+
+    Notes
+    -----
+    Each request goes to the available key with the most requests remaining, with keys that have not been used yet
+    tried first. A key whose response reports no requests remaining, or that is answered with HTTP 429, is skipped
+    until :code:`window` seconds have passed. If every key is exhausted, the key that recovers first is used.
+
+    The transports acquire a key for each attempt they send, so a request retried after HTTP 429 moves to another
+    key, and responses served from a cache or shared with an identical request in flight are not counted.
+
+    Examples
+    --------
+    >>> n = Nasa(keys=['key-1', 'key-2', 'key-3'])
+    >>> n.key_pool.remaining
+    {'key-1': None, 'key-2': None, 'key-3': None}
+
+    """
+    def __init__(self, keys, window=3600):
+        if isinstance(keys, str) or len(keys) == 0:
+            raise ValueError('keys parameter must be a non-empty list of API keys.')
+
+        self.keys = list(keys)
+        self.window = window
+        self.remaining = {key: None for key in self.keys}
+
+        self._exhausted_until = {key: 0.0 for key in self.keys}
+        self._sent = {key: 0 for key in self.keys}
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        r"""
+        Returns the key the next request should use.
+        """
+        with self._lock:
+            now = time.monotonic()
+            available = [key for key in self.keys if self._exhausted_until[key] <= now]
+
+            if not available:
+                return min(self.keys, key=lambda key: self._exhausted_until[key])
+
+            key = max(available, key=self._priority)
+            self._sent[key] += 1
+
+            if self.remaining[key] is not None:
+                self.remaining[key] -= 1
+
+            return key
+
+    def update(self, key, headers, status_code=200):
+        r"""
+        Records the quota reported in a response to a request made with :code:`key`.
+
+        Parameters
+        ----------
+        key : str
+            The API key the request was made with.
+        headers : mapping
+            The response headers.
+        status_code : int, default 200
+            The response status code.
+
+        """
+        if key not in self.remaining:
+            return
+
+        remaining = _header_int(headers, 'X-RateLimit-Remaining')
+
+        with self._lock:
+            if remaining is not None:
+                self.remaining[key] = remaining
+                self._sent[key] = 0
+
+            if status_code == 429 or remaining == 0:
+                self._exhausted_until[key] = time.monotonic() + self.window
+            elif remaining is not None:
+                self._exhausted_until[key] = 0.0
+
+    def _priority(self, key):
+        remaining = self.remaining[key]
+
+        if remaining is None:
+            remaining = float('inf')
+
+        return remaining, -self._sent[key]
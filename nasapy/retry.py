@@ -0,0 +1,151 @@
+# encoding=utf-8
+
+"""
+Timeouts and retries for requests issued by the transports.
+
+"""
+
+
+import datetime
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+
+class RetryPolicy(object):
+    r"""
+    Timeouts and retry behaviour for requests, shared by synchronous and asynchronous transports.
+
+    Parameters
+    ----------
+    retries : int, default 3
+        The number of times a failed request is retried. 0 disables retries.
+    backoff : float, default 0.5
+        The base delay in seconds between retries. The delay before retry :code:`n` is drawn uniformly between 0 and
+        :code:`backoff * 2 ** n`.
+    max_backoff : float, default 30
+        The longest delay in seconds between retries. Responses asking, through :code:`Retry-After`, to wait longer
+        than this are returned without being retried.
+    statuses : tuple, default (429, 500, 502, 503, 504)
+        Response status codes that are retried.
+    connect_timeout : float, default 5
+        Seconds to wait for a connection to be established.
+    read_timeout : float, default 30
+        Seconds to wait between bytes received from the server.
+    deadline : float, default None
+        The total number of seconds a call may take across all of its attempts. No retry is made that would end
+        after the deadline, and the timeouts of each attempt are shortened to fit within it. If None, calls are only
+        bounded by the number of retries and the timeouts.
+
+    Notes
+    -----
+    Connection errors and timeouts are retried along with the listed status codes. A :code:`Retry-After` header,
+    given either in seconds or as a date, is used as the delay in place of the exponential backoff.
+
+    The deadline is enforced through the connect and read timeouts, and the read timeout bounds the wait for each
+    piece of the body rather than the whole body. A server that keeps sending a large body slowly can therefore
+    hold a call past its deadline, as can reading a streamed body, which happens after the call has returned.
+
+    Examples
+    --------
+    # Fail fast in a latency-sensitive service.
+    >>> n = Nasa(key=key, retry=RetryPolicy(retries=2, read_timeout=5, deadline=10))
+    # Apply the same policy to the module-level functions.
+    >>> get_transport().retry = RetryPolicy(retries=2, read_timeout=5, deadline=10)
+
+    """
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30, statuses=(429, 500, 502, 503, 504),
+                 connect_timeout=5, read_timeout=30, deadline=None):
+        if retries < 0:
+            raise ValueError('retries parameter must be 0 or greater.')
+
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = tuple(statuses)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+
+    def timeouts(self, start):
+        r"""
+        Returns the connect and read timeouts for an attempt of a call that began at :code:`start`.
+
+        Parameters
+        ----------
+        start : float
+            The :code:`time.monotonic()` value when the call began.
+
+        Returns
+        -------
+        tuple
+            The connect and read timeouts in seconds.
+
+        """
+        connect, read = self.connect_timeout, self.read_timeout
+
+        if self.deadline is not None:
+            remaining = max(self.deadline - (time.monotonic() - start), 0.001)
+            connect, read = min(connect, remaining), min(read, remaining)
+
+        return connect, read
+
+    def delay(self, attempt, start, r=None):
+        r"""
+        Returns the number of seconds to wait before retrying, or None if the call should not be retried.
+
+        Parameters
+        ----------
+        attempt : int
+            The number of retries already made.
+        start : float
+            The :code:`time.monotonic()` value when the call began.
+        r : requests.Response, default None
+            The response to the attempt, or None if it raised a connection error or timed out.
+
+        Returns
+        -------
+        float, None
+
+        """
+        if r is not None and r.status_code not in self.statuses:
+            return None
+
+        if attempt >= self.retries:
+            return None
+
+        delay = None
+
+        if r is not None:
+            delay = _retry_after(r.headers.get('Retry-After'))
+
+        if delay is None:
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+        elif delay > self.max_backoff:
+            return None
+
+        if self.deadline is not None and time.monotonic() - start + delay >= self.deadline:
+            return None
+
+        return delay
+
+
+def _retry_after(value):
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+
+    return max((date - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
@@ -0,0 +1,37 @@
+# encoding=utf-8
+
+"""
+Helpers shared by the SQLite databases of the response cache and the DONKI store.
+
+"""
+
+
+class Transaction(object):
+    r"""
+    Context manager running the statements issued within it in one write transaction, committed when the block
+    exits normally and rolled back when it raises.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        A connection opened with :code:`isolation_level=None`, so transactions are only begun explicitly.
+
+    Notes
+    -----
+    The write lock is taken when the transaction begins, so a read followed by a write within it cannot interleave
+    with another writer.
+
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.conn.execute('COMMIT')
+        else:
+            self.conn.execute('ROLLBACK')
@@ -0,0 +1,257 @@
+# encoding=utf-8
+
+"""
+Incremental parsing of large JSON responses, yielding the records of their data arrays one at a time.
+
+"""
+
+
+import codecs
+import json
+import re
+
+
+#: Keys whose array values hold the records of a response, such as the rows of the JPL SSD APIs, the asteroids of
+#: the NeoWs endpoints and the results of the image library search.
+RECORD_KEYS = ('data', 'near_earth_objects', 'items')
+
+_WHITESPACE = ' \t\n\r'
+
+# The characters that change the nesting depth or string state outside a string, those that end or escape within a
+# string, and those that end a number or literal.
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_END = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[ \t\n\r,:\]}]')
+
+
+def iter_records(chunks, keys=RECORD_KEYS):
+    r"""
+    Parses a JSON document from an iterable of byte chunks, yielding each record as soon as it has been read.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The document's bytes, for example :code:`response.iter_content(chunk_size)` of a streamed response.
+    keys : tuple, default RECORD_KEYS
+        Object keys, at any depth, whose arrays hold the records. The elements of an object stored under one of
+        the keys, as in the date-keyed :code:`near_earth_objects` of the NeoWs feed, are also yielded. A document
+        that is itself an array yields its elements.
+
+    Yields
+    ------
+    dict, list
+        The records in document order. When the document has a :code:`fields` array before its records, as the
+        JPL SSD APIs do, rows given as lists are yielded as dictionaries keyed by those fields.
+
+    Notes
+    -----
+    Only one record, together with the unread part of the current chunk, is held in memory at a time. Values
+    outside the record arrays are skipped as they are read.
+
+    Examples
+    --------
+    >>> r = requests.get(url, stream=True)
+    >>> for record in iter_records(r.iter_content(65536)):
+    ...     print(record)
+
+    """
+    parser = _Parser(chunks)
+    parser.skip_whitespace()
+
+    if parser.peek() is None:
+        return
+
+    for record in parser.walk(keys, capture=parser.peek() == '['):
+        if isinstance(record, list) and parser.fields is not None:
+            record = dict(zip(parser.fields, record))
+
+        yield record
+
+
+class _Parser(object):
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = ''
+        self.pos = 0
+        self.fields = None
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._exhausted = False
+
+    def walk(self, keys, capture):
+        # Yields the records in the value at the current position, skipping everything else.
+        c = self.peek()
+
+        if c == '[':
+            if not capture:
+                self.value()
+                return
+
+            self.pos += 1
+
+            if self.next_token() == ']':
+                self.pos += 1
+                return
+
+            while True:
+                yield self.value()
+
+                c = self.next_token()
+                self.pos += 1
+
+                if c == ']':
+                    return
+
+                if c != ',':
+                    raise ValueError('expected , or ] in array')
+
+        elif c == '{':
+            self.pos += 1
+
+            if self.next_token() == '}':
+                self.pos += 1
+                return
+
+            while True:
+                self.next_token()
+                key = self.value()
+
+                if self.next_token() != ':':
+                    raise ValueError('expected : after object key')
+
+                self.pos += 1
+                self.next_token()
+
+                if key == 'fields' and self.peek() == '[':
+                    self.fields = self.value()
+                else:
+                    for record in self.walk(keys, capture=capture or key in keys):
+                        yield record
+
+                c = self.next_token()
+                self.pos += 1
+
+                if c == '}':
+                    return
+
+                if c != ',':
+                    raise ValueError('expected , or } in object')
+
+        else:
+            self.value()
+
+    def value(self):
+        # Decodes the complete value at the current position once the chunks holding all of it have been read.
+        self.next_token()
+        self._read_value()
+
+        value, self.pos = self._json.raw_decode(self.buffer, self.pos)
+
+        return value
+
+    def _read_value(self):
+        # Reads chunks until the value at the current position is whole. The nesting depth and string state are
+        # kept across chunks, so each character is scanned once however large the value.
+        offset = 1
+
+        if self.buffer[self.pos] not in '[{"':
+            # A number or literal ends at the next delimiter, which may only arrive with a later chunk.
+            while True:
+                match = _SCALAR_END.search(self.buffer, self.pos + offset)
+
+                if match is not None:
+                    return
+
+                offset = len(self.buffer) - self.pos
+
+                if not self.fill():
+                    return
+
+        depth = 0 if self.buffer[self.pos] == '"' else 1
+        in_string = depth == 0
+
+        while True:
+            i = self.pos + offset
+
+            while True:
+                match = (_STRING_END if in_string else _STRUCTURAL).search(self.buffer, i)
+
+                if match is None:
+                    i = len(self.buffer)
+                    break
+
+                c = match.group()
+
+                if c == '\\':
+                    # The escaped character may only arrive with the next chunk.
+                    if match.end() == len(self.buffer):
+                        i = match.start()
+                        break
+
+                    i = match.end() + 1
+                elif c == '"':
+                    in_string = not in_string
+                    i = match.end()
+
+                    if depth == 0:
+                        return
+                elif c in '[{':
+                    depth += 1
+                    i = match.end()
+                else:
+                    depth -= 1
+                    i = match.end()
+
+                    if depth == 0:
+                        return
+
+            offset = i - self.pos
+
+            if not self.fill():
+                raise ValueError('unexpected end of JSON document')
+
+    def next_token(self):
+        self.skip_whitespace()
+        c = self.peek()
+
+        if c is None:
+            raise ValueError('unexpected end of JSON document')
+
+        return c
+
+    def peek(self):
+        while self.pos >= len(self.buffer):
+            if not self.fill():
+                return None
+
+        return self.buffer[self.pos]
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.buffer) or not self.fill():
+                return
+
+    def fill(self):
+        if self._exhausted:
+            return False
+
+        # Drop the consumed part of the buffer so it never grows beyond the value being read.
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+
+        for chunk in self.chunks:
+            text = self._decoder.decode(chunk)
+
+            if text:
+                self.buffer += text
+                return True
+
+        self.buffer += self._decoder.decode(b'', final=True)
+        self._exhausted = True
+
+        return True
@@ -0,0 +1,613 @@
+# encoding=utf-8
+
+"""
+HTTP transport used by the :code:`Nasa` class and the module-level endpoint functions.
+
+"""
+
+
+import asyncio
+import threading
+import time
+from functools import partial
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from nasapy.retry import RetryPolicy
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+#: Default connection pool size for the hosts queried by nasapy. Hosts not listed use the :code:`pool_maxsize`
+#: given to :code:`create_session`.
+POOL_SIZES = {
+    'api.nasa.gov': 20,
+    'ssd-api.jpl.nasa.gov': 10,
+    'images-api.nasa.gov': 10,
+    'images-assets.nasa.gov': 10,
+    'exoplanetarchive.ipac.caltech.edu': 4,
+    'genelab-data.ndc.nasa.gov': 4,
+    'data.ivanstanojevic.me': 4,
+}
+
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_sizes=None, pool_block=False):
+    r"""
+    Creates a :code:`requests.Session` with pooled, keep-alive connections sized per host.
+
+    Parameters
+    ----------
+    pool_connections : int, default 10
+        The number of per-host connection pools to cache.
+    pool_maxsize : int, default 10
+        The maximum number of connections kept alive in each pool for hosts not listed in :code:`pool_sizes`.
+    pool_sizes : dict, default None
+        Mapping of host names to the maximum number of keep-alive connections for that host. Entries are merged
+        over :code:`POOL_SIZES`.
+    pool_block : bool, default False
+        If True, requests block when a host's pool is exhausted instead of opening a throwaway connection.
+
+    Returns
+    -------
+    requests.Session
+        Session with an adapter mounted for each host in the merged pool sizes.
+
+    Examples
+    --------
+    # Allow up to 50 concurrent keep-alive connections to api.nasa.gov
+    >>> s = create_session(pool_sizes={'api.nasa.gov': 50})
+
+    """
+    sizes = dict(POOL_SIZES)
+
+    if pool_sizes is not None:
+        sizes.update(pool_sizes)
+
+    session = requests.Session()
+
+    default = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount('https://', default)
+    session.mount('http://', default)
+
+    for host, size in sizes.items():
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, pool_block=pool_block)
+        session.mount('https://' + host + '/', adapter)
+        session.mount('http://' + host + '/', adapter)
+
+    return session
+
+
+class Transport(object):
+    r"""
+    Thread-safe HTTP transport wrapping a pooled :code:`requests.Session`.
+
+    Parameters
+    ----------
+    session : requests.Session, default None
+        The session used to issue requests. If None, a session is built with :code:`create_session` using the
+        remaining parameters.
+    pool_connections : int, default 10
+        Passed to :code:`create_session` when no session is given.
+    pool_maxsize : int, default 10
+        Passed to :code:`create_session` when no session is given.
+    pool_sizes : dict, default None
+        Passed to :code:`create_session` when no session is given.
+    rate_limiter : RateLimiter, default None
+        If given, each request waits for the limiter before being sent and the limiter is updated from the rate
+        limit headers of each response.
+    cache : MemoryCache, SQLiteCache, default None
+        If given, fresh cached responses are returned without a request being sent, expired responses are
+        revalidated with conditional requests and successful responses are cached.
+    coalesce : bool, default True
+        If True, a request made while an identical request is in flight waits for and shares that request's
+        response instead of being sent.
+    retry : RetryPolicy, default None
+        The timeouts and retries applied to requests. If None, a :code:`RetryPolicy` with default settings is used.
+
+    Attributes
+    ----------
+    session : requests.Session
+        The underlying session.
+    rate_limiter : RateLimiter, None
+        The rate limiter applied to requests.
+    cache : MemoryCache, SQLiteCache, None
+        The response cache.
+    retry : RetryPolicy
+        The timeouts and retries applied to requests. It can be replaced at any time.
+
+    """
+    def __init__(self, session=None, pool_connections=10, pool_maxsize=10, pool_sizes=None, rate_limiter=None,
+                 cache=None, coalesce=True, retry=None):
+        if session is None:
+            session = create_session(pool_connections=pool_connections,
+                                     pool_maxsize=pool_maxsize,
+                                     pool_sizes=pool_sizes)
+
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.coalesce = coalesce
+        self.retry = retry if retry is not None else RetryPolicy()
+
+        self._flights = _SingleFlight()
+
+    def get(self, url, params=None, retry=None, key_pool=None, **kwargs):
+        r"""
+        Issues a GET request over the pooled session.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        params : dict, default None
+            Query parameters. Parameters with a value of None are dropped.
+        retry : RetryPolicy, default None
+            The timeouts and retries applied to this request in place of the transport's policy.
+        key_pool : KeyPool, default None
+            If given and :code:`params` has an :code:`api_key`, each attempt sent is made with the key the pool
+            chooses and the pool is updated from its response. Requests answered from the cache or by an identical
+            request in flight use no key.
+        **kwargs
+            Passed through to :code:`requests.Session.get`. Responses requested with :code:`stream=True` are not
+            cached.
+
+        Returns
+        -------
+        requests.Response
+
+        Notes
+        -----
+        Requests are identical when their URL and parameters match once normalized, regardless of the API key they
+        use. Requests given extra keyword arguments are never coalesced.
+
+        """
+        params = _clean_params(params)
+
+        if self.coalesce and not kwargs:
+            return self._flights.do(_request_key(url, params), partial(self._send, url, params, retry, key_pool))
+
+        return self._send(url, params, retry, key_pool, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def _send(self, url, params, retry, key_pool, **kwargs):
+        # Streamed bodies are read by the caller, so they can be neither served from nor stored in the cache.
+        if self.cache is not None and not kwargs.get('stream'):
+            cached, headers = self.cache.check(url, params)
+
+            if cached is not None:
+                return cached
+
+            kwargs = _with_headers(kwargs, headers)
+
+        r = self._request(url, params, retry, key_pool, **kwargs)
+
+        if self.cache is not None and not kwargs.get('stream'):
+            r = self.cache.store(url, params, r)
+
+        return r
+
+    def _request(self, url, params, retry, key_pool, **kwargs):
+        policy = retry if retry is not None else self.retry
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            sent, key = _with_key(params, key_pool)
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(url, sent)
+
+            try:
+                r = self.session.get(url, params=sent, **dict({'timeout': policy.timeouts(start)}, **kwargs))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                delay = policy.delay(attempt, start)
+
+                if delay is None:
+                    raise
+
+            else:
+                if key is not None:
+                    key_pool.update(key, r.headers, r.status_code)
+
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(url, sent, r.headers)
+
+                delay = policy.delay(attempt, start, r)
+
+                if delay is None:
+                    return r
+
+                r.close()
+
+            time.sleep(delay)
+            attempt += 1
+
+
+class AsyncTransport(object):
+    r"""
+    Asynchronous HTTP transport issuing requests with :code:`aiohttp` and bounding the number of requests in flight
+    to each host.
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession, default None
+        The session used to issue requests. If None, a session is created on the running event loop on first use.
+    limit : int, default 100
+        The maximum number of simultaneous connections across all hosts.
+    limit_per_host : int, default 10
+        The maximum number of requests in flight to a host not listed in :code:`pool_sizes`.
+    pool_sizes : dict, default None
+        Mapping of host names to the maximum number of requests in flight to that host. Entries are merged over
+        :code:`POOL_SIZES`.
+    rate_limiter : RateLimiter, default None
+        If given, each request waits for the limiter before being sent and the limiter is updated from the rate
+        limit headers of each response. The same limiter may be shared with synchronous transports.
+    cache : MemoryCache, SQLiteCache, default None
+        If given, fresh cached responses are returned without a request being sent, expired responses are
+        revalidated with conditional requests and successful responses are cached. The same cache may be shared
+        with synchronous transports.
+    coalesce : bool, default True
+        If True, a request made while an identical request is in flight waits for and shares that request's
+        response instead of being sent.
+    retry : RetryPolicy, default None
+        The timeouts and retries applied to requests. If None, a :code:`RetryPolicy` with default settings is used.
+
+    Raises
+    ------
+    ImportError
+        Raised if the :code:`aiohttp` package is not installed.
+
+    Notes
+    -----
+    Requests beyond a host's limit wait on the event loop rather than being rejected, so any number of requests
+    can be submitted at once.
+
+    """
+    def __init__(self, session=None, limit=100, limit_per_host=10, pool_sizes=None, rate_limiter=None, cache=None,
+                 coalesce=True, retry=None):
+        if aiohttp is None:
+            raise ImportError('the aiohttp package is required for asynchronous requests. It can be installed with '
+                              '`pip install nasapy[async]`.')
+
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.coalesce = coalesce
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.pool_sizes = dict(POOL_SIZES)
+
+        if pool_sizes is not None:
+            self.pool_sizes.update(pool_sizes)
+
+        self._semaphores = {}
+        self._flights = _SingleFlight()
+
+    async def get(self, url, params=None, retry=None, key_pool=None, **kwargs):
+        r"""
+        Issues a GET request, waiting for a free slot for the URL's host first.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        params : dict, default None
+            Query parameters. Parameters with a value of None are dropped and the rest are encoded as
+            :code:`requests` encodes them.
+        retry : RetryPolicy, default None
+            The timeouts and retries applied to this request in place of the transport's policy.
+        key_pool : KeyPool, default None
+            If given and :code:`params` has an :code:`api_key`, each attempt sent is made with the key the pool
+            chooses and the pool is updated from its response. Requests answered from the cache or by an identical
+            request in flight use no key.
+        **kwargs
+            Passed through to :code:`aiohttp.ClientSession.get`.
+
+        Returns
+        -------
+        requests.Response
+            The response with its body fully read, so it can be handled exactly like a synchronous response.
+
+        """
+        if self.session is None:
+            # Per-host limits are enforced by the semaphores, so the connector only caps the total.
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.limit))
+
+        params = _clean_params(params)
+
+        if self.coalesce and not kwargs:
+            return await self._flights.do_async(_request_key(url, params),
+                                                partial(self._send, url, params, retry, key_pool))
+
+        return await self._send(url, params, retry, key_pool, **kwargs)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def _send(self, url, params, retry, key_pool, **kwargs):
+        if self.cache is not None:
+            cached, headers = self.cache.check(url, params)
+
+            if cached is not None:
+                return cached
+
+            kwargs = _with_headers(kwargs, headers)
+
+        r = await self._request(url, params, retry, key_pool, **kwargs)
+
+        if self.cache is not None:
+            r = self.cache.store(url, params, r)
+
+        return r
+
+    async def _request(self, url, params, retry, key_pool, **kwargs):
+        policy = retry if retry is not None else self.retry
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            sent, key = _with_key(params, key_pool)
+
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(url, sent)
+
+            try:
+                async with self._semaphore(url):
+                    connect, read = policy.timeouts(start)
+                    timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+                    async with self.session.get(url, params=_encode_params(sent),
+                                                **dict({'timeout': timeout}, **kwargs)) as resp:
+                        r = build_response(url=str(resp.url),
+                                           status_code=resp.status,
+                                           reason=resp.reason,
+                                           headers=resp.headers,
+                                           content=await resp.read())
+
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                delay = policy.delay(attempt, start)
+
+                if delay is None:
+                    raise
+
+            else:
+                if key is not None:
+                    key_pool.update(key, r.headers, r.status_code)
+
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(url, sent, r.headers)
+
+                delay = policy.delay(attempt, start, r)
+
+                if delay is None:
+                    return r
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _semaphore(self, url):
+        host = urlsplit(url).hostname
+
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.pool_sizes.get(host, self.limit_per_host))
+
+        return self._semaphores[host]
+
+
+def build_response(url, status_code, reason, headers, content):
+    r"""
+    Builds a :code:`requests.Response` from its parts.
+
+    Parameters
+    ----------
+    url : str
+        The final URL of the response.
+    status_code : int
+        The HTTP status code.
+    reason : str
+        The HTTP reason phrase.
+    headers : mapping
+        The response headers.
+    content : bytes
+        The response body.
+
+    Returns
+    -------
+    requests.Response
+
+    """
+    r = requests.Response()
+    r.url = url
+    r.status_code = status_code
+    r.reason = reason
+    r.headers = CaseInsensitiveDict(headers)
+    r.encoding = get_encoding_from_headers(r.headers)
+    r._content = content
+    r._content_consumed = True
+
+    return r
+
+
+class _SingleFlight(object):
+    r"""
+    Runs one call per key at a time, handing its result to callers that asked for the same key meanwhile.
+    """
+    def __init__(self):
+        self._calls = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return _shared_response(call.result)
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+        return call.result
+
+    async def do_async(self, key, func):
+        future = self._futures.get(key)
+
+        if future is not None:
+            return _shared_response(await asyncio.shield(future))
+
+        future = self._futures[key] = asyncio.get_event_loop().create_future()
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case no other caller was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._futures[key]
+
+        return result
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _shared_response(r):
+    # Followers get their own copy without the rate limit headers, as their requests did not use any quota.
+    headers = CaseInsensitiveDict(r.headers)
+    headers.pop('X-RateLimit-Limit', None)
+    headers.pop('X-RateLimit-Remaining', None)
+
+    return build_response(url=r.url, status_code=r.status_code, reason=r.reason, headers=headers, content=r.content)
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_transport():
+    r"""
+    Returns the module-level default transport, creating it on first use.
+
+    Returns
+    -------
+    Transport
+        The transport shared by the module-level endpoint functions.
+
+    """
+    global _default_transport
+
+    if _default_transport is None:
+        with _default_lock:
+            if _default_transport is None:
+                _default_transport = Transport()
+
+    return _default_transport
+
+
+def set_transport(transport):
+    r"""
+    Replaces the module-level default transport.
+
+    Parameters
+    ----------
+    transport : Transport, requests.Session
+        The new default transport. A bare session is wrapped in a :code:`Transport`.
+
+    """
+    global _default_transport
+
+    with _default_lock:
+        _default_transport = as_transport(transport)
+
+
+def as_transport(transport):
+    if isinstance(transport, requests.Session):
+        return Transport(session=transport)
+
+    if aiohttp is not None and isinstance(transport, aiohttp.ClientSession):
+        return AsyncTransport(session=transport)
+
+    return transport
+
+
+def _request_key(url, params):
+    parts = urlsplit(url)
+    query = sorted((k, v if isinstance(v, str) else str(v))
+                   for k, v in (params or {}).items()
+                   if v is not None and k != 'api_key')
+
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+def _clean_params(params):
+    if params is None:
+        return None
+
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def _with_key(params, key_pool):
+    # Returns the parameters of one attempt with the API key chosen by the pool, and that key.
+    if key_pool is None or params is None or 'api_key' not in params:
+        return params, None
+
+    key = key_pool.acquire()
+
+    return dict(params, api_key=key), key
+
+
+def _encode_params(params):
+    if params is None:
+        return None
+
+    return {k: v if isinstance(v, str) else str(v) for k, v in _clean_params(params).items()}
+
+
+def _with_headers(kwargs, headers):
+    if not headers:
+        return kwargs
+
+    merged = dict(kwargs.get('headers') or {})
+    merged.update(headers)
+
+    return dict(kwargs, headers=merged)
@@ -13,6 +13,7 @@ setup(
     long_description=open('README.md').read(),
     long_description_content_type='text/markdown',
     install_requires=['requests >= 2.18'],
+    extras_require={'async': ['aiohttp >= 3.6']},
     home_page='',
     classifiers=[
         'Environment :: Console',
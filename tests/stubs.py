@@ -0,0 +1,37 @@
+"""
+Transports standing in for the NASA APIs, shared by the tests.
+
+"""
+
+
+from nasapy.transport import build_response, _clean_params
+
+
+class StubTransport(object):
+
+    def __init__(self, body=b'[]', headers=None):
+        self.body = body
+        self.headers = headers or {'X-RateLimit-Remaining': '999'}
+        self.urls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append((url, _clean_params(params)))
+
+        return build_response(url=url, status_code=200, reason='OK', headers=self.headers, content=self.body)
+
+
+class AsyncStub(object):
+    # Serves the responses of a synchronous stub transport to an AsyncNasa client.
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    @property
+    def urls(self):
+        return self.transport.urls
+
+    async def get(self, url, params=None, **kwargs):
+        return self.transport.get(url, params=params, **kwargs)
+
+    async def close(self):
+        pass
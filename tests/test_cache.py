@@ -0,0 +1,150 @@
+import datetime
+import os
+
+import pytest
+
+from nasapy.api import Nasa
+from nasapy.cache import BaseCache, MemoryCache, SQLiteCache, cache_key
+from nasapy.transport import Transport, build_response
+
+
+class StubSession(object):
+
+    def __init__(self, body=b'{}', headers=None):
+        self.body = body
+        self.headers = headers or {}
+        self.requests = []
+
+    def get(self, url, params=None, **kwargs):
+        self.requests.append((url, params, kwargs))
+
+        return build_response(url=url, status_code=200, reason='OK', headers=self.headers, content=self.body)
+
+
+class ETagSession(StubSession):
+
+    def get(self, url, params=None, **kwargs):
+        self.requests.append((url, params, kwargs))
+
+        if (kwargs.get('headers') or {}).get('If-None-Match') == '"v1"':
+            return build_response(url=url, status_code=304, reason='Not Modified',
+                                  headers={'ETag': '"v1"', 'X-RateLimit-Remaining': '41'}, content=b'')
+
+        return build_response(url=url, status_code=200, reason='OK',
+                              headers={'ETag': '"v1"', 'X-RateLimit-Remaining': '42'}, content=self.body)
+
+
+def test_cache_key():
+    assert cache_key('HTTPS://API.nasa.gov/DONKI/FLR', {'api_key': 'a', 'startDate': '2019-01-01', 'x': None}) == \
+        cache_key('https://api.nasa.gov/DONKI/FLR', {'startDate': '2019-01-01', 'api_key': 'b'})
+    assert cache_key('https://api.nasa.gov/planetary/apod', {'hd': True}) == \
+        'https://api.nasa.gov/planetary/apod?hd=True'
+
+
+def test_memory_cache():
+    session = StubSession()
+    cache = MemoryCache()
+    n = Nasa(transport=Transport(session=session, cache=cache))
+
+    assert n.picture_of_the_day('2019-01-01') == {}
+    assert n.picture_of_the_day('2019-01-01') == {}
+    assert len(session.requests) == 1
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'revalidated': 0, 'size': 1}
+
+    # A cache missing any of the storage methods cannot be created.
+    class PartialCache(BaseCache):
+
+        def _load(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialCache()
+
+
+def test_memory_cache_eviction():
+    session = StubSession()
+    cache = MemoryCache(maxsize=2)
+    t = Transport(session=session, cache=cache)
+
+    t.get('https://api.nasa.gov/planetary/apod', {'date': '2019-01-01'})
+    t.get('https://api.nasa.gov/planetary/apod', {'date': '2019-01-02'})
+    t.get('https://api.nasa.gov/planetary/apod', {'date': '2019-01-01'})
+    t.get('https://api.nasa.gov/planetary/apod', {'date': '2019-01-03'})
+    t.get('https://api.nasa.gov/planetary/apod', {'date': '2019-01-01'})
+
+    assert len(session.requests) == 3
+    assert len(cache) == 2
+
+
+def test_cache_ttl():
+    cache = MemoryCache(ttls={'api.nasa.gov/DONKI': 60})
+    today = datetime.datetime.utcnow().strftime('%Y-%m-%d')
+
+    assert cache.ttl('https://api.nasa.gov/planetary/apod', {'date': '2019-01-01'}) is None
+    assert cache.ttl('https://api.nasa.gov/planetary/apod', {'date': today}) == 3600
+    assert cache.ttl('https://api.nasa.gov/EPIC/api/natural/date/2019-01-01') is None
+    assert cache.ttl('https://api.nasa.gov/DONKI/FLR', {'endDate': today}) == 60
+    assert cache.ttl('https://api.nasa.gov/DONKI/FLR', {'endDate': '2019-01-01'}) == 86400
+    assert cache.ttl('https://api.nasa.gov/insight_weather/') == 600
+    assert cache.ttl('https://api.nasa.gov/neo/rest/v1/neo/3542519') == 86400
+    assert cache.ttl('https://api.nasa.gov/neo/rest/v1/neo/browse/') == 3600
+    assert cache.ttl('https://ssd-api.jpl.nasa.gov/sentry.api') == 600
+
+
+def test_sqlite_cache(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    session = StubSession(body=b'{"a": 1}', headers={'Content-Type': 'application/json'})
+
+    Transport(session=session, cache=SQLiteCache(path)).get('https://api.nasa.gov/EPIC/api/natural/date/2019-01-01')
+
+    # A second instance, as another process would open, reads the stored response.
+    cache = SQLiteCache(path)
+    r = Transport(session=session, cache=cache).get('https://api.nasa.gov/EPIC/api/natural/date/2019-01-01')
+
+    assert len(session.requests) == 1
+    assert r.json() == {'a': 1}
+    assert r.headers['content-type'] == 'application/json'
+    assert cache.hits == 1
+
+
+def test_sqlite_cache_eviction(tmp_path):
+    session = StubSession(body=os.urandom(1024))
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite'), max_bytes=2500)
+    t = Transport(session=session, cache=cache)
+
+    for date in ('2019-01-01', '2019-01-02', '2019-01-03', '2019-01-04'):
+        t.get('https://api.nasa.gov/planetary/apod', {'date': date})
+
+    assert cache.size() <= 2500
+    assert len(cache) < 4
+    assert cache.lookup('https://api.nasa.gov/planetary/apod', {'date': '2019-01-04'}) is not None
+    assert cache.lookup('https://api.nasa.gov/planetary/apod', {'date': '2019-01-01'}) is None
+
+    # The running total matches the stored responses, and reads do not write to the database.
+    conn = cache._connection()
+    assert cache.size() == conn.execute('SELECT SUM(size) FROM responses').fetchone()[0]
+
+    changes = conn.total_changes
+    cache.lookup('https://api.nasa.gov/planetary/apod', {'date': '2019-01-04'})
+    assert conn.total_changes == changes
+
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_revalidation(tmp_path):
+    for cache in (MemoryCache(ttls={'ssd-api.jpl.nasa.gov/sentry.api': -1}),
+                  SQLiteCache(str(tmp_path / 'cache.sqlite'), ttls={'ssd-api.jpl.nasa.gov/sentry.api': -1})):
+        session = ETagSession(body=b'{"data": []}')
+        t = Transport(session=session, cache=cache)
+
+        first = t.get('https://ssd-api.jpl.nasa.gov/sentry.api')
+        second = t.get('https://ssd-api.jpl.nasa.gov/sentry.api')
+
+        assert 'If-None-Match' not in session.requests[0][2].get('headers', {})
+        assert session.requests[1][2]['headers'] == {'If-None-Match': '"v1"'}
+        assert first.json() == second.json() == {'data': []}
+        assert second.status_code == 200
+        assert second.headers['X-RateLimit-Remaining'] == '41'
+        assert cache.revalidated == 1
+        assert cache.lookup('https://ssd-api.jpl.nasa.gov/sentry.api') is None
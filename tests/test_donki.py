@@ -0,0 +1,297 @@
+import asyncio
+import datetime
+import json
+import time
+
+import pytest
+
+from nasapy.api import CME_ANALYSIS_TTL, AsyncNasa, Nasa
+from nasapy.donki import DonkiEvent, DonkiStore
+from nasapy.index import DonkiGraph
+from nasapy.transport import build_response, _clean_params
+
+from stubs import AsyncStub, StubTransport
+
+
+class FlareTransport(object):
+
+    def __init__(self, flares):
+        self.flares = flares
+        self.urls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append((url, _clean_params(params)))
+        flares = [flare for flare in self.flares
+                  if params['startDate'] <= flare['beginTime'][:10] <= params['endDate']]
+
+        return build_response(url=url, status_code=200, reason='OK', headers={},
+                              content=json.dumps(flares).encode() if flares else b'')
+
+
+def test_donki_store(tmp_path):
+    store = DonkiStore(str(tmp_path / 'donki.sqlite'))
+    flares = [{'flrID': 'b', 'beginTime': '2019-05-06T05:04Z'}, {'flrID': 'a', 'beginTime': '2019-05-01T00:00Z'}]
+
+    assert store.high_water_mark('FLR') is None
+    assert store.upsert('FLR', flares) == 2
+    assert store.upsert('FLR', flares) == 0
+    assert store.upsert('FLR', [dict(flares[1], classType='C1.0')]) == 1
+    assert store.upsert('FLR', {}) == 0
+
+    assert len(store) == 2
+    assert store.high_water_mark('FLR') == '2019-05-06T05:04Z'
+    assert [f['flrID'] for f in store.records('FLR')] == ['a', 'b']
+    assert store.records('FLR', start='2019-05-01', end='2019-05-01') == [dict(flares[1], classType='C1.0')]
+    assert store.records('GST') == []
+
+    # The store is shared through the database file.
+    assert len(DonkiStore(str(tmp_path / 'donki.sqlite')).records('FLR', start='2019-05-02')) == 1
+
+    # Analyses of the same CME and time from different catalogs are kept apart.
+    analyses = [{'associatedCMEID': 'CME-1', 'time21_5': '2017-09-06T11:53Z', 'catalog': catalog}
+                for catalog in ('M2M_CATALOG', 'SWRC_CATALOG')]
+
+    assert store.upsert('CMEAnalysis', analyses + analyses[:1]) == 2
+    assert store.records('CMEAnalysis') == analyses
+
+    # A revised analysis replaces the previous one.
+    revised = dict(analyses[0], isMostAccurate=False, speed=900.0)
+
+    assert store.upsert('CMEAnalysis', [revised]) == 1
+    assert store.records('CMEAnalysis') == [revised, analyses[1]]
+
+    with pytest.raises(ValueError):
+        store.records('XYZ')
+
+
+def test_donki_sync(tmp_path):
+    store = DonkiStore(str(tmp_path / 'donki.sqlite'))
+    t = FlareTransport([{'flrID': '1', 'beginTime': '2019-01-10T00:00Z'},
+                        {'flrID': '2', 'beginTime': '2019-06-01T00:00Z'}])
+    n = Nasa(transport=t)
+
+    assert n.donki_sync(store, event_types=['FLR'], start_date='2019-01-01') == {'FLR': 2}
+    assert t.urls[0][1]['startDate'] == '2019-01-01'
+
+    t.urls = []
+    t.flares[1] = dict(t.flares[1], classType='M1.0')
+    t.flares.append({'flrID': '3', 'beginTime': '2019-06-02T00:00Z'})
+
+    assert n.donki_sync(store, event_types=['FLR'], overlap_days=1) == {'FLR': 2}
+    assert min(p['startDate'] for _, p in t.urls) == '2019-05-31'
+    assert store.high_water_mark('FLR') == '2019-06-02T00:00Z'
+    assert len(store) == 3
+
+    with pytest.raises(ValueError):
+        n.donki_sync(store, event_types=['XYZ'])
+
+
+class EventTransport(object):
+
+    records = {
+        'FLR': [{'flrID': 'FLR-2', 'beginTime': '2017-09-06T11:53Z'},
+                {'flrID': 'FLR-1', 'beginTime': '2017-09-04T20:15Z'}],
+        'GST': [{'gstID': 'GST-1', 'startTime': '2017-09-07T23:00Z'}],
+        'CMEAnalysis': [{'associatedCMEID': 'CME-1', 'time21_5': '2017-09-06T11:53Z'}]
+    }
+
+    def get(self, url, params=None, **kwargs):
+        records = self.records.get(url.rsplit('/', 1)[1])
+
+        return build_response(url=url, status_code=200, reason='OK', headers={},
+                              content=json.dumps(records).encode() if records else b'')
+
+
+def test_donki_all():
+    events = Nasa(transport=EventTransport()).donki_all(start_date='2017-09-01', end_date='2017-09-30')
+
+    assert [(e.time, e.event_type) for e in events] == [('2017-09-04T20:15Z', 'FLR'),
+                                                        ('2017-09-06T11:53Z', 'CMEAnalysis'),
+                                                        ('2017-09-06T11:53Z', 'FLR'),
+                                                        ('2017-09-07T23:00Z', 'GST')]
+    assert events[0].record == EventTransport.records['FLR'][1]
+
+    async def main():
+        async with AsyncNasa(transport=AsyncStub(EventTransport())) as n:
+            return await n.donki_all(start_date='2017-09-01', end_date='2017-09-30', types=['GST', 'FLR'])
+
+    assert [e.record for e in asyncio.run(main())] == \
+        [EventTransport.records['FLR'][1], EventTransport.records['FLR'][0], EventTransport.records['GST'][0]]
+
+    with pytest.raises(ValueError):
+        Nasa(transport=EventTransport()).donki_all(types=['CME'])
+
+
+def test_donki_graph():
+    flare = '2017-09-06T11:53:00-FLR-001'
+    cme = '2017-09-06T12:24:00-CME-001'
+    shock = '2017-09-07T22:30:00-IPS-001'
+    storm = '2017-09-07T23:00:00-GST-001'
+
+    graph = DonkiGraph()
+    graph.add([{'flrID': flare, 'beginTime': '2017-09-06T11:53Z', 'linkedEvents': [{'activityID': cme}]}], 'FLR')
+    graph.add([DonkiEvent('2017-09-07T23:00Z', 'GST', {'gstID': storm, 'linkedEvents': [{'activityID': shock}]})])
+
+    assert len(graph) == 4
+    assert graph.get(cme) is None
+    assert graph.downstream(flare) == [cme]
+    assert graph.upstream(storm) == [shock]
+
+    # The shock record links the two chains.
+    graph.add([{'activityID': shock, 'linkedEvents': [{'activityID': cme}, {'activityID': storm}]}], 'IPS')
+
+    assert graph.downstream(flare) == [cme, shock, storm]
+    assert graph.downstream(flare, event_type='GST') == [storm]
+    assert graph.upstream(storm, event_type='FLR') == [flare]
+    assert graph.event_type(shock) == 'IPS'
+
+    # A revised record replaces the links of the previous one, keeping links asserted by other records.
+    graph.add([{'activityID': shock, 'linkedEvents': None}], 'IPS')
+
+    assert graph.downstream(flare) == [cme]
+    assert graph.upstream(storm) == [shock]
+    assert graph.downstream('unknown') == []
+
+    # Every analysis of a CME is kept, and the most accurate one stands for a CME without a record of its own.
+    analyses = [{'associatedCMEID': cme, 'time21_5': '2017-09-06T20:00Z', 'isMostAccurate': True, 'speed': 1200.0},
+                {'associatedCMEID': cme, 'time21_5': '2017-09-06T21:00Z', 'isMostAccurate': False, 'speed': 1100.0}]
+    graph.add(analyses + analyses[:1], 'CMEAnalysis')
+
+    assert graph.analyses(cme) == analyses
+    assert graph.get(cme) == analyses[0]
+    assert graph.downstream(flare) == [cme]
+    assert graph.analyses(flare) == []
+
+    # A revised analysis replaces the previous one.
+    revised = [dict(analyses[0], isMostAccurate=False), dict(analyses[1], isMostAccurate=True)]
+    graph.add(revised, 'CMEAnalysis')
+
+    assert graph.analyses(cme) == revised
+    assert graph.get(cme) == revised[1]
+
+    with pytest.raises(ValueError):
+        graph.add([{'flrID': flare}])
+
+
+class DonkiTransport(StubTransport):
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append((url, _clean_params(params)))
+        start, end = params['startDate'], params['endDate']
+
+        if start == '2019-03-01':
+            return build_response(url=url, status_code=200, reason='OK', headers=self.headers, content=b'')
+
+        # Each window repeats the flare that began on its last day, as it does for events spanning two windows.
+        body = [{'flrID': end + '-FLR', 'beginTime': end + 'T00:00Z'},
+                {'flrID': start + '-FLR', 'beginTime': start + 'T12:00Z'}]
+
+        return build_response(url=url, status_code=200, reason='OK', headers=self.headers,
+                              content=json.dumps(body).encode())
+
+
+def test_donki_windows():
+    t = DonkiTransport()
+    flares = Nasa(transport=t).solar_flare(start_date='2019-01-01', end_date='2019-03-31', window_days=30)
+
+    assert sorted((p['startDate'], p['endDate']) for _, p in t.urls) == \
+        [('2019-01-01', '2019-01-30'), ('2019-01-31', '2019-03-01'), ('2019-03-02', '2019-03-31')]
+    assert [f['flrID'] for f in flares] == \
+        ['2019-01-01-FLR', '2019-01-30-FLR', '2019-01-31-FLR', '2019-03-01-FLR', '2019-03-02-FLR', '2019-03-31-FLR']
+
+    # Ranges within a single window are requested unchanged.
+    t.urls = []
+    Nasa(transport=t).solar_flare(start_date='2019-01-01', end_date='2019-01-20', window_days=30)
+
+    assert t.urls == [('https://api.nasa.gov/DONKI/FLR',
+                       {'api_key': 'DEMO_KEY', 'startDate': '2019-01-01', 'endDate': '2019-01-20'})]
+
+    # A range without an end date runs to the current date and is split as well.
+    t.urls = []
+    Nasa(transport=t).solar_flare(start_date='2019-01-01')
+    today = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d')
+
+    assert len(t.urls) > 1
+    assert max(p['endDate'] for _, p in t.urls) == today
+
+    # A range starting after today has no events and is not requested.
+    t.urls = []
+    tomorrow = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+
+    assert Nasa(transport=t).solar_flare(start_date=tomorrow) == {}
+    assert len(Nasa(transport=t).solar_flare(start_date=tomorrow, return_df=True)['events']) == 0
+    assert t.urls == []
+
+    with pytest.raises(ValueError, match='start_date'):
+        Nasa(transport=t).solar_flare(start_date='2019-13-01')
+
+    with pytest.raises(ValueError, match='end_date'):
+        Nasa(transport=t).solar_flare(start_date='2019-01-01', end_date='01/31/2019')
+
+    with pytest.raises(ValueError):
+        Nasa(transport=t).geomagnetic_storm(start_date='2019-01-01', end_date='2019-03-31', window_days=0)
+
+    with pytest.raises(TypeError):
+        Nasa(transport=t).geomagnetic_storm(window_days='30')
+
+
+def test_donki_return_df():
+    t = DonkiTransport()
+    frames = Nasa(transport=t).solar_flare(start_date='2019-01-01', end_date='2019-03-31', window_days=30,
+                                           return_df=True)
+
+    assert len(frames['events']) == 6
+    assert frames['events']['beginTime'].is_monotonic_increasing
+
+    with pytest.raises(TypeError):
+        Nasa(transport=t).solar_flare(return_df=1)
+
+
+def test_cme_local_filter():
+    analyses = [{'associatedCMEID': 'CME-1', 'time21_5': '2017-09-06T15:00Z', 'latitude': -10.0, 'longitude': 20.0,
+                 'halfAngle': 45.0, 'speed': 1500.0, 'type': 'O', 'isMostAccurate': True, 'catalog': 'M2M_CATALOG'},
+                {'associatedCMEID': 'CME-1', 'time21_5': '2017-09-06T15:30Z', 'latitude': -10.0, 'longitude': 20.0,
+                 'halfAngle': 40.0, 'speed': 1400.0, 'type': 'O', 'isMostAccurate': False, 'catalog': 'M2M_CATALOG'},
+                {'associatedCMEID': 'CME-2', 'time21_5': '2017-09-09T10:00Z', 'latitude': None, 'longitude': None,
+                 'halfAngle': 20.0, 'speed': 600.0, 'type': 'S', 'isMostAccurate': True, 'catalog': 'SWRC_CATALOG'}]
+    t = StubTransport(body=json.dumps(analyses).encode())
+    n = Nasa(transport=t)
+
+    def sweep(**kwargs):
+        return n.coronal_mass_ejection(start_date='2017-09-01', end_date='2017-09-30', local_filter=True, **kwargs)
+
+    assert sweep() == analyses[:1]
+    assert sweep(accurate_only=False) == analyses[:2]
+    assert sweep(complete_entry=False, speed=500) == [analyses[0], analyses[2]]
+    assert sweep(complete_entry=False, half_angle=30, accurate_only=False) == analyses[:2]
+    assert sweep(complete_entry=False, catalog='SWRC_CATALOG') == analyses[2:]
+    assert sweep(speed=2000) == {}
+    assert len(sweep(return_df=True)['events']) == 1
+
+    assert len(t.urls) == 1
+    assert t.urls[0][1]['mostAccurateOnly'] is False and t.urls[0][1]['completeEntryOnly'] is False
+
+    # A rolling range is requested with its dates resolved, and expired ranges are requested again.
+    n.coronal_mass_ejection(local_filter=True)
+    assert t.urls[-1][1]['startDate'] is not None and t.urls[-1][1]['endDate'] is not None
+
+    n._cme_analyses[('2017-09-01', '2017-09-30', None)] = (n._cme_analyses[('2017-09-01', '2017-09-30', None)][0],
+                                                          time.monotonic() - CME_ANALYSIS_TTL)
+    sweep()
+    assert len(t.urls) == 3
+
+    with pytest.raises(TypeError):
+        sweep(speed='fast')
+
+    with pytest.raises(TypeError):
+        n.coronal_mass_ejection(local_filter='yes')
+
+    async def main():
+        async with AsyncNasa(transport=AsyncStub(StubTransport(body=json.dumps(analyses).encode()))) as an:
+            first = await an.coronal_mass_ejection(start_date='2017-09-01', end_date='2017-09-30', local_filter=True)
+            second = await an.coronal_mass_ejection(start_date='2017-09-01', end_date='2017-09-30', speed=1000,
+                                                    local_filter=True)
+
+            return first, second, len(an.transport.urls)
+
+    assert asyncio.run(main()) == (analyses[:1], analyses[:1], 1)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from nasapy.api import AsyncNasa, Nasa
+from nasapy.transport import build_response, _clean_params
+
+from stubs import AsyncStub, StubTransport
+
+
+class EpicTransport(StubTransport):
+
+    def __init__(self, truncate=None, length=True):
+        super(EpicTransport, self).__init__()
+        self.truncate = truncate
+        self.length = length
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append((url, kwargs.get('headers')))
+
+        if '/EPIC/api/' in url:
+            date = url.rsplit('/', 1)[1]
+            images = [{'image': 'epic_1b_{date}'.format(date=date.replace('-', '')), 'date': date + ' 01:51:44'}]
+
+            return build_response(url=url, status_code=200, reason='OK', headers=self.headers,
+                                  content=json.dumps(images if date != '2019-01-02' else []).encode())
+
+        content = url.encode() * 100
+        offset = int((kwargs.get('headers') or {}).get('Range', 'bytes=0-')[6:-1])
+
+        if offset >= len(content):
+            headers = {'Content-Range': 'bytes */{0}'.format(len(content))} if self.length else {}
+            return build_response(url=url, status_code=416, reason='Range Not Satisfiable', headers=headers,
+                                  content=b'')
+
+        if offset:
+            headers = {'Content-Range': 'bytes {0}-{1}/{2}'.format(offset, len(content) - 1, len(content))}
+            return build_response(url=url, status_code=206, reason='Partial Content', headers=headers,
+                                  content=content[offset:])
+
+        # A dropped connection delivers only the start of the body.
+        body = content[:self.truncate] if self.truncate else content
+
+        headers = {'Content-Length': str(len(content))} if self.length else {}
+
+        return build_response(url=url, status_code=200, reason='OK', headers=headers, content=body)
+
+
+def test_epic_download(tmp_path):
+    directory = str(tmp_path)
+    results = Nasa(transport=EpicTransport(truncate=1000)).epic_download(directory, start_date='2019-01-01',
+                                                                          end_date='2019-01-03', variant='thumbs')
+
+    assert list(results) == ['epic_1b_20190101', 'epic_1b_20190103']
+    assert all(isinstance(r.error, IOError) for r in results.values())
+
+    t = EpicTransport()
+    results = Nasa(transport=t).epic_download(directory, start_date='2019-01-01', end_date='2019-01-03',
+                                              variant='thumbs')
+    path = results['epic_1b_20190101'].result
+    url = 'https://api.nasa.gov/EPIC/archive/natural/2019/01/01/thumbs/epic_1b_20190101.jpg'
+
+    assert path == str(tmp_path / 'natural' / '2019' / '01' / '01' / 'thumbs' / 'epic_1b_20190101.jpg')
+    assert open(path, 'rb').read() == url.encode() * 100
+    assert (url, {'Accept-Encoding': 'identity', 'Range': 'bytes=1000-'}) in t.urls
+
+    # Complete files are verified from their end and not downloaded again.
+    t.urls = []
+    images = [{'image': 'epic_1b_20190101', 'date': '2019-01-01 01:51:44'}]
+    size = len(url.encode() * 100)
+
+    assert Nasa(transport=t).epic_download(directory, images=images, variant='thumbs')['epic_1b_20190101'].error is None
+    assert t.urls == [(url, {'Accept-Encoding': 'identity', 'Range': 'bytes={size}-'.format(size=size)})]
+
+    # A truncated file at the final path is resumed.
+    with open(path, 'r+b') as f:
+        f.truncate(1000)
+
+    assert Nasa(transport=t).epic_download(directory, images=images, variant='thumbs')['epic_1b_20190101'].error is None
+    assert open(path, 'rb').read() == url.encode() * 100
+
+    # Files of an unreported size are kept as .part files.
+    os.remove(path)
+    result = Nasa(transport=EpicTransport(length=False)).epic_download(directory, images=images, variant='thumbs')
+
+    assert isinstance(result['epic_1b_20190101'].error, IOError)
+    assert not os.path.exists(path) and os.path.getsize(path + '.part') == size
+
+    with pytest.raises(ValueError):
+        Nasa(transport=t).epic_download(directory, images=images, variant='tiff')
+
+
+class EpicRangeTransport(StubTransport):
+
+    def __init__(self):
+        super(EpicRangeTransport, self).__init__()
+        self.available = {'natural': ['2019-01-01', '2019-01-03'], 'enhanced': ['2019-01-03']}
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append((url, _clean_params(params)))
+        color, _, date = url.split('/EPIC/api/')[1].partition('/')
+
+        if date == 'available':
+            body = self.available[color]
+        elif date[5:] in self.available[color]:
+            body = [{'image': '{color}_{date}'.format(color=color, date=date[5:]), 'date': date[5:] + ' 00:31:45'}]
+        else:
+            body = []
+
+        return build_response(url=url, status_code=200, reason='OK', headers=self.headers,
+                              content=json.dumps(body).encode())
+
+
+def test_epic_range():
+    t = EpicRangeTransport()
+    n = Nasa(transport=t)
+
+    assert [i['image'] for i in n.epic_range('2019-01-01', '2019-01-04')] == \
+        ['natural_2019-01-01', 'natural_2019-01-03']
+    assert sorted(url.rsplit('/', 1)[1] for url, _ in t.urls) == ['2019-01-01', '2019-01-03', '2019-01-04', 'available']
+
+    # Dates after the index are requested directly and added to it, without the index being requested again.
+    t.urls = []
+    t.available['natural'].append('2019-01-05')
+
+    assert [i['image'] for i in n.epic_range('2019-01-01', '2019-01-05')] == \
+        ['natural_2019-01-01', 'natural_2019-01-03', 'natural_2019-01-05']
+    assert sorted(url.rsplit('/', 1)[1] for url, _ in t.urls) == ['2019-01-01', '2019-01-03', '2019-01-05']
+
+    # The availability index is reused, and both colors are fetched together.
+    t.urls = []
+    images = n.epic_range('2019-01-02', '2019-01-03', color=['natural', 'enhanced'])
+
+    assert {color: [i['image'] for i in images[color]] for color in images} == \
+        {'natural': ['natural_2019-01-03'], 'enhanced': ['enhanced_2019-01-03']}
+    assert sorted(url.rsplit('/', 2)[1] for url, _ in t.urls) == ['date', 'date', 'enhanced']
+
+    async def main():
+        async with AsyncNasa(transport=AsyncStub(EpicRangeTransport())) as an:
+            return await an.epic_range('2019-01-01', '2019-01-04', color='enhanced')
+
+    assert asyncio.run(main()) == [{'image': 'enhanced_2019-01-03', 'date': '2019-01-03 00:31:45'}]
+
+    with pytest.raises(ValueError):
+        n.epic_range('2019-01-01', color=['natural', 'infrared'])
+
+    with pytest.raises(ValueError):
+        n.epic_range('2019-01-01', max_workers=0)
+
+    # Dates are checked before the index is used.
+    t.urls = []
+
+    with pytest.raises(TypeError):
+        n.epic_range(start_date=None)
+
+    with pytest.raises(ValueError, match='start_date'):
+        n.epic_range('2019-1-1x')
+
+    assert t.urls == []
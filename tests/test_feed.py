@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+from nasapy.api import AsyncNasa, Nasa
+from nasapy.transport import build_response, _clean_params
+
+from stubs import AsyncStub, StubTransport
+
+
+class FeedTransport(StubTransport):
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append((url, _clean_params(params)))
+        start, end = params['start_date'], params['end_date']
+        link = 'https://api.nasa.gov/neo/rest/v1/feed?start_date={0}&end_date={1}&api_key=DEMO_KEY'
+        links = {'prev': link.format('prev', start), 'next': link.format(end, 'next'), 'self': link.format(start, end)}
+        body = {'links': links, 'element_count': 3,
+                'near_earth_objects': {start: [{'id': '1'}, {'id': start}], '2018-12-31': [{'id': '1'}]}}
+
+        return build_response(url=url, status_code=200, reason='OK', headers=self.headers,
+                              content=json.dumps(body).encode())
+
+
+def test_asteroid_feed_windows():
+    t = FeedTransport()
+    feed = Nasa(transport=t).asteroid_feed(start_date='2019-01-01', end_date='2019-01-20')
+
+    assert sorted((p['start_date'], p['end_date']) for _, p in t.urls) == \
+        [('2019-01-01', '2019-01-07'), ('2019-01-08', '2019-01-14'), ('2019-01-15', '2019-01-20')]
+    assert list(feed['near_earth_objects']) == ['2018-12-31', '2019-01-01', '2019-01-08', '2019-01-15']
+    assert feed['near_earth_objects']['2018-12-31'] == [{'id': '1'}]
+    assert feed['near_earth_objects']['2019-01-08'] == [{'id': '2019-01-08'}]
+    assert feed['element_count'] == 4
+    assert feed['links'] == {
+        'prev': 'https://api.nasa.gov/neo/rest/v1/feed?start_date=prev&end_date=2019-01-01&api_key=DEMO_KEY',
+        'next': 'https://api.nasa.gov/neo/rest/v1/feed?start_date=2019-01-20&end_date=next&api_key=DEMO_KEY',
+        'self': 'https://api.nasa.gov/neo/rest/v1/feed?start_date=2019-01-01&end_date=2019-01-20&api_key=DEMO_KEY'
+    }
+
+    async def main():
+        async with AsyncNasa(transport=AsyncStub(FeedTransport())) as n:
+            return await n.asteroid_feed(start_date='2019-01-01', end_date='2019-01-20')
+
+    assert asyncio.run(main()) == feed
+
+    with pytest.raises(ValueError):
+        Nasa(transport=t).asteroid_feed(start_date='2019-01-20', end_date='2019-01-01')
+
+
+def test_asteroid_feed_stream():
+    t = FeedTransport()
+    asteroids = Nasa(transport=t).asteroid_feed(start_date='2019-01-01', end_date='2019-01-20', stream=True)
+
+    # The windows are requested as the asteroids are read.
+    assert t.urls == []
+    assert [a['id'] for a in asteroids] == ['1', '2019-01-01', '2019-01-08', '2019-01-15']
+    assert len(t.urls) == 3
+
+    assert [a['id'] for a in Nasa(transport=t).asteroid_feed(start_date='2019-01-01', stream=True)] == \
+        ['1', '2019-01-01', '1']
+
+    t = StubTransport(body=json.dumps({'near_earth_objects': [{'id': '1'}, {'id': '2'}]}).encode())
+
+    assert [a['id'] for a in Nasa(transport=t).get_asteroids(stream=True)] == ['1', '2']
+
+    with pytest.raises(ValueError):
+        Nasa(transport=t).get_asteroids(asteroid_id=3542519, stream=True)
+
+    with pytest.raises(ValueError):
+        Nasa(transport=t).asteroid_feed(start_date='2019-01-01', stream=True, return_df=True)
+
+
+class BrowseTransport(StubTransport):
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append((url, _clean_params(params)))
+        page, size = params['page'], params['size']
+        body = {'page': {'size': size, 'total_pages': 5, 'number': page},
+                'near_earth_objects': [{'id': str(page * size + i)} for i in range(size)]}
+
+        return build_response(url=url, status_code=200, reason='OK', headers=self.headers,
+                              content=json.dumps(body).encode())
+
+
+def test_browse_asteroids(tmp_path):
+    checkpoint = str(tmp_path / 'browse.json')
+    n = Nasa(transport=BrowseTransport())
+    crawl = n.browse_asteroids(checkpoint=checkpoint, size=2, max_workers=2)
+
+    ids = [next(crawl)['id'] for _ in range(5)]
+    crawl.close()
+
+    assert ids == ['0', '1', '2', '3', '4']
+
+    # Pages 0 and 1 were finished, so the resumed crawl starts at page 2.
+    t = BrowseTransport()
+    ids = [neo['id'] for neo in Nasa(transport=t).browse_asteroids(checkpoint=checkpoint, size=2)]
+
+    assert ids == [str(i) for i in range(4, 10)]
+    assert sorted(p['page'] for _, p in t.urls) == [2, 3, 4]
+    assert list(Nasa(transport=t).browse_asteroids(checkpoint=checkpoint, size=2)) == []
+
+    with pytest.raises(ValueError):
+        next(Nasa(transport=t).browse_asteroids(checkpoint=checkpoint, size=5))
+
+    async def main():
+        async with AsyncNasa(transport=AsyncStub(BrowseTransport())) as an:
+            return [neo['id'] async for neo in an.browse_asteroids(size=2)]
+
+    assert asyncio.run(main()) == [str(i) for i in range(10)]
+
+
+class NeoTransport(StubTransport):
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append((url, _clean_params(params)))
+        neo_id = url.rsplit('/', 1)[1]
+
+        if neo_id == '404':
+            return build_response(url=url, status_code=404, reason='Not Found', headers=self.headers, content=b'')
+
+        return build_response(url=url, status_code=200, reason='OK', headers=self.headers,
+                              content=json.dumps({'id': neo_id}).encode())
+
+
+def test_get_asteroids_many():
+    t = NeoTransport()
+    results = Nasa(transport=t).get_asteroids_many([3542519, '404', '3542519', 2000433], max_workers=2)
+
+    assert list(results) == ['3542519', '404', '2000433']
+    assert results['3542519'].result == {'id': '3542519'}
+    assert isinstance(results['404'].error, requests.exceptions.HTTPError)
+    assert len(t.urls) == 3
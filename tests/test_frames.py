@@ -0,0 +1,138 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from nasapy.frames import donki_frames, neo_frame, wsa_enlil_arrays
+from nasapy.index import CloseApproachIndex
+
+
+NEO = {
+    'id': '3542519',
+    'neo_reference_id': '3542519',
+    'name': '(2010 PK9)',
+    'nasa_jpl_url': 'http://ssd.jpl.nasa.gov/sbdb.cgi?sstr=3542519',
+    'absolute_magnitude_h': 21.9,
+    'estimated_diameter': {
+        unit: {'estimated_diameter_min': 0.1, 'estimated_diameter_max': 0.2}
+        for unit in ('kilometers', 'meters', 'miles', 'feet')
+    },
+    'is_potentially_hazardous_asteroid': True,
+    'close_approach_data': [
+        {'close_approach_date': '1900-06-01', 'epoch_date_close_approach': -2195510400000,
+         'relative_velocity': {'kilometers_per_second': '30.19', 'kilometers_per_hour': '108684.7',
+                               'miles_per_hour': '67531.9'},
+         'miss_distance': {'astronomical': '0.39', 'lunar': '151.7', 'kilometers': '58341305.6',
+                           'miles': '36251600.7'},
+         'orbiting_body': 'Merc'},
+        {'close_approach_date': '2019-01-01', 'epoch_date_close_approach': 1546300800000,
+         'relative_velocity': {'kilometers_per_second': '10.5'},
+         'miss_distance': {'astronomical': '0.05'},
+         'orbiting_body': 'Earth'}
+    ],
+    'is_sentry_object': False
+}
+
+
+def test_neo_frame():
+    feed = {'element_count': 2, 'near_earth_objects': {'2019-01-02': [dict(NEO, id='2')], '2019-01-01': [NEO]}}
+    df = neo_frame(feed)
+
+    assert len(df) == 4
+    assert list(df['id']) == ['3542519', '3542519', '2', '2']
+    assert df['relative_velocity_kilometers_per_second'].dtype == float
+    assert df['miss_distance_lunar'].isna().tolist() == [False, True, False, True]
+    assert str(df['close_approach_date'].iloc[1]) == '2019-01-01 00:00:00'
+    assert df['estimated_diameter_meters_max'].iloc[0] == 0.2
+    assert df['is_potentially_hazardous_asteroid'].dtype == bool
+
+    # Integral values are floats as well.
+    approach = {'relative_velocity': {'kilometers_per_second': '3000'}, 'miss_distance': {'kilometers': '42'}}
+    df = neo_frame(dict(NEO, close_approach_data=[approach]))
+
+    assert df['relative_velocity_kilometers_per_second'].dtype == float
+    assert df['miss_distance_kilometers'].dtype == float
+    assert df['relative_velocity_kilometers_per_second'].iloc[0] == 3000.0
+
+    assert len(neo_frame(NEO)) == 2
+    assert len(neo_frame({'page': {}, 'near_earth_objects': [dict(NEO, close_approach_data=[])]})) == 1
+    assert len(neo_frame([])) == 0
+
+
+def test_close_approach_index():
+    index = CloseApproachIndex({'near_earth_objects': {'2019-01-01': [NEO]}})
+    index.add([dict(NEO, id='2', neo_reference_id='2'), dict(NEO, id='3', neo_reference_id='3', close_approach_data=[])])
+    index.add(NEO)
+
+    assert len(index) == 5
+    assert list(index.approaches(3542519)['close_approach_date'].dt.year) == [1900, 2019]
+    assert len(index.approaches('unknown')) == 0
+    assert len(index.between('2019-01-01', '2019-01-01')) == 2
+    assert len(index.between(end='1950-01-01')) == 2
+    assert len(index.between(start=datetime.date(2019, 1, 2))) == 0
+    assert sorted(index.within(0.1, unit='astronomical')['neo_reference_id']) == ['2', '3542519']
+    assert len(index.within(0.1, unit='astronomical', start='2019-01-01')) == 2
+    assert len(index.within(0.01, unit='astronomical')) == 0
+    assert len(index.within(152, start='1900-01-01', end='1900-12-31')) == 2
+
+    with pytest.raises(ValueError):
+        index.within(1, unit='parsecs')
+
+
+def test_donki_frames():
+    storms = [{'gstID': '2017-09-07T23:00:00-GST-001', 'startTime': '2017-09-07T23:00Z',
+               'allKpIndex': [{'observedTime': '2017-09-08T00:00Z', 'kpIndex': 8, 'source': 'NOAA'},
+                              {'observedTime': '2017-09-08T03:00:30Z', 'kpIndex': 7, 'source': 'NOAA'}],
+               'linkedEvents': None},
+              {'gstID': '2017-09-27T15:00:00-GST-001', 'startTime': '2017-09-27T15:00Z',
+               'allKpIndex': [{'observedTime': '2017-09-27T18:00Z', 'kpIndex': 6, 'source': 'NOAA'}],
+               'linkedEvents': [{'activityID': '2017-09-24T00:00:00-HSS-001'}]}]
+
+    frames = donki_frames('GST', storms)
+
+    assert sorted(frames) == ['allKpIndex', 'events', 'linkedEvents']
+    assert list(frames['events'].columns) == ['gstID', 'startTime']
+    assert str(frames['events']['startTime'].dt.tz) == 'UTC'
+    assert list(frames['allKpIndex']['gstID']) == [storms[0]['gstID']] * 2 + [storms[1]['gstID']]
+    assert list(frames['allKpIndex']['kpIndex']) == [8, 7, 6]
+    assert frames['allKpIndex']['observedTime'].notna().all()
+    assert frames['allKpIndex']['source'].dtype == 'category'
+    assert list(frames['linkedEvents']['activityID']) == ['2017-09-24T00:00:00-HSS-001']
+
+    assert list(donki_frames('FLR', {})) == ['events']
+
+    flares = donki_frames('FLR', [{'flrID': '2017-09-06T11:53:00-FLR-001', 'activeRegionNum': 12673},
+                                  {'flrID': '2017-09-10T15:35:00-FLR-001', 'activeRegionNum': None}])['events']
+
+    assert flares['activeRegionNum'].dtype == 'Int64'
+    assert flares['activeRegionNum'][0] == 12673
+    assert flares['activeRegionNum'].isna()[1]
+
+    with pytest.raises(ValueError):
+        donki_frames('XYZ', [])
+
+
+def test_wsa_enlil_arrays():
+    simulations = [{'simulationID': 'WSA-ENLIL/1', 'modelCompletionTime': '2019-01-03T18:26Z', 'au': 2.0,
+                    'cmeInputs': [{'cmeStartTime': '2019-01-02T23:12Z', 'speed': 430.0, 'cmeid': 'CME-1'}],
+                    'estimatedShockArrivalTime': None, 'kp_18': None, 'kp_180': None, 'impactList': None},
+                   {'simulationID': 'WSA-ENLIL/2', 'modelCompletionTime': '2019-01-04T18:26Z', 'au': 2.0,
+                    'cmeInputs': [], 'estimatedShockArrivalTime': '2019-01-06T00:00Z', 'kp_18': 3, 'kp_180': 6,
+                    'isEarthGB': True,
+                    'impactList': [{'isGlancingBlow': True, 'location': 'STEREO A', 'arrivalTime': '2019-01-05T12:00Z'},
+                                   {'isGlancingBlow': False, 'location': 'Earth', 'arrivalTime': '2019-01-06T00:00Z'}]}]
+
+    arrays = wsa_enlil_arrays(simulations)
+
+    assert list(arrays['simulation_id']) == ['WSA-ENLIL/1', 'WSA-ENLIL/2']
+    assert np.isnat(arrays['estimated_shock_arrival_time'][0])
+    assert arrays['estimated_shock_arrival_time'][1] == np.datetime64('2019-01-06T00:00')
+    assert np.isnan(arrays['kp_180'][0]) and arrays['kp_180'][1] == 6.0
+    assert list(arrays['is_earth_gb']) == [False, True]
+    assert list(arrays['cme_simulation']) == [0]
+    assert list(arrays['impact_simulation']) == [1, 1]
+    assert list(arrays['locations'][arrays['impact_location']]) == ['STEREO A', 'Earth']
+    assert list(arrays['impact_glancing_blow']) == [True, False]
+    assert arrays['impact_arrival_time'].dtype == np.dtype('datetime64[ns]')
+
+    assert all(len(array) == 0 for array in wsa_enlil_arrays({}).values())
@@ -0,0 +1,69 @@
+import pytest
+
+from nasapy.ratelimit import KeyPool, RateLimiter, TokenBucket
+
+
+def test_token_bucket():
+    b = TokenBucket(rate=10, capacity=2)
+
+    assert b.reserve() == 0
+    assert b.reserve() == 0
+    assert b.reserve() == pytest.approx(0.1, abs=0.01)
+    assert b.reserve() == pytest.approx(0.2, abs=0.01)
+
+    b.update(rate=1, capacity=1, remaining=0)
+
+    assert b.capacity == 1
+    assert b.tokens <= 0
+
+
+def test_rate_limiter_buckets():
+    limiter = RateLimiter(burst=5)
+
+    flr = limiter.bucket('https://api.nasa.gov/DONKI/FLR', {'api_key': 'a'})
+    other_key = limiter.bucket('https://api.nasa.gov/DONKI/FLR', {'api_key': 'b'})
+    insight = limiter.bucket('https://api.nasa.gov/insight_weather/', {'api_key': 'a'})
+    cad = limiter.bucket('https://ssd-api.jpl.nasa.gov/cad.api')
+
+    assert flr is limiter.bucket('https://api.nasa.gov/neo/rest/v1/feed', {'api_key': 'a'})
+    assert len({id(flr), id(other_key), id(insight), id(cad)}) == 4
+    assert cad.rate == 2.0
+    assert limiter.bucket('https://example.com/') is None
+
+
+def test_rate_limiter_update():
+    limiter = RateLimiter()
+    url, params = 'https://api.nasa.gov/DONKI/FLR', {'api_key': 'DEMO_KEY'}
+
+    limiter.update(url, params, {'X-RateLimit-Limit': '30', 'X-RateLimit-Remaining': '0'})
+    bucket = limiter.bucket(url, params)
+
+    assert bucket.rate == pytest.approx(30 / 3600)
+    assert bucket.capacity == 1
+    assert limiter._reserve(url, params) > 100
+
+
+def test_key_pool():
+    pool = KeyPool(['a', 'b'])
+
+    assert {pool.acquire(), pool.acquire()} == {'a', 'b'}
+
+    pool.update('a', {'X-RateLimit-Remaining': '10'})
+    pool.update('b', {'X-RateLimit-Remaining': '3'})
+
+    assert pool.acquire() == 'a'
+    assert pool.remaining['a'] == 9
+
+    pool.update('a', {'X-RateLimit-Remaining': '0'})
+
+    assert pool.acquire() == 'b'
+    assert pool.acquire() == 'b'
+
+    pool.update('b', {}, status_code=429)
+
+    assert pool.acquire() == 'a'
+
+    with pytest.raises(ValueError):
+        KeyPool([])
+    with pytest.raises(ValueError):
+        KeyPool('abc')
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+import requests
+
+from nasapy.api import Nasa
+from nasapy.retry import RetryPolicy
+from nasapy.transport import Transport, build_response
+
+
+class FlakySession(object):
+
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+
+        if self.failures:
+            failure = self.failures.pop(0)
+
+            if isinstance(failure, Exception):
+                raise failure
+
+            return build_response(url=url, status_code=failure, reason='Unavailable', headers={'Retry-After': '0'},
+                                  content=b'')
+
+        return build_response(url=url, status_code=200, reason='OK', headers={}, content=b'[]')
+
+
+def test_retries():
+    session = FlakySession([503, requests.exceptions.ConnectionError(), 429])
+    t = Transport(session=session)
+    n = Nasa(transport=t, retry=RetryPolicy(backoff=0.01, connect_timeout=2, read_timeout=7))
+
+    assert n.solar_flare() == []
+    assert session.timeouts == [(2, 7)] * 4
+
+    # The policy applies to the instance's requests only, leaving the shared transport's own policy in place.
+    assert t.retry.read_timeout == 30
+    t.get('https://api.nasa.gov/DONKI/FLR')
+    assert session.timeouts[-1] == (5, 30)
+
+
+def test_retries_exhausted():
+    session = FlakySession([502, 502, 502])
+    t = Transport(session=session, retry=RetryPolicy(retries=1, backoff=0.01))
+
+    assert t.get('https://api.nasa.gov/DONKI/FLR').status_code == 502
+    assert len(session.timeouts) == 2
+
+    session = FlakySession([requests.exceptions.ConnectTimeout()])
+
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        Transport(session=session, retry=RetryPolicy(retries=0)).get('https://api.nasa.gov/DONKI/FLR')
+
+
+def test_retry_policy():
+    policy = RetryPolicy(backoff=1, max_backoff=10, deadline=5)
+    retry_after = build_response(url='u', status_code=429, reason='', headers={'Retry-After': '2'}, content=b'')
+    too_long = build_response(url='u', status_code=429, reason='', headers={'Retry-After': '60'}, content=b'')
+    not_found = build_response(url='u', status_code=404, reason='', headers={}, content=b'')
+    start = time.monotonic()
+
+    assert policy.delay(0, start, retry_after) == 2
+    assert policy.delay(0, start, too_long) is None
+    assert policy.delay(0, start, not_found) is None
+    assert 0 <= policy.delay(1, start) <= 2
+    assert policy.delay(0, start - 4, retry_after) is None
+    assert policy.delay(3, start) is None
+    assert policy.timeouts(start - 3)[1] == pytest.approx(2, abs=0.1)
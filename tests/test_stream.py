@@ -0,0 +1,73 @@
+import io
+import json
+
+import pytest
+import requests
+
+from nasapy.api import close_approach
+from nasapy.stream import iter_records
+from nasapy.transport import Transport, get_transport, set_transport
+
+
+def chunked(document, size=1):
+    data = json.dumps(document).encode()
+
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def test_iter_records():
+    cad = {'signature': {'version': '1.1'}, 'count': '2', 'fields': ['des', 'dist'],
+           'data': [['433', '0.1'], ['2019 OK', '1e-3']]}
+    feed = {'links': {'next': 'x'}, 'element_count': 3,
+            'near_earth_objects': {'2019-01-01': [{'id': '1'}, {'id': '2'}], '2019-01-02': [{'id': 'é'}]}}
+    search = {'collection': {'version': '1.0', 'links': [{'rel': 'next'}], 'items': [{'n': 1}, {'n': 2.5}],
+                             'metadata': {'total_hits': 2}}}
+
+    assert list(iter_records(chunked(cad))) == [{'des': '433', 'dist': '0.1'}, {'des': '2019 OK', 'dist': '1e-3'}]
+    assert list(iter_records(chunked(feed, 3))) == [{'id': '1'}, {'id': '2'}, {'id': 'é'}]
+    assert list(iter_records(chunked(search, 7))) == [{'n': 1}, {'n': 2.5}]
+    assert list(iter_records(chunked([{'a': 1}, 12345, []]))) == [{'a': 1}, 12345, []]
+    assert list(iter_records(chunked({'data': []}))) == []
+    assert list(iter_records([b''])) == []
+
+    # Brackets and escaped quotes inside strings do not end a record, wherever the chunks split them.
+    tricky = {'data': [{'s': 'a\\"]}{["\\\\', 'n': [1, 2.5e3, None, True, {'x': 'é'}]}, 'b]']}
+
+    for size in (1, 2, 5):
+        assert list(iter_records(chunked(tricky, size))) == tricky['data']
+
+    with pytest.raises(ValueError):
+        list(iter_records([b'{"data": [1, 2']))
+
+
+class StreamSession(object):
+
+    def __init__(self, document):
+        self.body = json.dumps(document).encode()
+        self.kwargs = None
+
+    def get(self, url, params=None, **kwargs):
+        self.kwargs = kwargs
+        r = requests.Response()
+        r.status_code = 200
+        r.url = url
+        r.raw = io.BytesIO(self.body)
+
+        return r
+
+
+def test_stream_close_approach():
+    session = StreamSession({'count': '1', 'fields': ['des'], 'data': [['433']]})
+    default = get_transport()
+
+    try:
+        set_transport(Transport(session=session))
+        records = close_approach(des=433, stream=True)
+
+        assert list(records) == [{'des': '433'}]
+        assert session.kwargs['stream'] is True
+    finally:
+        set_transport(default)
+
+    with pytest.raises(ValueError):
+        close_approach(stream=True, return_df=True)
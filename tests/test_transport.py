@@ -0,0 +1,229 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from pandas import DataFrame
+
+from nasapy.api import AsyncNasa, Nasa, batch
+from nasapy.cache import MemoryCache
+from nasapy.retry import RetryPolicy
+from nasapy.transport import Transport, build_response, create_session, get_transport, set_transport, \
+    _SingleFlight, _clean_params, _encode_params
+
+from stubs import AsyncStub, StubTransport
+
+
+def test_create_session():
+    s = create_session(pool_maxsize=5, pool_sizes={'api.nasa.gov': 42})
+
+    assert isinstance(s, requests.Session)
+    assert s.get_adapter('https://api.nasa.gov/DONKI/FLR')._pool_maxsize == 42
+    assert s.get_adapter('https://ssd-api.jpl.nasa.gov/cad.api')._pool_maxsize == 10
+    assert s.get_adapter('https://example.com/')._pool_maxsize == 5
+
+
+def test_transport_injection():
+    session = requests.Session()
+    n = Nasa(transport=session)
+
+    assert isinstance(n.transport, Transport)
+    assert n.transport.session is session
+    assert isinstance(Nasa().transport, Transport)
+
+    default = get_transport()
+    t = Transport()
+
+    try:
+        set_transport(t)
+        assert get_transport() is t
+    finally:
+        set_transport(default)
+
+
+def test_clean_params():
+    assert _clean_params(None) is None
+    assert _clean_params({'a': 1, 'b': None, 'c': False}) == {'a': 1, 'c': False}
+
+
+def test_stub_transport():
+    t = StubTransport()
+    n = Nasa(transport=t)
+
+    assert n.solar_flare(start_date='2019-01-01', end_date='2019-01-31') == []
+    assert n.limit_remaining == '999'
+    assert t.urls[0] == ('https://api.nasa.gov/DONKI/FLR',
+                         {'api_key': 'DEMO_KEY', 'startDate': '2019-01-01', 'endDate': '2019-01-31'})
+
+
+def test_async_nasa():
+    t = AsyncStub(StubTransport(body=b'{"signature": {}, "count": "0", "data": [], "fields": []}'))
+
+    async def main():
+        async with AsyncNasa(transport=t) as n:
+            flares, cad = await asyncio.gather(n.solar_flare(start_date='2019-01-01', end_date='2019-01-31'),
+                                               n.close_approach(des=433, return_df=True))
+
+            with pytest.raises(TypeError):
+                await n.solar_flare(start_date=1)
+
+            with pytest.raises(ValueError):
+                await n.close_approach(h_min=2, h_max=1)
+
+        return flares, cad
+
+    flares, cad = asyncio.run(main())
+
+    assert flares['count'] == '0'
+    assert isinstance(cad, DataFrame)
+    assert n_requests(t, 'https://ssd-api.jpl.nasa.gov/cad.api') == 1
+
+
+def n_requests(t, url):
+    return len([u for u, _ in t.urls if u == url])
+
+
+def test_encode_params():
+    assert _encode_params({'a': True, 'b': None, 'c': 1.0, 'd': 'x'}) == {'a': 'True', 'c': '1.0', 'd': 'x'}
+
+
+def test_batch():
+    t = StubTransport()
+    n = Nasa(transport=t)
+
+    results = n.batch([('solar_flare', {'start_date': '2019-01-01', 'end_date': '2019-01-31'}),
+                       ('solar_flare', {'start_date': 1}),
+                       ('tle', None)],
+                      max_workers=2)
+
+    assert [r.index for r in results] == [0, 1, 2]
+    assert results[0].result == [] and results[0].error is None
+    assert isinstance(results[1].error, TypeError) and results[1].result is None
+    assert results[2].result == []
+    assert n_requests(t, 'https://data.ivanstanojevic.me/api/tle') == 1
+
+    assert sorted(r.index for r in n.batch([('geomagnetic_storm', None)] * 5, as_completed=True)) == list(range(5))
+
+    # The calls run before the results are iterated.
+    results = n.batch([('solar_flare', None)] * 3, as_completed=True)
+
+    for _ in range(100):
+        if n_requests(t, 'https://api.nasa.gov/DONKI/FLR') == 4:
+            break
+
+        time.sleep(0.01)
+
+    assert n_requests(t, 'https://api.nasa.gov/DONKI/FLR') == 4
+    assert len(list(results)) == 3
+
+    with pytest.raises(ValueError):
+        n.batch([('not_a_method', None)])
+    with pytest.raises(ValueError):
+        batch([('picture_of_the_day', None)])
+    with pytest.raises(ValueError):
+        n.batch([], max_workers=0)
+
+
+def test_async_batch():
+    t = AsyncStub(StubTransport())
+
+    async def main():
+        async with AsyncNasa(transport=t) as n:
+            return await n.batch([('solar_flare', None), ('tle', None), ('sentry', {'spk': 1, 'des': 1})])
+
+    results = asyncio.run(main())
+
+    assert results[0].result == [] and results[1].result == []
+    assert isinstance(results[2].error, ValueError)
+
+
+class KeySession(object):
+    # Throttles every request made with the key 'a'.
+
+    def __init__(self):
+        self.keys = []
+
+    def get(self, url, params=None, **kwargs):
+        self.keys.append(params['api_key'])
+        status, reason = (429, 'Too Many Requests') if params['api_key'] == 'a' else (200, 'OK')
+
+        return build_response(url=url, status_code=status, reason=reason, headers={'X-RateLimit-Remaining': '999'},
+                              content=b'[]')
+
+
+def test_key_rotation():
+    session = KeySession()
+    n = Nasa(keys=['a', 'b'], transport=Transport(session=session, cache=MemoryCache(),
+                                                  retry=RetryPolicy(backoff=0.01)))
+
+    # The retry after HTTP 429 is sent with the other key.
+    assert n.solar_flare(start_date='2019-01-01', end_date='2019-01-31') == []
+    assert session.keys == ['a', 'b']
+    assert n.key_pool.remaining == {'a': 999, 'b': 999}
+
+    # A response from the cache uses no key, and the throttled key is skipped.
+    n.solar_flare(start_date='2019-01-01', end_date='2019-01-31')
+
+    assert session.keys == ['a', 'b']
+    assert n.key_pool.remaining == {'a': 999, 'b': 999}
+
+    n.solar_flare(start_date='2019-02-01', end_date='2019-02-28')
+
+    assert session.keys == ['a', 'b', 'b']
+
+    with pytest.raises(ValueError):
+        Nasa(key='a', keys=['b'])
+
+
+class SlowSession(object):
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        with self.lock:
+            self.calls += 1
+
+        time.sleep(0.2)
+
+        return build_response(url=url, status_code=200, reason='OK', headers={'X-RateLimit-Remaining': '5'},
+                              content=b'{}')
+
+
+def test_coalescing():
+    session = SlowSession()
+    t = Transport(session=session)
+
+    with ThreadPoolExecutor(4) as pool:
+        responses = list(pool.map(lambda key: t.get('https://api.nasa.gov/insight_weather/', {'api_key': key}),
+                                  ['a', 'b', 'c', 'd']))
+
+    assert session.calls == 1
+    assert all(r.json() == {} for r in responses)
+    assert sum('X-RateLimit-Remaining' in r.headers for r in responses) == 1
+
+    t.get('https://api.nasa.gov/insight_weather/')
+
+    assert session.calls == 2
+
+
+def test_async_coalescing():
+    flights = _SingleFlight()
+    calls = []
+
+    async def send():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+
+        return build_response(url='u', status_code=200, reason='OK', headers={}, content=b'[]')
+
+    async def main():
+        return await asyncio.gather(*[flights.do_async('key', send) for _ in range(3)])
+
+    responses = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [r.json() for r in responses] == [[], [], []]